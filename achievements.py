@@ -0,0 +1,189 @@
+"""Companion growth and achievements, from one declarative ruleset shared by both apps.
+
+data/achievements.json sets how many points each kind of event is worth
+(event_log.KIND_NAMES, plus "task_list_done" when the last open task of
+a list is ticked off), the points at which each companion level starts,
+and the achievements. Each achievement is a rule over some kinds of event:
+
+- "count": `target` of them in all
+- "per_day": `target` of them in one local calendar day
+- "streak": at least one of them on `target` days in a row
+
+An untick ("task_undone") takes back a tick in "count" rules and in
+"per_day" rules on the same day, so ticking a task on and off again
+does not count it twice. A streak keeps its day.
+
+record_progress() folds in one event at a time. Each rule keeps a few
+numbers in the session's "achievements" field, such as a running count
+or the current day and its count, so an event costs a lookup of the
+rules for its kind however long the user's history is; nothing is
+recomputed from the event log. A rule's state is dropped once its
+achievement is earned, which can add bonus `points` once.
+benchmarks/check_achievements.py checks the results against a recompute
+from the whole history.
+
+The level follows the points but never goes down, so unticking a task
+does not shrink the companion.
+"""
+import bisect
+import functools
+import json
+import os
+from typing import NamedTuple
+
+import streamlit as st
+
+from event_log import KIND_NAMES, TASK_DONE, TASK_UNDONE
+from rollups import local_day
+from traces import timestamp
+
+RULESET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "achievements.json")
+TASK_LIST_DONE = "task_list_done"
+KINDS = frozenset(KIND_NAMES.values()) | {TASK_LIST_DONE}
+RULES = ("count", "per_day", "streak")
+UNDOES = {KIND_NAMES[TASK_UNDONE]: KIND_NAMES[TASK_DONE]}  # kind -> the kind whose events it takes back
+
+
+class Achievement(NamedTuple):
+    id: str
+    title: str
+    emoji: str
+    rule: str  # one of RULES
+    kinds: frozenset
+    target: int
+    points: int  # bonus, added once when it is earned
+
+
+class Ruleset(NamedTuple):
+    points: dict  # kind -> points per event
+    levels: tuple  # points at which levels 1, 2, ... start
+    achievements: tuple
+    by_kind: dict  # kind -> the achievements with a rule over it
+
+    def level(self, points):
+        """Companion level reached at `points`"""
+        return max(1, bisect.bisect_right(self.levels, points))
+
+
+class Outcome(NamedTuple):
+    points: int  # gained, with any bonuses; negative for an untick
+    level_up: bool
+    earned: tuple  # Achievements earned by this event
+
+
+def load_ruleset(path=RULESET_PATH):
+    """Read and check a ruleset file"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    achievements, by_kind = [], {}
+    for item in data["achievements"]:
+        achievement = Achievement(item["id"], item["title"], item.get("emoji", "🏅"), item["rule"],
+                                  frozenset(item["kinds"]), int(item.get("target", 1)), int(item.get("points", 0)))
+        if achievement.rule not in RULES:
+            raise ValueError(f"achievement {achievement.id!r}: unknown rule {achievement.rule!r}")
+        if not achievement.kinds or achievement.kinds - KINDS:
+            raise ValueError(f"achievement {achievement.id!r}: unknown kinds {sorted(achievement.kinds - KINDS)}")
+        if achievement.kinds & UNDOES.keys():
+            raise ValueError(f"achievement {achievement.id!r}: {sorted(achievement.kinds & UNDOES.keys())} only take events back")
+        achievements.append(achievement)
+        for kind in achievement.kinds:
+            by_kind.setdefault(kind, []).append(achievement)
+    if len({achievement.id for achievement in achievements}) != len(achievements):
+        raise ValueError("achievement ids must be unique")
+    if data["points"].keys() - KINDS:
+        raise ValueError(f"points for unknown kinds {sorted(data['points'].keys() - KINDS)}")
+    levels = tuple(data["levels"])
+    if not levels or levels[0] != 0 or list(levels) != sorted(set(levels)):
+        raise ValueError("levels must start at 0 and rise")
+    return Ruleset(dict(data["points"]), levels, tuple(achievements),
+                   {kind: tuple(rules) for kind, rules in by_kind.items()})
+
+
+@functools.lru_cache(maxsize=None)
+def get_ruleset():
+    """Process-wide ruleset from data/achievements.json"""
+    return load_ruleset()
+
+
+def new_progress(points=0, level=1):
+    """Empty "achievements" state; a session from before the ruleset keeps its points and level"""
+    return {"points": points, "level": level, "rules": {}, "earned": {}}
+
+
+def _step(achievement, state, day, undo=False):
+    # One rule's state after an event on `day`, or one taken back, and whether it is now earned
+    if achievement.rule == "count":
+        count = max(0, (state or 0) - 1) if undo else (state or 0) + 1
+        return count, count >= achievement.target and not undo
+    last, count = state or (None, 0)
+    if last is not None and day < last:
+        return state, False  # logged late, after a later day's event; it cannot extend either rule
+    if undo:
+        if achievement.rule == "per_day" and day == last:
+            return [day, max(0, count - 1)], False
+        return state, False
+    if achievement.rule == "per_day":
+        count = count + 1 if day == last else 1
+    elif day != last:
+        count = count + 1 if last is not None and day == last + 1 else 1
+    return [day, count], count >= achievement.target
+
+
+def record_progress(state, kind, ts=None, ruleset=None):
+    """Fold one event into the session's points, level and achievements; returns an Outcome.
+
+    `state` is the session's state mapping, whose "achievements" field
+    holds the rules' state. "progress" and "companion_level", which the
+    apps show, follow it. Achievements earned are also queued for
+    show_progress_news().
+    """
+    ruleset = get_ruleset() if ruleset is None else ruleset
+    progress = state["achievements"]
+    ts = timestamp() if ts is None else ts
+    gained, earned = ruleset.points.get(kind, 0), []
+    rules, done = progress["rules"], progress["earned"]
+    undo = kind in UNDOES
+    matching = ruleset.by_kind.get(UNDOES.get(kind, kind), ())
+    day = local_day(ts) if matching else None
+    for achievement in matching:
+        if achievement.id in done:
+            continue
+        rule_state, complete = _step(achievement, rules.get(achievement.id), day, undo)
+        if complete:
+            rules.pop(achievement.id, None)
+            done[achievement.id] = ts
+            gained += achievement.points
+            earned.append(achievement)
+        elif rule_state is not None:
+            rules[achievement.id] = rule_state
+    progress["points"] = max(0, progress["points"] + gained)
+    level = max(progress["level"], ruleset.level(progress["points"]))
+    level_up = level > progress["level"]
+    progress["level"] = level
+    state["progress"], state["companion_level"] = progress["points"], level
+    for achievement in earned:
+        announce(state, f"{achievement.emoji} Achievement unlocked: {achievement.title}")
+    return Outcome(gained, level_up, tuple(earned))
+
+
+def announce(state, text):
+    """Queue a message for the session's next show_progress_news()"""
+    state.setdefault("progress_news", []).append(text)
+
+
+def show_progress_news():
+    """Toast what was earned since the last run, such as by a session the timer scheduler ended"""
+    for text in st.session_state.pop("progress_news", []):
+        st.toast(text)
+
+
+def achievement_badges(state=None):
+    """One line of the session's earned achievements, or a hint if there are none yet"""
+    state = st.session_state if state is None else state
+    done = state["achievements"]["earned"]
+    badges = [f"{achievement.emoji} {achievement.title}" for achievement in get_ruleset().achievements
+              if achievement.id in done]
+    if badges:
+        st.caption(" · ".join(badges))
+    else:
+        st.caption("Finish a focus session to earn your first achievement.")
@@ -0,0 +1,202 @@
+"""JSON API over core.py, so widgets get breakdowns, moods and nudges without a rerun.
+
+    python api.py [--host 127.0.0.1] [--port 8600]
+
+A stdlib threaded HTTP/1.1 server: connections are kept alive between
+requests, and each one is handled on its own thread. Every endpoint
+takes and returns a JSON object:
+
+    GET  /healthz
+    POST /v1/subtasks  {"task": "Clean my room"}             -> {"subtasks": [...]}
+    POST /v1/mood      {"text": "I'm exhausted"}             -> {"mood": "negative"}
+    POST /v1/moods     {"texts": ["...", ...]}               -> {"moods": [...]}
+    POST /v1/nudge     {"mood": "negative", "context": "break", "recent": [...]}
+                                                             -> {"id": ..., "text": ..., "recent": [...]}
+    POST /v1/batch     {"requests": [{"path": "/v1/mood", "body": {...}}, ...]}
+                                                             -> {"responses": [{"status": 200, "body": {...}}, ...]}
+
+/v1/moods scores its texts through the sentiment batcher in one go, and
+/v1/batch runs any mix of the other endpoints in one round trip. Both
+take up to MAX_ITEMS entries. A client keeps its own no-repeat list for
+nudges by sending back the "recent" it was given. Errors come back as
+{"error": message} with a 4xx or 500 status.
+"""
+import argparse
+import json
+import os
+import sys
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import analyze_mood, analyze_moods, generate_subtasks, pick_nudge
+from sentiment import get_batcher
+
+API_HOST = os.environ.get("NEURONUDGE_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("NEURONUDGE_API_PORT", 8600))
+MAX_BODY = 1024 * 1024  # bytes
+MAX_ITEMS = 1000  # texts in /v1/moods, requests in /v1/batch
+MAX_TEXT = 10000  # characters in one task or mood text
+KEEPALIVE_TIMEOUT = 30.0  # seconds an idle connection is kept open
+BACKLOG = 128  # connections waiting to be accepted
+
+
+class BadRequest(Exception):
+    """A request the API cannot answer; sent back as a 400 with its message"""
+
+
+def _text(body, field):
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise BadRequest(f'"{field}" must be a non-empty string')
+    if len(value) > MAX_TEXT:
+        raise BadRequest(f'"{field}" is longer than {MAX_TEXT} characters')
+    return value
+
+
+def _items(body, field):
+    value = body.get(field)
+    if not isinstance(value, list) or not value:
+        raise BadRequest(f'"{field}" must be a non-empty list')
+    if len(value) > MAX_ITEMS:
+        raise BadRequest(f'"{field}" has more than {MAX_ITEMS} entries')
+    return value
+
+
+def subtasks(body):
+    return {"subtasks": generate_subtasks(_text(body, "task"))}
+
+
+def mood(body):
+    return {"mood": analyze_mood(_text(body, "text"))}
+
+
+def moods(body):
+    texts = _items(body, "texts")
+    for text in texts:
+        if not isinstance(text, str) or len(text) > MAX_TEXT:
+            raise BadRequest(f'"texts" must hold strings of at most {MAX_TEXT} characters')
+    return {"moods": analyze_moods(texts)}
+
+
+def nudge(body):
+    recent = body.get("recent", [])
+    if not isinstance(recent, list) or not all(isinstance(item, str) for item in recent):
+        raise BadRequest('"recent" must be a list of nudge ids')
+    try:
+        picked = pick_nudge(str(body.get("mood", "neutral")), str(body.get("context", "encouragement")),
+                            recent=recent)
+    except KeyError:
+        raise BadRequest(f'unknown context {body.get("context")!r}') from None
+    return {"id": picked.id, "text": picked.text, "recent": recent}
+
+
+def batch(body):
+    responses = []
+    for request in _items(body, "requests"):
+        if not isinstance(request, dict):
+            responses.append({"status": 400, "body": {"error": "each request must be an object"}})
+            continue
+        if request.get("path") == "/v1/batch":
+            responses.append({"status": 400, "body": {"error": "batches cannot be nested"}})
+            continue
+        status, payload = dispatch(request.get("path"), request.get("body", {}))
+        responses.append({"status": status, "body": payload})
+    return {"responses": responses}
+
+
+ROUTES = {
+    "/v1/subtasks": subtasks,
+    "/v1/mood": mood,
+    "/v1/moods": moods,
+    "/v1/nudge": nudge,
+    "/v1/batch": batch,
+}
+
+
+def dispatch(path, body):
+    """(status, JSON payload) for one POST"""
+    route = ROUTES.get(path)
+    if route is None:
+        return 404, {"error": f"no endpoint {path}"}
+    if not isinstance(body, dict):
+        return 400, {"error": "the body must be a JSON object"}
+    try:
+        return 200, route(body)
+    except BadRequest as exc:
+        return 400, {"error": str(exc)}
+    except Exception:
+        traceback.print_exc()
+        return 500, {"error": "internal error"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; without this, Nagle holds the body
+    # back until the client's delayed ACK, adding ~40 ms to every kept-alive request
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == "/healthz":
+            self._send_json(200, {"ok": True})
+        else:
+            self._send_json(404, {"error": f"no endpoint {self.path}"})
+
+    def do_POST(self):
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self._send_json(411, {"error": "Content-Length is required"})
+            return
+        if int(length) > MAX_BODY:
+            self.close_connection = True  # the body is left unread
+            self._send_json(413, {"error": f"the body is larger than {MAX_BODY} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(length)))
+        except ValueError:
+            self._send_json(400, {"error": "the body is not valid JSON"})
+            return
+        self._send_json(*dispatch(self.path.split("?", 1)[0], body))
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = BACKLOG
+
+
+def serve(host=API_HOST, port=API_PORT):
+    """An ApiServer bound to host:port; call serve_forever() on it"""
+    get_batcher()  # start loading the mood model now rather than on the first request
+    return ApiServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port)
+    print(f"NeuroNudge API on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,34 @@
 import streamlit as st
-import time
-import random
-from datetime import datetime, timedelta
-import openai  # You'll need to install this: pip install openai
-import os
+from datetime import timedelta
+
+from achievements import (TASK_LIST_DONE, achievement_badges, announce, new_progress, record_progress,
+                          show_progress_news)
+from core import generate_subtasks
+from event_log import (BREAK_COMPLETE, BREAK_START, BREAK_STOP, FOCUS_COMPLETE, FOCUS_START,
+                       FOCUS_STOP, KIND_NAMES, MOOD_READING, TASK_DONE, TASK_UNDONE, log_event, log_mood)
+from focus_timer import COMPLETE_SLACK, focus_timer
+from history import history_dashboard
+from intervals import new_model, record_break, record_focus, suggest
+from metrics import section, start_rerun, timed, timed_fragment
+from nudges import companion_emoji, get_nudge_message
+from profiler import profiled_fragment, start_capture
+from sentiment import analyze_mood
+from session_store import restore_session, restored_fragment, save_session, session_id
+from signups import Signup, get_signup_queue
+from sounds import sound_url
+from stylesheets import stylesheet_link
+from subtask_cache import get_cache
+from task_list import reset_task_list, task_list
+from tasks import Task, tasks_from_subtasks
+from timer_scheduler import cancel_session_timer, schedule_session_timer
+from traces import now, record_rerun, recorded_fragment, session_random
+
+# Opt-in per-section timing (see metrics.py); a no-op unless metrics are enabled
+rerun_timer = start_rerun("app")
+# Admin-only sampling profile of this rerun, armed with ?profile=N (see profiler.py)
+rerun_capture = start_capture("app")
+# Widget events for replay, when NEURONUDGE_TRACE_DIR is set (see traces.py)
+record_rerun("app")
 
 # Set page configuration
 st.set_page_config(
@@ -13,205 +38,25 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS with space theme
-st.markdown("""
-<style>
-    :root {
-        --cosmic-blue: #0a0e2a;
-        --stardust: #1a1f4b;
-        --plum-purple: #8a2be2;
-        --focus-red: #ff4d4d;
-        --star-yellow: #ffd700;
-        --break-pink: #ff2a6d;
-        --ai-blue: #05d9e8;
-        --progress-green: #00cc66;
-        --cosmic-text: #ffffff;
-    }
-
-    .stApp {
-        background-color: var(--cosmic-blue);
-        color: var(--cosmic-text);
-        font-family: 'Montserrat', sans-serif;
-        background-image: 
-            radial-gradient(circle at 10% 20%, rgba(255, 215, 0, 0.1) 0%, transparent 20%),
-            radial-gradient(circle at 90% 60%, rgba(138, 43, 226, 0.1) 0%, transparent 20%),
-            radial-gradient(circle at 40% 80%, rgba(255, 42, 109, 0.1) 0%, transparent 20%);
-    }
-
-    .main-header {
-        font-family: 'Press Start 2P', cursive;
-        font-size: 2.5rem;
-        color: var(--star-yellow);
-        text-shadow: 0 0 10px var(--star-yellow);
-        margin-bottom: 1rem;
-    }
-
-    .main-header span {
-        color: var(--ai-blue);
-    }
-
-    .feature-card {
-        background: rgba(26, 31, 75, 0.6);
-        border-radius: 20px;
-        padding: 30px;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        margin-bottom: 20px;
-        height: 100%;
-        transition: all 0.3s ease;
-    }
-
-    .feature-card:hover {
-        transform: translateY(-10px);
-        box-shadow: 0 15px 30px rgba(0, 0, 0, 0.2);
-        border-color: rgba(5, 217, 232, 0.3);
-    }
-
-    .demo-panel {
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 15px;
-        padding: 20px;
-        margin-bottom: 20px;
-    }
-
-    .nudge-container {
-        padding: 15px;
-        background: rgba(5, 217, 232, 0.1);
-        border-radius: 15px;
-        border-left: 4px solid var(--ai-blue);
-        margin-top: 20px;
-    }
-
-    .task-item {
-        display: flex;
-        align-items: center;
-        gap: 10px;
-        padding: 10px 0;
-        border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-    }
-
-    .task-checkbox {
-        width: 20px;
-        height: 20px;
-        border-radius: 50%;
-        border: 2px solid var(--ai-blue);
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        cursor: pointer;
-    }
-
-    .task-checkbox.checked {
-        background-color: var(--progress-green);
-        border-color: var(--progress-green);
-    }
-
-    .task-text.completed {
-        text-decoration: line-through;
-        opacity: 0.7;
-    }
-
-    .timer-display {
-        font-size: 3rem;
-        text-align: center;
-        margin: 20px 0;
-        font-weight: 800;
-        color: var(--star-yellow);
-    }
-
-    .stButton > button {
-        background: linear-gradient(45deg, var(--plum-purple), var(--ai-blue));
-        color: white;
-        border-radius: 30px;
-        font-weight: 600;
-        padding: 16px 40px;
-        border: none;
-        box-shadow: 0 5px 15px rgba(138, 43, 226, 0.4);
-        transition: all 0.3s ease;
-        width: 100%;
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 8px 25px rgba(138, 43, 226, 0.6);
-    }
-
-    .nav-button {
-        background: rgba(26, 31, 75, 0.6) !important;
-        margin-bottom: 10px;
-    }
-
-    .nav-button:hover {
-        background: rgba(26, 31, 75, 0.8) !important;
-    }
-
-    .sound-button {
-        background: rgba(138, 43, 226, 0.3) !important;
-        margin-bottom: 5px;
-    }
-
-    .sound-button:hover {
-        background: rgba(138, 43, 226, 0.5) !important;
-    }
-
-    .progress-bar {
-        height: 24px;
-        background-color: rgba(255, 255, 255, 0.1);
-        border-radius: 12px;
-        margin: 12px 0;
-        overflow: hidden;
-    }
-
-    .progress-fill {
-        height: 100%;
-        background: linear-gradient(90deg, var(--ai-blue), var(--progress-green)) !important;
-        border-radius: 12px;
-        text-align: center;
-        color: var(--cosmic-text);
-        line-height: 24px;
-        transition: width 0.5s;
-        font-weight: 500;
-    }
-
-    .companion {
-        text-align: center;
-        font-size: 50px;
-        color: var(--progress-green);
-        animation: gentle-pulse 2s infinite;
-    }
-
-    @keyframes gentle-pulse {
-        0% { transform: scale(1); opacity: 0.8; }
-        50% { transform: scale(1.03); opacity: 1; }
-        100% { transform: scale(1); opacity: 0.8; }
-    }
-
-    @keyframes fadeUp {
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-
-    .fade-up {
-        opacity: 0;
-        transform: translateY(30px);
-        animation: fadeUp 1s ease forwards;
-    }
-
-    @import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;800&family=Press+Start+2P&display=swap');
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS with space theme, served from static/ (see stylesheets.py)
+st.markdown(stylesheet_link("space"), unsafe_allow_html=True)
+rerun_timer.lap("css")
+
+# Session state that survives a refresh or restart; saved at the end of each run
+PERSISTED_FIELDS = ("tasks", "timer_active", "timer_end", "timer_duration", "current_nudge",
+                    "mood", "progress", "companion_level", "sound", "interval_model",
+                    "timer_mode", "timer_started", "timer_mood", "achievements")
+restore_session("app", PERSISTED_FIELDS)
 
 # Initialize all session state variables
 if 'page' not in st.session_state:
     st.session_state.page = "Home"
 if 'tasks' not in st.session_state:
     st.session_state.tasks = [
-        {"id": 1, "text": "Research project requirements", "completed": False},
-        {"id": 2, "text": "Create project outline", "completed": True},
-        {"id": 3, "text": "Draft initial content", "completed": False},
-        {"id": 4, "text": "Review and refine", "completed": False}
+        Task(1, "Research project requirements"),
+        Task(2, "Create project outline", completed=True),
+        Task(3, "Draft initial content"),
+        Task(4, "Review and refine")
     ]
 if 'timer_active' not in st.session_state:
     st.session_state.timer_active = False
@@ -225,121 +70,245 @@ if 'progress' not in st.session_state:
     st.session_state.progress = 0
 if 'companion_level' not in st.session_state:
     st.session_state.companion_level = 1
+if 'achievements' not in st.session_state:
+    # Rule state behind progress and companion_level; see achievements.py
+    st.session_state.achievements = new_progress(st.session_state.progress, st.session_state.companion_level)
 if 'sound' not in st.session_state:
     st.session_state.sound = "None"
+if 'interval_model' not in st.session_state:
+    st.session_state.interval_model = new_model()  # learned focus/break lengths, see intervals.py
 if 'timer_duration' not in st.session_state:
-    st.session_state.timer_duration = 25 * 60  # 25 minutes in seconds
-
-# Nudge messages for variety
-nudge_messages = [
-    "You've made great progress on your outline! Would breaking the content drafting into two 25-minute sessions help?",
-    "Based on your energy levels, I suggest a 5-minute stretch break before your next focus session.",
-    "Remember to hydrate! Your brain works better when you're properly hydrated.",
-    "Nice work focusing for 25 minutes! Time for a well-deserved break.",
-    "Breaking tasks into smaller steps makes them more manageable. You've got this!"
-]
-
-# Mood analysis function
-def analyze_mood(text):
-    positive_words = ["good", "great", "happy", "excited", "ready", "focus", "productive", "energetic"]
-    negative_words = ["tired", "sad", "anxious", "stressed", "overwhelmed", "exhausted", "drained"]
+    st.session_state.timer_duration = suggest(st.session_state.interval_model, st.session_state.mood)[0] * 60
+if 'timer_mode' not in st.session_state:
+    st.session_state.timer_mode = "focus"  # or "break"
+if 'timer_started' not in st.session_state:
+    st.session_state.timer_started = None
+if 'timer_mood' not in st.session_state:
+    st.session_state.timer_mood = None  # mood when the current interval started
+rerun_timer.lap("session_state")
+
+# Function to generate subtasks with LLM
+@timed("app", "generate_subtasks_with_llm")
+def generate_subtasks_with_llm(task_description, on_subtask=None):
+    """Subtasks from the template catalog or the LLM; see core.generate_subtasks"""
+    return generate_subtasks(task_description, on_subtask)
+
+def next_nudge(context, state=None):
+    """A nudge for the current mood and a context, skipping ones this session saw recently"""
+    state = st.session_state if state is None else state
+    return get_nudge_message(state["mood"], session_random(state), context, state.setdefault("recent_nudges", []))
+
+def count_progress(kind, ts=None, state=None):
+    """Count an event towards the companion's growth and achievements"""
+    state = st.session_state if state is None else state
+    if record_progress(state, kind, ts).level_up:
+        announce(state, next_nudge("milestone", state))
+
+def finish_interval(completed, state=None, user=None):
+    """Tell the interval learner how the focus session or break that just ended went"""
+    state = st.session_state if state is None else state
+    started = state["timer_started"]
+    if started is None:
+        return  # started before intervals were learned
+    planned = (state["timer_end"] - started).total_seconds()
+    elapsed = planned if completed else (now() - started).total_seconds()
+    focus = state["timer_mode"] == "focus"
+    kind = (FOCUS_COMPLETE if completed else FOCUS_STOP) if focus else (BREAK_COMPLETE if completed else BREAK_STOP)
+    # A completion can be noticed late, e.g. when the page was closed, so it is logged when it ended
+    ended = state["timer_end"].timestamp() if completed else None
+    log_event("app", kind, user=user, mood=state["timer_mood"], elapsed=elapsed, planned=planned, ts=ended)
+    count_progress(KIND_NAMES[kind], ended, state)
+    record = record_focus if focus else record_break
+    record(state["interval_model"], state["timer_mood"], planned, elapsed, completed)
+    # The next session defaults to what was learned; the slider can still override it
+    focus_minutes = suggest(state["interval_model"], state["mood"])[0]
+    state["timer_duration"] = focus_minutes * 60
+    state["timer_duration_slider"] = focus_minutes
+
+def complete_interval(state, user):
+    """End the focus session or break on time; called by the timer scheduler, even when the page is closed"""
+    if state.get("timer_active"):
+        finish_interval(True, state, user)
+        state["timer_active"] = False
+        state["current_nudge"] = next_nudge("timer_done", state)
+
+def start_interval(mode, minutes):
+    st.session_state.timer_active = True
+    st.session_state.timer_mode = mode
+    st.session_state.timer_started = now()
+    st.session_state.timer_mood = st.session_state.mood
+    st.session_state.timer_end = st.session_state.timer_started + timedelta(minutes=minutes)
+    log_event("app", FOCUS_START if mode == "focus" else BREAK_START, planned=minutes * 60)
+
+def log_task_tick(row, done):
+    kind = TASK_DONE if done else TASK_UNDONE
+    log_event("app", kind, task=row)
+    count_progress(KIND_NAMES[kind])
+
+def log_list_done():
+    count_progress(TASK_LIST_DONE)
+
+# Focus timer event handler, called by the browser-side countdown
+def handle_timer_event(event):
+    # Every event ends or replaces the running interval, so take it back from the scheduler
+    # first; if the scheduler is ending it right now this waits, and it is already over
+    cancel_session_timer()
+    if event == "start":
+        if st.session_state.timer_active:
+            finish_interval(completed=False)  # back to work before the break was over
+        start_interval("focus", st.session_state.timer_duration / 60)
+    elif event == "pause":
+        if st.session_state.timer_active:
+            finish_interval(completed=False)
+        st.session_state.timer_active = False
+    elif event == "break":
+        if st.session_state.timer_active:
+            finish_interval(completed=False)
+        start_interval("break", suggest(st.session_state.interval_model, st.session_state.mood)[1])
+        st.session_state.current_nudge = next_nudge("break")
+    elif event == "complete":
+        # Only the server's clock ends an interval; one reported early is left to run (and rescheduled)
+        if st.session_state.timer_active and now() >= st.session_state.timer_end - timedelta(seconds=COMPLETE_SLACK):
+            complete_interval(st.session_state, session_id())
+
+# Demo page panels. Each one is a fragment, so interacting with a panel
+# reruns just that panel instead of the whole page.
+@st.fragment
+@restored_fragment
+@timed_fragment("app", "fragment:task_breakdown")
+@profiled_fragment("app")
+@recorded_fragment("app")
+def task_breakdown_panel():
+    st.markdown('<div class="demo-panel">', unsafe_allow_html=True)
+    st.subheader("Task Breakdown")
     
-    if any(word in text.lower() for word in positive_words):
-        return "positive"
-    elif any(word in text.lower() for word in negative_words):
-        return "negative"
-    return "neutral"
-
-# Get nudge message based on mood
-def get_nudge_message(mood):
-    positive_nudges = [
-        "You're doing great! Keep up the momentum! 🌟",
-        "Your progress is amazing! Let's keep going! 💪",
-        "Wow, you're on fire! Ready for the next step? 🔥",
-        "Your focus is impressive! Keep shining! ✨"
-    ]
+    # Task input for user
+    new_task = st.text_input("Enter a task you'd like to break down:", 
+                            placeholder="e.g., Write a research paper on climate change", key="task_input")
     
-    neutral_nudges = [
-        "Let's take this one step at a time. You've got this! 👍",
-        "Breaking things down makes them more manageable. Ready to continue? 📋",
-        "Focus on just this one thing right now. You can do it! ✨",
-        "Every task completed brings you closer to your goals. Keep going! 🌟"
-    ]
+    # Button to generate subtasks using LLM
+    if st.button("Generate Subtasks with AI", key="generate_subtasks_btn"):
+        if new_task:
+            with st.spinner("AI is breaking down your task..."):
+                # Call function to generate subtasks using LLM, showing them as they stream in
+                preview = st.empty()
+                generated_subtasks = generate_subtasks_with_llm(
+                    new_task,
+                    on_subtask=lambda subtasks: preview.markdown(
+                        "\n".join(f"{i + 1}. {text}" for i, text in enumerate(subtasks)))
+                )
+                preview.empty()
+                if generated_subtasks:
+                    st.session_state.tasks = tasks_from_subtasks(generated_subtasks)
+                    reset_task_list()
+                    st.success("AI has generated subtasks for you!")
+                else:
+                    st.error("Failed to generate subtasks. Please try again.")
+        else:
+            st.warning("Please enter a task first.")
+    st.caption(get_cache().summary())
     
-    negative_nudges = [
-        "It's okay to feel overwhelmed. Let's just focus on one small thing. 🌱",
-        "Be kind to yourself. How about we try a shorter focus session? 🕊",
-        "Remember to breathe. You're doing better than you think. 💚",
-        "Progress, not perfection. Small steps are still steps forward. 🌈"
-    ]
+    # Display subtasks
+    if st.session_state.tasks:
+        st.markdown("### Your Subtasks:")
+        task_list(on_toggle=log_task_tick, on_finished=log_list_done)
     
-    if mood == "positive":
-        return random.choice(positive_nudges)
-    elif mood == "negative":
-        return random.choice(negative_nudges)
-    else:
-        return random.choice(neutral_nudges)
-
-# Function to generate subtasks with LLM
-def generate_subtasks_with_llm(task_description):
-    """
-    Generate subtasks using an LLM (ChatGPT API)
-    This is a placeholder implementation - you'll need to add your actual API integration
-    """
-    # In a real implementation, you would call the OpenAI API here
-    # For now, we'll use a mock implementation with some predefined patterns
+    st.markdown('<div class="nudge-container">', unsafe_allow_html=True)
+    st.markdown('<p class="nudge-text">"You\'ve made great progress on your outline! Would breaking the content drafting into two 25-minute sessions help?"</p>', unsafe_allow_html=True)
+    st.markdown('<div class="nudge-author"><span>🤖</span><span>Your NeuroNudge Assistant</span></div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    show_progress_news()
+    save_session(PERSISTED_FIELDS)
+
+@st.fragment
+@restored_fragment
+@timed_fragment("app", "fragment:focus_timer")
+@profiled_fragment("app")
+@recorded_fragment("app")
+def focus_timer_panel():
+    st.markdown('<div class="demo-panel">', unsafe_allow_html=True)
+    st.subheader("Focus Timer")
+    
+    # Timer runs in the browser and only reports start/pause/break/completion
+    if st.session_state.timer_active and now() >= st.session_state.timer_end:
+        handle_timer_event("complete")  # finished while the page was closed
+
+    # Timer duration selection, defaulting to the learned focus length
+    if "timer_duration_slider" not in st.session_state:
+        st.session_state.timer_duration_slider = st.session_state.timer_duration // 60
+    timer_minutes = st.slider("Select focus duration (minutes):", 5, 60, key="timer_duration_slider")
+    st.session_state.timer_duration = timer_minutes * 60
+    focus_minutes, break_minutes = suggest(st.session_state.interval_model, st.session_state.mood)
+    st.caption(f"Suggested for you: {focus_minutes}-minute focus sessions, {break_minutes}-minute breaks")
+
+    time_remaining = st.session_state.timer_duration
+    if st.session_state.timer_active:
+        time_remaining = (st.session_state.timer_end - now()).total_seconds()
+    timer_event = focus_timer(time_remaining, st.session_state.timer_duration,
+                              st.session_state.timer_active, on_event=handle_timer_event)
+    if st.session_state.timer_active:
+        # Ends the interval on time even if this page is closed or its countdown is throttled
+        schedule_session_timer(st.session_state.timer_end.timestamp(), PERSISTED_FIELDS, complete_interval)
+
+    # Play completion sound
+    if timer_event == "complete" and st.session_state.sound != "None":
+        st.balloons()  # Visual feedback since we can't play audio directly
+
+    st.markdown('<div class="nudge-container">', unsafe_allow_html=True)
+    st.markdown(f'<p class="nudge-text">"{st.session_state.current_nudge}"</p>', unsafe_allow_html=True)
+    st.markdown('<div class="nudge-author"><span>🌱</span><span>Your Progress Companion</span></div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
     
-    # This is where you would make the actual API call:
-    # import openai
-    # response = openai.ChatCompletion.create(
-    #     model="gpt-3.5-turbo",
-    #     messages=[
-    #         {"role": "system", "content": "You are a helpful assistant that breaks down tasks into manageable subtasks for people with ADHD."},
-    #         {"role": "user", "content": f"Break down this task into 4-6 specific, actionable subtasks: {task_description}"}
-    #     ]
-    # )
-    # subtasks = response.choices[0].message.content.split('\n')
+    if st.button("Generate New Nudge", key="nudge_btn"):
+        st.session_state.current_nudge = next_nudge("tip")
+        st.rerun(scope="fragment")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+    show_progress_news()
+    save_session(PERSISTED_FIELDS)
+
+@st.fragment
+@restored_fragment
+@timed_fragment("app", "fragment:calming_sounds")
+@profiled_fragment("app")
+@recorded_fragment("app")
+def calming_sounds_row():
+    st.subheader("🎵 Calming Sounds")
+    sound_col1, sound_col2, sound_col3, sound_col4, sound_col5 = st.columns(5)
     
-    # Mock implementation for demonstration:
-    task_lower = task_description.lower()
+    with sound_col1:
+        if st.button("None", key="sound_none", use_container_width=True):
+            st.session_state.sound = "None"
+    with sound_col2:
+        if st.button("Rain", key="sound_rain", use_container_width=True):
+            st.session_state.sound = "Rain"
+    with sound_col3:
+        if st.button("Forest", key="sound_forest", use_container_width=True):
+            st.session_state.sound = "Forest"
+    with sound_col4:
+        if st.button("Cafe", key="sound_cafe", use_container_width=True):
+            st.session_state.sound = "Cafe"
+    with sound_col5:
+        if st.button("White Noise", key="sound_white", use_container_width=True):
+            st.session_state.sound = "White Noise"
     
-    if any(word in task_lower for word in ["write", "paper", "essay", "article"]):
-        return [
-            "Research the topic and gather sources",
-            "Create an outline with main points",
-            "Write the first draft",
-            "Revise and edit for clarity",
-            "Format and add citations",
-            "Proofread for errors"
-        ]
-    elif any(word in task_lower for word in ["clean", "organize", "tidy"]):
-        return [
-            "Gather all necessary cleaning supplies",
-            "Declutter surfaces and put items in their places",
-            "Dust all surfaces and furniture",
-            "Vacuum or sweep floors",
-            "Clean windows and mirrors",
-            "Take out trash and recycling"
-        ]
-    elif any(word in task_lower for word in ["study", "learn", "review"]):
-        return [
-            "Review previous notes and materials",
-            "Read and highlight key concepts",
-            "Create summary notes or flashcards",
-            "Practice with sample questions",
-            "Teach the concepts to someone else",
-            "Review areas of difficulty"
-        ]
-    else:
-        # Generic breakdown for any task
-        return [
-            "Research and gather information",
-            "Plan your approach",
-            "Execute the main components",
-            "Review and refine your work",
-            "Prepare for next steps",
-            "Celebrate completion!"
-        ]
+    if st.session_state.sound != "None":
+        st.info(f"Playing gentle {st.session_state.sound.lower()} sounds...")
+        url = sound_url(st.session_state.sound)
+        if url:
+            st.audio(url, loop=True, autoplay=True)
+    save_session(PERSISTED_FIELDS)
+
+@st.fragment
+@restored_fragment
+@timed_fragment("app", "fragment:history")
+@profiled_fragment("app")
+@recorded_fragment("app")
+def history_panel():
+    st.subheader("📈 Your Focus History")
+    history_dashboard("app")
+    save_session(PERSISTED_FIELDS)
 
 # Navigation buttons
 col1, col2, col3, col4, col5 = st.columns(5)
@@ -358,6 +327,7 @@ with col4:
 with col5:
     if st.button("🚀 Get Started", key="getstarted_btn", use_container_width=True):
         st.session_state.page = "Get Started"
+rerun_timer.lap("navigation")
 
 # Home Page
 if st.session_state.page == "Home":
@@ -415,127 +385,18 @@ elif st.session_state.page == "Demo":
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown('<div class="demo-panel">', unsafe_allow_html=True)
-        st.subheader("Task Breakdown")
-        
-        # Task input for user
-        new_task = st.text_input("Enter a task you'd like to break down:", 
-                                placeholder="e.g., Write a research paper on climate change")
-        
-        # Button to generate subtasks using LLM
-        if st.button("Generate Subtasks with AI", key="generate_subtasks_btn"):
-            if new_task:
-                with st.spinner("AI is breaking down your task..."):
-                    # Call function to generate subtasks using LLM
-                    generated_subtasks = generate_subtasks_with_llm(new_task)
-                    if generated_subtasks:
-                        st.session_state.tasks = [{"id": i+1, "text": task, "completed": False} 
-                                                for i, task in enumerate(generated_subtasks)]
-                        st.success("AI has generated subtasks for you!")
-                    else:
-                        st.error("Failed to generate subtasks. Please try again.")
-            else:
-                st.warning("Please enter a task first.")
-        
-        # Display subtasks
-        if st.session_state.tasks:
-            st.markdown("### Your Subtasks:")
-            for i, task in enumerate(st.session_state.tasks):
-                col_a, col_b = st.columns([1, 10])
-                with col_a:
-                    if st.checkbox("", value=task["completed"], key=f"task_{task['id']}"):
-                        st.session_state.tasks[i]["completed"] = True
-                    else:
-                        st.session_state.tasks[i]["completed"] = False
-                with col_b:
-                    if task["completed"]:
-                        st.markdown(f'<div class="task-text completed">{task["text"]}</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f'<div class="task-text">{task["text"]}</div>', unsafe_allow_html=True)
-        
-        st.markdown('<div class="nudge-container">', unsafe_allow_html=True)
-        st.markdown('<p class="nudge-text">"You\'ve made great progress on your outline! Would breaking the content drafting into two 25-minute sessions help?"</p>', unsafe_allow_html=True)
-        st.markdown('<div class="nudge-author"><span>🤖</span><span>Your NeuroNudge Assistant</span></div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        task_breakdown_panel()
     
     with col2:
-        st.markdown('<div class="demo-panel">', unsafe_allow_html=True)
-        st.subheader("Focus Timer")
-        
-        # Timer duration selection
-        timer_minutes = st.slider("Select focus duration (minutes):", 5, 60, 25, key="timer_duration_slider")
-        st.session_state.timer_duration = timer_minutes * 60
-        
-        # Timer logic
-        if st.session_state.timer_active:
-            time_remaining = max(0, (st.session_state.timer_end - datetime.now()).total_seconds())
-            minutes, seconds = divmod(int(time_remaining), 60)
-            st.markdown(f'<div class="timer-display">{minutes:02d}:{seconds:02d}</div>', unsafe_allow_html=True)
-            
-            if time_remaining <= 0:
-                st.session_state.timer_active = False
-                st.session_state.current_nudge = "Time's up! Take a break before your next session."
-                # Play completion sound
-                if st.session_state.sound != "None":
-                    st.balloons()  # Visual feedback since we can't play audio directly
-                st.rerun()
-
-            
-            if st.button("Pause Timer", key="pause_btn"):
-                st.session_state.timer_active = False
-                st.rerun()
-
-        else:
-            minutes, seconds = divmod(st.session_state.timer_duration, 60)
-            st.markdown(f'<div class="timer-display">{minutes:02d}:{seconds:02d}</div>', unsafe_allow_html=True)
-            if st.button("Start Focus", key="start_focus_btn"):
-                st.session_state.timer_active = True
-                st.session_state.timer_end = datetime.now() + timedelta(seconds=st.session_state.timer_duration)
-                st.rerun()
-
-        
-        if st.button("Take Break", key="break_btn"):
-            st.session_state.timer_active = True
-            st.session_state.timer_end = datetime.now() + timedelta(minutes=5)
-            st.session_state.current_nudge = "Enjoy your break! You've earned it."
-            st.rerun()
-
-        
-        st.markdown('<div class="nudge-container">', unsafe_allow_html=True)
-        st.markdown(f'<p class="nudge-text">"{st.session_state.current_nudge}"</p>', unsafe_allow_html=True)
-        st.markdown('<div class="nudge-author"><span>🌱</span><span>Your Progress Companion</span></div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        if st.button("Generate New Nudge", key="nudge_btn"):
-            st.session_state.current_nudge = random.choice(nudge_messages)
-            st.rerun()
-
-        st.markdown('</div>', unsafe_allow_html=True)
+        focus_timer_panel()
     
     # Sound options
     st.markdown("---")
-    st.subheader("🎵 Calming Sounds")
-    sound_col1, sound_col2, sound_col3, sound_col4, sound_col5 = st.columns(5)
-    
-    with sound_col1:
-        if st.button("None", key="sound_none", use_container_width=True):
-            st.session_state.sound = "None"
-    with sound_col2:
-        if st.button("Rain", key="sound_rain", use_container_width=True):
-            st.session_state.sound = "Rain"
-    with sound_col3:
-        if st.button("Forest", key="sound_forest", use_container_width=True):
-            st.session_state.sound = "Forest"
-    with sound_col4:
-        if st.button("Cafe", key="sound_cafe", use_container_width=True):
-            st.session_state.sound = "Cafe"
-    with sound_col5:
-        if st.button("White Noise", key="sound_white", use_container_width=True):
-            st.session_state.sound = "White Noise"
-    
-    if st.session_state.sound != "None":
-        st.info(f"Playing gentle {st.session_state.sound.lower()} sounds...")
+    calming_sounds_row()
+
+    # Focus history
+    st.markdown("---")
+    history_panel()
 
 # Benefits Page
 elif st.session_state.page == "Benefits":
@@ -574,7 +435,10 @@ elif st.session_state.page == "Get Started":
     # Mood input
     mood_input = st.text_area("How are you feeling today?", placeholder="I'm feeling...", key="mood_input")
     if mood_input:
-        st.session_state.mood = analyze_mood(mood_input)
+        with section("app", "analyze_mood"):
+            st.session_state.mood = analyze_mood(mood_input)
+        if log_mood("app", mood_input, st.session_state.mood):
+            count_progress(KIND_NAMES[MOOD_READING])
         mood_emoji = "😊" if st.session_state.mood == "positive" else "😔" if st.session_state.mood == "negative" else "😐"
         st.write(f"Detected mood: {st.session_state.mood} {mood_emoji}")
     
@@ -583,31 +447,36 @@ elif st.session_state.page == "Get Started":
         col1, col2 = st.columns(2)
         
         with col1:
-            name = st.text_input("Name")
-            email = st.text_input("Email")
+            name = st.text_input("Name", key="signup_name")
+            email = st.text_input("Email", key="signup_email")
         
         with col2:
             focus_areas = st.multiselect(
                 "What areas do you want to focus on?",
-                ["Work", "Study", "Creative Projects", "Household Tasks", "Personal Goals"]
+                ["Work", "Study", "Creative Projects", "Household Tasks", "Personal Goals"],
+                key="signup_areas"
             )
             adhd_type = st.selectbox(
                 "ADHD Type (optional)",
-                ["", "Primarily Inattentive", "Primarily Hyperactive-Impulsive", "Combined Type", "Not diagnosed but relate to symptoms"]
+                ["", "Primarily Inattentive", "Primarily Hyperactive-Impulsive", "Combined Type", "Not diagnosed but relate to symptoms"],
+                key="signup_adhd_type"
             )
         
-        submitted = st.form_submit_button("Get NeuroNudge")
+        submitted = st.form_submit_button("Get NeuroNudge", key="signup_submit")
         
         if submitted:
-            st.success("Thanks for your interest! We'll be in touch soon.")
-            st.balloons()
+            if "@" not in email.strip():
+                st.warning("Please enter your email so we can reach you.")
+            elif get_signup_queue().submit(Signup(name, email, tuple(focus_areas), adhd_type, now().timestamp())):
+                st.success("Thanks for your interest! We'll be in touch soon.")
+                st.balloons()
+            else:
+                st.warning("We're getting a lot of signups right now. Please try again in a moment.")
     
     # Progress companion
     st.markdown("---")
     st.subheader("Your Progress Companion")
-    companion_emojis = ["🌱", "🌿", "🌳", "🌺", "🌷", "🌸", "🍀", "🎋", "✨", "🦋"]
-    companion_index = min(st.session_state.companion_level - 1, len(companion_emojis) - 1)
-    st.markdown(f'<div class="companion">{companion_emojis[companion_index]}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="companion">{companion_emoji(st.session_state.companion_level)}</div>', unsafe_allow_html=True)
     st.write(f"Level {st.session_state.companion_level}")
     
     # Progress bar
@@ -617,12 +486,15 @@ elif st.session_state.page == "Get Started":
         <div class="progress-fill" style="width: {progress_percent}%;">{progress_percent}%</div>
     </div>
     """, unsafe_allow_html=True)
+    achievement_badges()
+
+rerun_timer.lap(f"page:{st.session_state.page}")
 
 # Footer
 st.markdown("---")
 st.markdown('<div style="text-align: center; color: var(--cosmic-text);">© 2023 NeuroNudge. Designed with ❤ for ADHD brains.</div>', unsafe_allow_html=True)
 
-# Auto-refresh for timer
-if st.session_state.timer_active:
-    time.sleep(1)
-    st.experimental_rerun()
\ No newline at end of file
+show_progress_news()
+save_session(PERSISTED_FIELDS)
+rerun_timer.finish("footer_and_save")
+rerun_capture.finish()
\ No newline at end of file
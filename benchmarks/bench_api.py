@@ -0,0 +1,165 @@
+"""Throughput of the JSON API (api.py) against getting the same answers through the UI.
+
+"ui" drives app.py over the browser's websocket protocol. A mood means
+typing into the Get Started page's mood box, which reruns the script. A
+nudge means clicking "Generate New Nudge" on the Demo page, which reruns
+the timer fragment. "api" posts to api.py, in one of three ways:
+- one keep-alive connection per client;
+- a new connection for every request;
+- 100 texts per /v1/moods call.
+Every text is different, so the sentiment LRU never answers. Run from
+the repo root:
+
+    python benchmarks/bench_api.py [--requests 300] [--concurrency 1 8]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession, _free_port, session_query
+
+WORDS = ("great", "tired", "okay", "anxious", "proud", "stuck", "calm", "overwhelmed", "happy", "meh")
+BATCH = 100
+
+
+def mood_texts(count, offset=0):
+    return [f"Today I feel {WORDS[i % len(WORDS)]} about task number {offset + i}" for i in range(count)]
+
+
+class ApiProcess:
+    """Run `python api.py` in a subprocess for the duration of a `with` block"""
+
+    def __init__(self, env):
+        self.port = _free_port()
+        self.env = dict(os.environ, **env)
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen([sys.executable, "api.py", "--port", str(self.port)], cwd=REPO_DIR,
+                                        env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/healthz", timeout=1):
+                    time.sleep(0.5)  # let the mood model finish loading
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("api.py did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def _post(connection, path, body):
+    connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"{path}: {response.status} {payload}")
+    return payload
+
+
+def api_run(port, jobs, concurrency, keep_alive):
+    """Post (path, body) jobs from `concurrency` client threads; returns (seconds, latencies)"""
+    latencies, lock = [], threading.Lock()
+    chunks = [jobs[i::concurrency] for i in range(concurrency)]
+
+    def client(chunk):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        mine = []
+        for path, body in chunk:
+            if not keep_alive:
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port)
+            started = time.perf_counter()
+            _post(connection, path, body)
+            mine.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+async def _ui_client(url, action, count, offset, latencies):
+    async with StreamlitSession(url, session_query(f"bench-api-{action}-{offset}")) as session:
+        await session.rerun()
+        if action == "mood":
+            await session.click(key="getstarted_btn")
+            for text in mood_texts(count, offset):
+                latencies.append((await session.set_value(text, key="mood_input")).elapsed)
+        else:
+            await session.click(key="demo_btn")
+            for _ in range(count):
+                latencies.append((await session.click(key="nudge_btn")).elapsed)
+
+
+def ui_run(url, action, count, concurrency):
+    latencies = []
+
+    async def run():
+        per_client = count // concurrency
+        await asyncio.gather(*(_ui_client(url, action, per_client, i * per_client, latencies)
+                               for i in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - started, latencies
+
+
+def report(name, concurrency, seconds, latencies, items_per_request=1):
+    requests = len(latencies)
+    print(f"{name:<30} {concurrency:>4} {requests / seconds:>10.0f} {requests * items_per_request / seconds:>10.0f} "
+          f"{statistics.median(latencies) * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="requests per measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="concurrent clients")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = {"NEURONUDGE_STATE_DIR": state_dir, "NEURONUDGE_CACHE_DIR": state_dir, "OPENAI_API_KEY": ""}
+        print(f"{'path':<30} {'clients':>4} {'req/s':>10} {'items/s':>10} {'p50 ms':>8}")
+        with ApiProcess(env) as api:
+            for concurrency in args.concurrency:
+                offset = concurrency * 10 * args.requests  # fresh texts for every measurement
+                jobs = [("/v1/mood", {"text": text}) for text in mood_texts(args.requests, offset)]
+                report("api mood, keep-alive", concurrency, *api_run(api.port, jobs, concurrency, True))
+                jobs = [("/v1/mood", {"text": text}) for text in mood_texts(args.requests, offset + args.requests)]
+                report("api mood, new connection", concurrency, *api_run(api.port, jobs, concurrency, False))
+                texts = mood_texts(args.requests * BATCH, offset + 2 * args.requests)
+                jobs = [("/v1/moods", {"texts": texts[i:i + BATCH]}) for i in range(0, len(texts), BATCH)]
+                report(f"api moods, {BATCH} per call", concurrency,
+                       *api_run(api.port, jobs, concurrency, True), BATCH)
+                jobs = [("/v1/nudge", {"mood": "neutral", "context": "tip"})] * args.requests
+                report("api nudge, keep-alive", concurrency, *api_run(api.port, jobs, concurrency, True))
+
+        with StreamlitServer(os.path.join(REPO_DIR, "app.py"), env=env) as server:
+            for concurrency in args.concurrency:
+                report("ui mood (script rerun)", concurrency, *ui_run(server.url, "mood", args.requests, concurrency))
+                report("ui nudge (fragment rerun)", concurrency,
+                       *ui_run(server.url, "nudge", args.requests, concurrency))
+
+
+if __name__ == "__main__":
+    main()
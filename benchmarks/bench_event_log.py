@@ -0,0 +1,149 @@
+"""Scanning a year of event-log history for many users.
+
+Synthesizes a year of daily use per user (focus sessions, breaks, task
+ticks and mood readings) into an event_log.EventLog. It then times:
+
+- "memmap": summarize every user's log through read-only NumPy views.
+- "json": the same totals from one JSON object per event, the usual way
+  to keep such a history. This runs over --json-users users and is
+  scaled up to the full count.
+
+Files are written just before the scans, so both read from the page
+cache. Run from the repo root:
+
+    python benchmarks/bench_event_log.py [--users 2000] [--days 365] [--json-users 100]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import (BREAK_COMPLETE, BREAK_START, FOCUS_COMPLETE, FOCUS_START,  # noqa: E402
+                       FOCUS_STOP, KIND_NAMES, MOOD_READING, TASK_DONE, EventLog, event_dtype,
+                       merge, summarize)
+
+START = 1704096000.0  # 2024-01-01 UTC
+
+
+def synthetic_year(rng, days):
+    """One user's events: on 70% of days, 1-6 focus sessions, each with a break and two task ticks"""
+    sessions = [rng.integers(1, 7) if rng.random() < 0.7 else 0 for _ in range(days)]
+    count = int(sum(sessions))
+    day = np.repeat(np.arange(days), sessions)
+    begin = START + day * 86400 + rng.uniform(8, 20, count) * 3600
+    planned = rng.choice([15, 20, 25, 30], count).astype(np.float32) * 60
+    completed = rng.random(count) < 0.6
+    elapsed = np.where(completed, planned, planned * rng.uniform(0.1, 1, count)).astype(np.float32)
+    mood = rng.integers(-1, 2, count)
+
+    per_session = 6  # mood reading, focus start and end, two ticks, break start and end
+    events = np.zeros(count * per_session, event_dtype())
+    events["task"] = -1
+    events["mood"] = np.repeat(mood, per_session)
+    layout = [
+        (MOOD_READING, begin - 60, 0, 0),
+        (FOCUS_START, begin, 0, planned),
+        (np.where(completed, FOCUS_COMPLETE, FOCUS_STOP), begin + elapsed, elapsed, planned),
+        (TASK_DONE, begin + elapsed + 1, 0, 0),
+        (TASK_DONE, begin + elapsed + 2, 0, 0),
+        (BREAK_START, begin + elapsed + 3, 0, 300),
+    ]
+    for offset, (kind, ts, spent, plan) in enumerate(layout):
+        events["kind"][offset::per_session] = kind
+        events["ts"][offset::per_session] = ts
+        events["elapsed"][offset::per_session] = spent
+        events["planned"][offset::per_session] = plan
+    events["task"][3::per_session] = 0
+    events["task"][4::per_session] = 1
+    # The sixth slot is the break, which ends on time
+    breaks = np.zeros(count, event_dtype())
+    breaks["kind"], breaks["ts"], breaks["elapsed"], breaks["planned"] = BREAK_COMPLETE, begin + elapsed + 303, 300, 300
+    breaks["task"], breaks["mood"] = -1, mood
+    merged = np.concatenate([events, breaks])
+    return merged[np.argsort(merged["ts"], kind="stable")]
+
+
+def json_summary(path):
+    """summarize() over a JSON-lines log, one dict per event"""
+    total = {name: 0 for name in KIND_NAMES.values()}
+    total.update(focus_minutes=0.0, break_minutes=0.0, moods={"negative": 0, "neutral": 0, "positive": 0})
+    moods = {-1: "negative", 0: "neutral", 1: "positive"}
+    with open(path) as lines:
+        for line in lines:
+            event = json.loads(line)
+            name = KIND_NAMES[event["kind"]]
+            total[name] += 1
+            if name in ("focus_stop", "focus_complete"):
+                total["focus_minutes"] += event["elapsed"] / 60
+            elif name in ("break_stop", "break_complete"):
+                total["break_minutes"] += event["elapsed"] / 60
+            elif name == "mood_reading":
+                total["moods"][moods[event["mood"]]] += 1
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--json-users", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(os.path.join(directory, "events"))
+        json_dir = os.path.join(directory, "json")
+        os.makedirs(json_dir)
+        events = 0
+        for user in range(args.users):
+            history = synthetic_year(rng, args.days)
+            log.extend(f"user{user}", history)
+            events += len(history)
+            if user < args.json_users:
+                with open(os.path.join(json_dir, f"user{user}.jsonl"), "w") as output:
+                    for row in history.tolist():
+                        output.write(json.dumps(dict(zip(event_dtype().names, row))) + "\n")
+        size = sum(os.path.getsize(log.path(user)) for user in log.users())
+        print(f"{args.users} users, {events} events, {size / 1e6:.1f} MB "
+              f"({size / args.users / 1e3:.0f} KB per user)")
+
+        started = time.perf_counter()
+        total = {}
+        for _, history in log.scan():
+            merge(total, summarize(history))
+        scanned = time.perf_counter() - started
+
+        started = time.perf_counter()
+        last_month = START + (args.days - 30) * 86400
+        for _, history in log.scan():
+            summarize(history, since=last_month)
+        windowed = time.perf_counter() - started
+
+        json_users = min(args.json_users, args.users)
+        started = time.perf_counter()
+        json_total = {}
+        for user in range(json_users):
+            merge(json_total, json_summary(os.path.join(json_dir, f"user{user}.jsonl")))
+        loaded = (time.perf_counter() - started) / json_users * args.users
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            log.append("appender", FOCUS_START, mood="neutral", planned=1500)
+        appended = (time.perf_counter() - started) / 1000 * 1e6
+
+    print(f"\n{'scan':<26} {'total ms':>9} {'us/user':>8}")
+    for name, seconds in (("memmap, whole year", scanned), ("memmap, last 30 days", windowed),
+                          (f"json (from {json_users} users)", loaded)):
+        print(f"{name:<26} {seconds * 1000:>9.1f} {seconds / args.users * 1e6:>8.1f}")
+    print(f"\nappend: {appended:.1f} us/event")
+    print(f"focus hours logged: {total['focus_minutes'] / 60:.0f}, completed sessions: {total['focus_complete']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Deltas sent and rerun time for each Demo page interaction in app.py.
+
+Run from the repo root:
+
+    python benchmarks/bench_fragments.py [--app app.py] [--rounds 20]
+
+Point --app at an older copy of app.py to get the "before" numbers, e.g.
+the one from before the Demo page panels became fragments:
+
+    git show 7e41780^:app.py > app_before.py
+    python benchmarks/bench_fragments.py --app app_before.py
+
+That copy ticks subtasks with one checkbox each (task_<id>) instead of
+the task_list_<n> data editor, so the benchmark ticks whichever it finds.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession
+
+
+async def _tick_first_subtask(session, done):
+    try:
+        session.find(key="task_list_0")
+    except KeyError:  # the pre-fragment app: one checkbox per subtask, the first with id 1
+        return await session.set_value(done, key="task_1")
+    edits = {"edited_rows": {"0": {"done": done}}, "added_rows": [], "deleted_rows": []}
+    return await session.set_value(json.dumps(edits), key="task_list_0")
+
+
+async def _measure(url, rounds):
+    results = {}
+
+    def record(name, result):
+        results.setdefault(name, []).append(result)
+
+    async with StreamlitSession(url) as session:
+        await session.rerun()
+        await session.click(key="demo_btn")
+        for i in range(rounds):
+            record("tick subtask checkbox", await _tick_first_subtask(session, i % 2 == 0))
+            record("move timer_duration_slider", await session.set_value([20 + i % 2 * 5], key="timer_duration_slider"))
+            record("Generate New Nudge", await session.click(key="nudge_btn"))
+            record("pick a calming sound", await session.click(key="sound_rain" if i % 2 else "sound_forest"))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(REPO_DIR, "app.py"))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with StreamlitServer(args.app) as server:
+        results = asyncio.run(_measure(server.url, args.rounds))
+
+    print(f"{'interaction':<30} {'deltas':>7} {'bytes':>8} {'p50 ms':>8} {'fragment':>9}")
+    for name, runs in results.items():
+        print(f"{name:<30} {statistics.median(r.deltas for r in runs):>7.0f} "
+              f"{statistics.median(r.bytes_sent for r in runs):>8.0f} "
+              f"{statistics.median(r.elapsed for r in runs) * 1000:>8.1f} "
+              f"{'yes' if runs[-1].fragment_id else 'no':>9}")
+
+
+if __name__ == "__main__":
+    main()
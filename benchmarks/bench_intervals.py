@@ -0,0 +1,73 @@
+"""Cost of learning focus lengths against how much history a user has.
+
+"incremental" is intervals.record_focus(), which folds one session
+into the running estimate. "rescan" refits the same estimate from the
+whole session history after every session, which is what keeping the
+history and recomputing would cost. The persisted state size is the
+JSON session_store writes. Run from the repo root:
+
+    python benchmarks/bench_intervals.py [--history 10 1000 100000] [--updates 2000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intervals import new_model, record_focus, suggest  # noqa: E402
+
+MOODS = ("positive", "neutral", "negative")
+
+
+def synthetic_sessions(count, seed=0):
+    """(mood, planned seconds, elapsed seconds, completed) for `count` sessions"""
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        planned = rng.choice((15, 20, 25, 30)) * 60
+        completed = rng.random() < 0.6
+        sessions.append((rng.choice(MOODS), planned, planned if completed else rng.uniform(60, planned), completed))
+    return sessions
+
+
+def rescan(history):
+    model = new_model()
+    for mood, planned, elapsed, completed in history:
+        record_focus(model, mood, planned, elapsed, completed)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'history':>8} {'incremental us':>15} {'rescan us':>10} {'state bytes':>12} {'suggestion':>11}")
+    for size in args.history:
+        history = synthetic_sessions(size)
+        model = rescan(history)
+        updates = synthetic_sessions(args.updates, seed=1)
+
+        started = time.perf_counter()
+        for session in updates:
+            record_focus(model, *session)
+        incremental = (time.perf_counter() - started) / len(updates) * 1e6
+
+        # Rescanning is linear in the history, so time only a few refits
+        rounds = max(1, min(len(updates), 200000 // max(size, 1)))
+        started = time.perf_counter()
+        for session in updates[:rounds]:
+            rescan(history + [session])
+        rescanned = (time.perf_counter() - started) / rounds * 1e6
+
+        state = len(json.dumps(model).encode("utf-8"))
+        focus, rest = suggest(model, "neutral")
+        print(f"{size:>8} {incremental:>15.2f} {rescanned:>10.0f} {state:>12} {f'{focus}/{rest} min':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Load test: N concurrent sessions walking through app.py and neruonudge.py.
+
+Every simulated session follows a scripted journey over the browser
+websocket protocol. It enters a mood, asks for a task breakdown,
+starts and finishes the focus timer and ticks off subtasks, pausing
+for a short, jittered think time between steps. The report covers:
+
+- rerun latency percentiles, overall and per step;
+- server CPU time per session;
+- server memory (RSS) growth per session;
+- reruns that ended in an exception.
+
+CPU and memory are read from /proc, so they are only reported on Linux.
+
+Run from the repo root:
+
+    python benchmarks/bench_load.py --sessions 20 --output load.json
+    python benchmarks/bench_load.py --sessions 20 --baseline load.json  # exit 1 on regression
+    python benchmarks/bench_load.py --mock-llm 0.5   # send misses to a mock LLM with 0.5 s latency
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from mock_openai_server import MockOpenAIServer
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession, session_query
+
+TOLERANCE = 0.25  # a metric may grow this much over the baseline before failing
+COMPARED = ("p50_ms", "p95_ms", "cpu_ms_per_session", "rss_kb_per_session")
+TASKS = ("write my thesis chapter", "clean my room", "file my taxes", "prepare slides for the talk",
+         "fix the bike chain", "plan a birthday party", "answer emails", "study for the exam")
+MOODS = ("I'm feeling focused and ready", "so tired and a bit overwhelmed today",
+         "not bad, kind of okay", "anxious about the deadline")
+
+
+def _proc_stats(pid):
+    """(CPU seconds, RSS in KiB) of a process, or (None, None) without /proc"""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as status:
+            rss = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+    except OSError:
+        return None, None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (int(fields[11]) + int(fields[12])) / ticks, rss  # utime + stime
+
+
+class Journey:
+    """One session's walk through an app, recording each step's rerun"""
+
+    def __init__(self, session, rng, think):
+        self.session = session
+        self.rng = rng
+        self.think = think
+        self.steps = []  # (step name, RerunResult)
+        self.errors = 0
+
+    async def step(self, name, action):
+        result = await action
+        self.steps.append((name, result))
+        if "exception" in self.session.elements:
+            self.errors += 1
+        if self.think:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think)
+
+    async def timer_event(self, event):
+        value = {"event": event, "id": f"{time.time_ns()}-{self.rng.random()}"}
+        await self.step(f"timer {event}", self.session.set_value(value, key="focus_timer"))
+
+
+async def app_journey(journey):
+    s, rng = journey.session, journey.rng
+    await journey.step("first load", s.rerun())
+    await journey.step("open Get Started", s.click(key="getstarted_btn"))
+    await journey.step("enter mood", s.set_value(rng.choice(MOODS), key="mood_input"))
+    await journey.step("open Demo", s.click(key="demo_btn"))
+    await journey.step("type task", s.set_value(rng.choice(TASKS), label="Enter a task you'd like to break down:"))
+    await journey.step("generate subtasks", s.click(key="generate_subtasks_btn"))
+    # Generating starts a new editor; its key ends in a generation number
+    editor = [widget_id for widget_id in s.widgets if "-task_list_" in widget_id][-1].rsplit("-", 1)[1]
+    edited = {}
+    for row in rng.sample(range(4), 3):
+        edited[str(row)] = {"done": True}
+        edits = {"edited_rows": edited, "added_rows": [], "deleted_rows": []}
+        await journey.step("tick subtask", s.set_value(json.dumps(edits), key=editor))
+    await journey.timer_event("start")
+    await journey.step("new nudge", s.click(key="nudge_btn"))
+    await journey.timer_event("complete")
+    await journey.step("pick sound", s.click(key=rng.choice(("sound_rain", "sound_forest", "sound_cafe"))))
+
+
+async def neruonudge_journey(journey):
+    s, rng = journey.session, journey.rng
+    await journey.step("first load", s.rerun())
+    await journey.step("enter mood", s.set_value(rng.choice(MOODS), label="How are you feeling today?"))
+    await journey.step("type task", s.set_value(rng.choice(TASKS), label="What would you like to work on?"))
+    await journey.step("break down task", s.click(label="Break Down Task"))
+    await journey.timer_event("start")
+    await journey.timer_event("pause")
+    await journey.timer_event("start")
+    await journey.timer_event("complete")
+
+
+JOURNEYS = {"app.py": app_journey, "neruonudge.py": neruonudge_journey}
+
+
+async def _run_sessions(url, walk, sessions, think, seed):
+    async def one(i):
+        rng = random.Random(seed * 100003 + i)
+        async with StreamlitSession(url, query_string=session_query(f"load-{seed}-{i}")) as session:
+            journey = Journey(session, rng, think)
+            await asyncio.sleep(rng.uniform(0, think))  # don't start everyone in the same millisecond
+            await walk(journey)
+            return journey
+    return await asyncio.gather(*(one(i) for i in range(sessions)))
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50_ms": round(pick(0.50), 1), "p90_ms": round(pick(0.90), 1),
+            "p95_ms": round(pick(0.95), 1), "p99_ms": round(pick(0.99), 1),
+            "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+def measure(script, sessions, think, env):
+    walk = JOURNEYS[os.path.basename(script)]
+    with StreamlitServer(os.path.join(REPO_DIR, script), env=env) as server:
+        pid = server.process.pid
+        asyncio.run(_run_sessions(server.url, walk, 1, 0, seed=0))  # warm up imports and caches
+        cpu_before, rss_before = _proc_stats(pid)
+        started = time.perf_counter()
+        journeys = asyncio.run(_run_sessions(server.url, walk, sessions, think, seed=1))
+        wall = time.perf_counter() - started
+        cpu_after, rss_after = _proc_stats(pid)
+
+    latencies = [result.elapsed for journey in journeys for _, result in journey.steps]
+    by_step = {}
+    for journey in journeys:
+        for name, result in journey.steps:
+            by_step.setdefault(name, []).append(result.elapsed)
+    report = {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": sum(journey.errors for journey in journeys),
+        "reruns_per_s": round(len(latencies) / wall, 1),
+        **_percentiles(latencies),
+        "steps_p50_ms": {name: round(statistics.median(times) * 1000, 1) for name, times in by_step.items()},
+    }
+    if cpu_before is not None:
+        report["cpu_ms_per_session"] = round(1000 * (cpu_after - cpu_before) / sessions, 1)
+        report["rss_mb_before"] = round(rss_before / 1024, 1)
+        report["rss_kb_per_session"] = round((rss_after - rss_before) / sessions, 1)
+    return report
+
+
+def regressions(results, baseline):
+    found = []
+    for name, metrics in results.items():
+        for metric in COMPARED:
+            before = baseline.get(name, {}).get(metric)
+            if before and metrics.get(metric, 0) > before * (1 + TOLERANCE):
+                found.append(f"{name} {metric}: {before} -> {metrics[metric]}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--think", type=float, default=0.2, help="mean seconds between steps")
+    parser.add_argument("--apps", nargs="+", default=list(JOURNEYS), choices=list(JOURNEYS))
+    parser.add_argument("--mock-llm", type=float, metavar="SECONDS",
+                        help="send template misses to a mock LLM with this first-token latency")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    args = parser.parse_args()
+
+    results = {}
+    with contextlib.ExitStack() as stack:
+        # A fresh state directory, so sessions never restore a previous run's state
+        env = {"NEURONUDGE_STATE_DIR": stack.enter_context(tempfile.TemporaryDirectory()), "OPENAI_API_KEY": ""}
+        if args.mock_llm is not None:
+            llm = stack.enter_context(MockOpenAIServer(first_token=args.mock_llm, token_delay=0.01))
+            env.update(OPENAI_API_KEY="mock", OPENAI_BASE_URL=llm.base_url)
+        for name in args.apps:
+            results[name] = measure(name, args.sessions, args.think, env)
+
+    for name, report in results.items():
+        cpu = f", CPU {report['cpu_ms_per_session']} ms/session, RSS +{report['rss_kb_per_session']} KiB/session" \
+            if "cpu_ms_per_session" in report else ""
+        print(f"{name}: {report['sessions']} sessions, {report['reruns']} reruns ({report['reruns_per_s']}/s), "
+              f"{report['errors']} errors; p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, "
+              f"p99 {report['p99_ms']} ms{cpu}")
+        for step, ms in report["steps_p50_ms"].items():
+            print(f"    {step:<20} {ms:>8} ms")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            found = regressions(results, json.load(baseline))
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
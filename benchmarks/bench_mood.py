@@ -0,0 +1,60 @@
+"""Throughput of the shared mood analyzer against the old substring scan.
+
+Run from the repo root:
+
+    python benchmarks/bench_mood.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mood import LEXICON, analyze_many, analyze_mood  # noqa: E402
+
+FILLER = ("today i tried to work on the report but the morning went by and i kept "
+          "switching between tabs while thinking about lunch and the meeting").split()
+
+
+def substring_mood(text):
+    """The per-keyword text.lower() + substring scan the apps used before"""
+    positive_words = ["good", "great", "happy", "excited", "ready", "focus", "productive", "energetic"]
+    negative_words = ["tired", "sad", "anxious", "stressed", "overwhelmed", "exhausted", "drained"]
+
+    if any(word in text.lower() for word in positive_words):
+        return "positive"
+    elif any(word in text.lower() for word in negative_words):
+        return "negative"
+    return "neutral"
+
+
+def journal(n_words, rng):
+    words = [rng.choice(FILLER) for _ in range(n_words)]
+    # Put the only mood word at the end so the old scan has to read everything
+    words[-1] = rng.choice(sorted(LEXICON))
+    return " ".join(words)
+
+
+def bench(label, fn, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    megabytes = sum(len(t) for t in texts) / 1e6
+    print(f"  {label:<26} {len(texts) / best:>12,.0f} texts/s {megabytes / best:>8.1f} MB/s")
+
+
+def main():
+    rng = random.Random(0)
+    for n_words, n_texts in ((20, 20000), (500, 2000), (20000, 50)):
+        texts = [journal(n_words, rng) for _ in range(n_texts)]
+        print(f"{n_texts} texts of {n_words} words")
+        bench("substring scan (before)", lambda ts: [substring_mood(t) for t in ts], texts)
+        bench("analyze_mood", lambda ts: [analyze_mood(t) for t in ts], texts)
+        bench("analyze_many", analyze_many, texts)
+
+
+if __name__ == "__main__":
+    main()
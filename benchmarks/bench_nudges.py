@@ -0,0 +1,103 @@
+"""Nudge pick cost against catalog size, and how often a nudge repeats.
+
+"rebuild" is the original get_nudge_message(), which built its three
+lists on every call and used random.choice. "catalog" is
+NudgeCatalog.pick() with and without a session's no-repeat list. The
+synthetic catalogs give every (mood, context) bucket N nudges with
+random weights, to show that the pick does not grow with N. Run from
+the repo root:
+
+    python benchmarks/bench_nudges.py [--sizes 4 100 10000] [--picks 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nudges import NUDGES_PATH, NudgeCatalog  # noqa: E402
+
+
+def rebuild_nudge(mood):
+    positive_nudges = [
+        "You're doing great! Keep up the momentum! 🌟",
+        "Your progress is amazing! Let's keep going! 💪",
+        "Wow, you're on fire! Ready for the next step? 🔥",
+    ]
+    neutral_nudges = [
+        "Let's take this one step at a time. You've got this! 👍",
+        "Breaking things down makes them more manageable. Ready to continue? 📋",
+        "Focus on just this one thing right now. You can do it! ✨",
+    ]
+    negative_nudges = [
+        "It's okay to feel overwhelmed. Let's just focus on one small thing. 🌱",
+        "Be kind to yourself. How about we try a shorter focus session? 🕊️",
+        "Remember to breathe. You're doing better than you think. 💚",
+    ]
+    if mood == "positive":
+        return random.choice(positive_nudges)
+    elif mood == "negative":
+        return random.choice(negative_nudges)
+    return random.choice(neutral_nudges)
+
+
+def synthetic_catalog(directory, size):
+    rng = random.Random(size)
+    nudges = [{"id": f"n{i}", "text": f"Nudge number {i}", "contexts": ["encouragement"],
+               "weight": rng.uniform(0.5, 3)} for i in range(size)]
+    path = os.path.join(directory, f"nudges-{size}.json")
+    with open(path, "w") as output:
+        json.dump({"version": 1, "moods": ["positive", "neutral", "negative"],
+                   "contexts": ["encouragement"], "nudges": nudges}, output)
+    return path
+
+
+def per_pick_us(pick, picks):
+    started = time.perf_counter()
+    for _ in range(picks):
+        pick()
+    return (time.perf_counter() - started) / picks * 1e6
+
+
+def repeat_rate(pick, picks):
+    """Share of picks that equal the one before"""
+    repeats, last = 0, None
+    for _ in range(picks):
+        text = pick()
+        repeats += text == last
+        last = text
+    return repeats / picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 100, 10000])
+    parser.add_argument("--picks", type=int, default=100000)
+    args = parser.parse_args()
+
+    catalog = NudgeCatalog(NUDGES_PATH)
+    recent = []
+    print(f"{'method':<28} {'us/pick':>8} {'repeats':>8}")
+    for name, pick in (
+        ("rebuild (original)", lambda: rebuild_nudge("neutral")),
+        ("catalog", lambda: catalog.pick("neutral", "encouragement").text),
+        ("catalog + no-repeat", lambda: catalog.pick("neutral", "encouragement", recent=recent).text),
+    ):
+        print(f"{name:<28} {per_pick_us(pick, args.picks):>8.2f} {repeat_rate(pick, args.picks):>8.1%}")
+
+    print(f"\n{'nudges per bucket':>18} {'us/pick':>8} {'no-repeat us/pick':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            synthetic = NudgeCatalog(synthetic_catalog(directory, size))
+            recent = []
+            plain = per_pick_us(lambda: synthetic.pick("neutral", "encouragement"), args.picks)
+            window = per_pick_us(lambda: synthetic.pick("neutral", "encouragement", recent=recent), args.picks)
+            print(f"{size:>18} {plain:>8.2f} {window:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
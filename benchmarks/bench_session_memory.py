@@ -0,0 +1,97 @@
+"""Bytes per session, measured with tracemalloc, at 10, 1k and 10k sessions.
+
+Each simulated session holds what app.py keeps in session_state: a
+task list for a template breakdown (decoded per session, as a subtask
+cache hit or a restored session does), a nudge and the counters.
+
+- dict tasks: the old `{"id", "text", "completed"}` dicts, each session
+  holding its own copy of every string;
+- slotted tasks: tasks.Task, whose interned text is shared by every
+  session;
+- offloaded: the same sessions after SessionBudget has moved their saved
+  fields to the session store, as it does for idle ones.
+
+Run from the repo root:
+
+    python benchmarks/bench_session_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nudges import get_nudge_message  # noqa: E402
+from session_store import SessionBudget, SessionStore, dumps  # noqa: E402
+from tasks import tasks_from_subtasks  # noqa: E402
+from templates import get_catalog  # noqa: E402
+
+COUNTS = (10, 1000, 10000)
+NUDGE = get_nudge_message("neutral", context="tip")  # the same catalog string in every session
+FIELDS = ("tasks", "current_nudge", "mood", "progress", "companion_level", "timer_active", "timer_end")
+
+
+def cached_answer():
+    """A breakdown as the subtask cache stores it: JSON text"""
+    return json.dumps(list(get_catalog().rank("write an essay")[0].template.subtasks))
+
+
+def dict_session(answer):
+    subtasks = json.loads(answer)  # fresh strings for this session
+    return {
+        "tasks": [{"id": i + 1, "text": text, "completed": False} for i, text in enumerate(subtasks)],
+        "current_nudge": json.loads(json.dumps(NUDGE)),
+        "mood": "neutral", "progress": 0, "companion_level": 1, "timer_active": False, "timer_end": None,
+    }
+
+
+def slotted_session(answer):
+    return {
+        "tasks": tasks_from_subtasks(json.loads(answer)),  # Task interns the text
+        "current_nudge": NUDGE,
+        "mood": "neutral", "progress": 0, "companion_level": 1, "timer_active": False, "timer_end": None,
+    }
+
+
+def measure(make, count, offload=None):
+    answer = cached_answer()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [make(answer) for _ in range(count)]
+    if offload is not None:
+        offload(sessions)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del sessions
+    return used / count
+
+
+def offload_all(store):
+    def offload(sessions):
+        budget = SessionBudget(store, idle_timeout=0, sweep_interval=0)
+        for i, state in enumerate(sessions):
+            state["_persisted"] = {field: dumps(state[field]) for field in FIELDS}
+            state["_persisted_key"] = f"app:{i}"
+            store.save(state["_persisted_key"], state["_persisted"])
+            budget.touch(state["_persisted_key"], state, FIELDS)
+        budget.sweep()
+    return offload
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(os.path.join(directory, "sessions.sqlite3"), flush_interval=3600)
+        print(f"{'sessions':>8} {'dict tasks':>12} {'slotted tasks':>14} {'offloaded':>10}   bytes/session")
+        for count in COUNTS:
+            print(f"{count:>8} {measure(dict_session, count):>12,.0f} {measure(slotted_session, count):>14,.0f} "
+                  f"{measure(slotted_session, count, offload_all(store)):>10,.0f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
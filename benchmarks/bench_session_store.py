@@ -0,0 +1,63 @@
+"""Cost of persisting session state: one commit per rerun against coalesced flushes.
+
+Simulates many sessions whose timer reruns change one field each time,
+and times the rerun path for a commit-per-rerun store and for
+SessionStore, which only queues the change and writes in batches.
+
+Run from the repo root:
+
+    python benchmarks/bench_session_store.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore, dumps  # noqa: E402
+
+SESSIONS = 50
+RERUNS = 40  # per session
+
+
+def direct_commits(path):
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE session_state (session_id TEXT, field TEXT, value TEXT, updated_at REAL,"
+               " PRIMARY KEY (session_id, field))")
+
+    def save(session_id, fields):
+        for field, value in fields.items():
+            db.execute("INSERT OR REPLACE INTO session_state VALUES (?, ?, ?, ?)",
+                       (session_id, field, value, time.time()))
+    return save, lambda: None
+
+
+def coalesced(path):
+    store = SessionStore(path)
+    return store.save, store.close
+
+
+def bench(label, make):
+    with tempfile.TemporaryDirectory() as directory:
+        save, close = make(os.path.join(directory, "sessions.sqlite3"))
+        start = time.perf_counter()
+        for rerun in range(RERUNS):
+            for session in range(SESSIONS):
+                save(f"app:{session}", {"progress": dumps(rerun)})
+        elapsed = time.perf_counter() - start
+        close()
+    saves = SESSIONS * RERUNS
+    print(f"  {label:<22} {1e6 * elapsed / saves:>8.1f} µs per rerun save ({saves} saves)")
+
+
+def main():
+    print(f"{SESSIONS} sessions x {RERUNS} reruns, one changed field each")
+    bench("commit per rerun", direct_commits)
+    bench("coalesced flush", coalesced)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Signup form submissions: queued batch writes against a write per submit.
+
+Several threads stand in for concurrent sessions submitting the "Get
+NeuroNudge" form. Their addresses repeat with varying case and spacing,
+as people sign up twice. Compares two paths:
+
+- "direct": each submit inserts and commits its own row under a lock,
+  which is what the form would do without the queue.
+- "queued": each submit goes through signups.SignupQueue, and close()
+  waits for the writer to drain.
+
+It then floods a small queue with no pause, to check backpressure:
+excess signups are turned away, and every accepted one is still
+written. Exits 1 if the rows written don't match the distinct addresses
+accepted. Run from the repo root:
+
+    python benchmarks/bench_signups.py [--signups 20000] [--unique 5000] [--threads 8]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from signups import Signup, SignupQueue, normalize_email  # noqa: E402
+
+AREAS = ("Work", "Study", "Creative Projects", "Household Tasks", "Personal Goals")
+
+
+def synthetic_signups(rng, count, unique):
+    """Signups over `unique` people, whose addresses come back in varying case and spacing"""
+    signups = []
+    for _ in range(count):
+        person = rng.randrange(unique)
+        email = f"Person{person}@Example.com"
+        email = rng.choice((email, email.lower(), f" {email} ", email.upper()))
+        signups.append(Signup(f"Person {person}", email, tuple(rng.sample(AREAS, 2)), "", time.time()))
+    return signups
+
+
+def run_threads(signups, threads, submit):
+    """Submit from `threads` threads; returns (seconds, per-submit latencies, accepted count)"""
+    latencies, accepted, lock = [], [0], threading.Lock()
+
+    def client(chunk):
+        mine, ok = [], 0
+        for signup in chunk:
+            started = time.perf_counter()
+            ok += bool(submit(signup))
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+            accepted[0] += ok
+
+    workers = [threading.Thread(target=client, args=(signups[i::threads],)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started, latencies, accepted[0]
+
+
+def direct_writer(path):
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE signups (email TEXT PRIMARY KEY, name TEXT, focus_areas TEXT,"
+               " adhd_type TEXT, first_at REAL, last_at REAL, submissions INTEGER)")
+    lock = threading.Lock()
+
+    def submit(signup):
+        with lock:
+            db.execute("INSERT INTO signups VALUES (?, ?, ?, ?, ?, ?, 1) ON CONFLICT (email) DO UPDATE"
+                       " SET name = excluded.name, last_at = excluded.last_at, submissions = submissions + 1",
+                       (normalize_email(signup.email), signup.name, ",".join(signup.focus_areas),
+                        signup.adhd_type, signup.submitted_at, signup.submitted_at))
+        return True
+
+    return db, submit
+
+
+def report(name, seconds, latencies, total=None):
+    total = total if total is not None else seconds
+    latencies = sorted(latencies)
+    print(f"{name:<10} {len(latencies) / total:>12.0f} {statistics.median(latencies) * 1e6:>10.1f} "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:>10.1f} {seconds:>9.2f} {total:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signups", type=int, default=20000)
+    parser.add_argument("--unique", type=int, default=5000, help="distinct people among the signups")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--flood-queue", type=int, default=100, help="queue size for the backpressure run")
+    args = parser.parse_args()
+
+    signups = synthetic_signups(random.Random(0), args.signups, args.unique)
+    expected = len({normalize_email(signup.email) for signup in signups})
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{args.signups} signups from {expected} people, {args.threads} threads")
+        print(f"{'path':<10} {'signups/s':>12} {'p50 us':>10} {'p99 us':>10} {'submit s':>9} {'stored s':>9}")
+
+        db, submit = direct_writer(os.path.join(directory, "direct.sqlite3"))
+        seconds, latencies, _ = run_threads(signups, args.threads, submit)
+        report("direct", seconds, latencies)
+        db.close()
+
+        signup_queue = SignupQueue(os.path.join(directory, "queued.sqlite3"), maxsize=args.signups)
+        started = time.perf_counter()
+        seconds, latencies, _ = run_threads(signups, args.threads, signup_queue.submit)
+        signup_queue.close()
+        report("queued", seconds, latencies, time.perf_counter() - started)
+        stats = signup_queue.stats()
+        print(f"  {stats['batches']} batches, {stats['written'] / stats['batches']:.0f} signups per batch")
+        if signup_queue.count() != expected or stats["written"] != args.signups:
+            print(f"  MISMATCH: {signup_queue.count()} rows for {expected} people, "
+                  f"{stats['written']} of {args.signups} signups written")
+            failed = True
+
+        flood = SignupQueue(os.path.join(directory, "flood.sqlite3"), maxsize=args.flood_queue)
+        _, _, accepted = run_threads(signups, args.threads, flood.submit)
+        flood.close()
+        stats = flood.stats()
+        print(f"flood into a {args.flood_queue}-signup queue: {accepted} accepted, {stats['rejected']} turned away, "
+              f"{stats['written']} written in {stats['batches']} batches")
+        if stats["written"] != accepted or stats["queued"]:
+            print("  MISMATCH: accepted signups were not all written")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Synthesizing the calming sound clips: time, memory and size per clip.
+
+For each of sounds.SOUNDS, reports:
+- "synth ms": the median time over --rounds runs of synthesize().
+- "peak MB": the most memory held during synthesize(), from tracemalloc,
+  which NumPy reports its buffers to.
+- "clip KB": the size of the encoded WAV.
+- "first/cached ms": sound_url() in a fresh cache directory. The first
+  call synthesizes and writes the clip; the cached figure is a new
+  process finding it on disk, measured with the in-process cache cleared.
+It also checks that each clip loops: the step from the last sample back
+to the first is no larger than the biggest step inside the clip. Exits 1
+if one does not. Run from the repo root:
+
+    python benchmarks/bench_sounds.py [--rounds 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sounds  # noqa: E402
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sounds.synthesize("White Noise", 0.1)  # NumPy's import and FFT setup are not part of any clip
+    print(f"{sounds.CLIP_SECONDS:.0f} s clips, {sounds.SAMPLE_RATE} Hz mono 16-bit")
+    print(f"{'sound':<12} {'synth ms':>9} {'peak MB':>8} {'clip KB':>8} {'first ms':>9} {'cached ms':>10} {'loops':>6}")
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        sounds.SOUNDS_DIR = directory
+        for name in sounds.SOUNDS:
+            samples, _ = timed(sounds.synthesize, name)
+            synth = statistics.median(timed(sounds.synthesize, name)[1] for _ in range(args.rounds))
+            tracemalloc.start()
+            sounds.synthesize(name)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            sounds.sound_url.cache_clear()
+            url, first = timed(sounds.sound_url, name)
+            sounds.sound_url.cache_clear()
+            _, cached = timed(sounds.sound_url, name)
+            size = os.path.getsize(os.path.join(directory, url.rsplit("/", 1)[1]))
+
+            steps = np.abs(np.diff(samples.astype(np.int32)))
+            seam = abs(int(samples[0]) - int(samples[-1]))
+            loops = seam <= steps.max()
+            failed |= not loops
+            print(f"{name:<12} {synth * 1000:>9.1f} {peak / 1e6:>8.1f} {size / 1e3:>8.0f} {first * 1000:>9.1f} "
+                  f"{cached * 1000:>10.3f} {'yes' if loops else 'NO':>6}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Cold-start benchmark for app.py and neruonudge.py.
+
+For each entry point it reports:
+
+- import time of the script's top-level imports (`python -X importtime`
+  in a fresh interpreter), with the slowest modules;
+- server start, the time for `streamlit run` to answer its health check;
+- first render, the time from the first browser rerun request until the
+  script finishes. That run pays for the script's imports and its first
+  page.
+
+Run from the repo root:
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json  # exit 1 on regression
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession
+
+ENTRY_POINTS = ("app.py", "neruonudge.py")
+TOLERANCE = 0.25  # a metric may grow this much over the baseline before failing
+
+
+def top_level_imports(script):
+    """The script's module-level import statements as source lines"""
+    with open(script, encoding="utf-8") as source:
+        tree = ast.parse(source.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_profile(script):
+    """Total import time in ms plus the five slowest top-level modules"""
+    code = "\n".join(top_level_imports(script))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # only top-level (not nested) imports
+            modules[name.strip()] = int(cumulative) / 1000
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:5]
+    return round(sum(modules.values()), 1), {name: round(ms, 1) for name, ms in slowest}
+
+
+async def _first_render(url):
+    async with StreamlitSession(url) as session:
+        return (await session.rerun()).elapsed
+
+
+def cold_start(script):
+    """Seconds until the server is healthy, then seconds for the first render"""
+    started = time.perf_counter()
+    with StreamlitServer(script) as server:
+        ready = time.perf_counter() - started
+        first_render = asyncio.run(_first_render(server.url))
+    return ready, first_render
+
+
+def measure(rounds):
+    results = {}
+    for name in ENTRY_POINTS:
+        script = os.path.join(REPO_DIR, name)
+        import_ms, slowest = import_profile(script)
+        starts = [cold_start(script) for _ in range(rounds)]
+        results[name] = {
+            "import_ms": import_ms,
+            "server_start_ms": round(1000 * statistics.median(s[0] for s in starts), 1),
+            "first_render_ms": round(1000 * statistics.median(s[1] for s in starts), 1),
+            "slowest_imports_ms": slowest,
+        }
+    return results
+
+
+def regressions(results, baseline):
+    found = []
+    for name, metrics in results.items():
+        for metric in ("import_ms", "server_start_ms", "first_render_ms"):
+            before = baseline.get(name, {}).get(metric)
+            if before and metrics[metric] > before * (1 + TOLERANCE):
+                found.append(f"{name} {metric}: {before} -> {metrics[metric]}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    args = parser.parse_args()
+
+    results = measure(args.rounds)
+    for name, metrics in results.items():
+        print(f"{name}: import {metrics['import_ms']} ms, server start {metrics['server_start_ms']} ms, "
+              f"first render {metrics['first_render_ms']} ms")
+        for module, ms in metrics["slowest_imports_ms"].items():
+            print(f"    {module:<20} {ms:>8} ms")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            found = regressions(results, json.load(baseline))
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Bytes sent per full rerun of each app, where the stylesheet is resent every time.
+
+app.py is rerun by switching between the Home and Demo pages;
+neruonudge.py has no fragments, so every interaction is a plain full
+rerun. Run from the repo root:
+
+    python benchmarks/bench_styles.py [--app app.py] [--neruonudge neruonudge.py] [--rounds 10]
+
+Point the options at older copies of the scripts (in the repo root) to
+get the "before" numbers.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession
+
+
+async def _app_reruns(url, rounds):
+    async with StreamlitSession(url) as session:
+        await session.rerun()
+        results = []
+        for _ in range(rounds):
+            results.append(await session.click(key="demo_btn"))
+            results.append(await session.click(key="home_btn"))
+        return results
+
+
+async def _neruonudge_reruns(url, rounds):
+    async with StreamlitSession(url) as session:
+        await session.rerun()
+        return [await session.rerun() for _ in range(2 * rounds)]
+
+
+def measure(script, reruns, rounds):
+    with StreamlitServer(script) as server:
+        results = asyncio.run(reruns(server.url, rounds))
+    return statistics.median(r.bytes_sent for r in results), statistics.median(r.deltas for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(REPO_DIR, "app.py"))
+    parser.add_argument("--neruonudge", default=os.path.join(REPO_DIR, "neruonudge.py"))
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'script':<28} {'bytes/rerun':>12} {'deltas':>7}")
+    for script, reruns in ((args.app, _app_reruns), (args.neruonudge, _neruonudge_reruns)):
+        bytes_sent, deltas = measure(script, reruns, args.rounds)
+        print(f"{os.path.basename(script):<28} {bytes_sent:>12,.0f} {deltas:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Rerun time, deltas and bytes against task count for the Demo task list.
+
+Compares the old layout (st.columns + st.checkbox + st.markdown per task)
+with task_list.task_list(), which renders the whole list as one
+st.data_editor. Both run in a small generated script, so only the list
+is measured. Run from the repo root:
+
+    python benchmarks/bench_task_list.py [--counts 10 100 500 1000] [--rounds 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession
+
+SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_DIR!r})
+import streamlit as st
+from tasks import Task
+from task_list import task_list
+
+n = int(st.query_params["n"])
+if len(st.session_state.get("tasks", ())) != n:
+    st.session_state.tasks = [Task(i + 1, f"Subtask number {{i + 1}}") for i in range(n)]
+
+if st.query_params["layout"] == "widgets":
+    for task in st.session_state.tasks:
+        col_a, col_b = st.columns([1, 10])
+        with col_a:
+            task.completed = st.checkbox("", value=task.completed, key=f"task_{{task.id}}",
+                                         label_visibility="collapsed")
+        with col_b:
+            st.markdown(f'<div class="task-text">{{task.text}}</div>', unsafe_allow_html=True)
+else:
+    task_list()
+"""
+
+
+async def _measure(url, count, layout, rounds):
+    async with StreamlitSession(url, query_string=f"n={count}&layout={layout}") as session:
+        await session.rerun()
+        return [await session.rerun() for _ in range(rounds)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "task_list_bench.py")
+        with open(script, "w") as output:
+            output.write(SCRIPT)
+        with StreamlitServer(script) as server:
+            print(f"{'tasks':>6} {'layout':<12} {'deltas':>7} {'bytes':>9} {'p50 ms':>8}")
+            for count in args.counts:
+                for layout in ("widgets", "data_editor"):
+                    runs = asyncio.run(_measure(server.url, count, layout, args.rounds))
+                    print(f"{count:>6} {layout:<12} {statistics.median(r.deltas for r in runs):>7.0f} "
+                          f"{statistics.median(r.bytes_sent for r in runs):>9,.0f} "
+                          f"{statistics.median(r.elapsed for r in runs) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Template matching cost as the catalog grows, against a linear keyword scan.
+
+Synthetic catalogs of 10 to 5000 templates are written to a temp file and
+matched with the inverted index; the scan is the old
+`any(word in task_lower ...)` approach applied to every template.
+
+Run from the repo root:
+
+    python benchmarks/bench_templates.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from templates import TemplateCatalog  # noqa: E402
+
+WORDS = ["".join(random.Random(i).choices("abcdefghijklmnopqrstuvwxyz", k=7)) for i in range(20000)]
+
+
+def catalog(n_templates, rng):
+    templates = [{"id": f"t{i}", "keywords": {word: 1.0 for word in rng.sample(WORDS, 4)},
+                  "subtasks": ["Step one", "Step two", "Step three"]} for i in range(n_templates)]
+    return {"version": 1, "templates": templates, "fallback": {"id": "generic", "subtasks": ["Do it"]}}
+
+
+def substring_scan(data, task):
+    """Every template's keywords tested against the lowered task, first hit wins"""
+    task_lower = task.lower()
+    for template in data["templates"]:
+        if any(word in task_lower for word in template["keywords"]):
+            return template["id"]
+    return None
+
+
+def bench(label, fn, tasks, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for task in tasks:
+            fn(task)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<26} {1e6 * best / len(tasks):>9.1f} µs/task")
+
+
+def main():
+    rng = random.Random(0)
+    for n_templates in (10, 100, 1000, 5000):
+        data = catalog(n_templates, rng)
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as path:
+            json.dump(data, path)
+        try:
+            index = TemplateCatalog(path.name)
+            # Mostly misses, the worst case for the scan, plus one real keyword per task
+            tasks = [" ".join(rng.sample(WORDS, 6) + [rng.choice(list(rng.choice(data["templates"])["keywords"]))])
+                     for _ in range(500)]
+            print(f"{n_templates} templates")
+            bench("substring scan (before)", lambda task: substring_scan(data, task), tasks)
+            bench("inverted index", index.best_match, tasks)
+        finally:
+            os.unlink(path.name)
+
+
+if __name__ == "__main__":
+    main()
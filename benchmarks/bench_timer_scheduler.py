@@ -0,0 +1,99 @@
+"""Ending many sessions' focus timers: one heap-scheduled thread against polling.
+
+For each session count, every session starts a timer due somewhere in
+the next --window seconds, and --pause of them are paused (cancelled)
+before they end. Two things are measured:
+
+- "heap": timer_scheduler.TimerScheduler, which fires each remaining
+  timer on its own background thread. Reported: the cost to schedule
+  and cancel, and how late the callbacks ran. Lateness covers the heap,
+  the wake-up and the callback queue; the callback itself only notes
+  the time.
+- "poll": the work needed to notice completions by polling instead:
+  a check of every session's deadline once a second, the least that a
+  rerun per second per session would do. Reported: the time for one
+  sweep, and how late a completion is noticed on average (half the
+  interval).
+
+Run from the repo root:
+
+    python benchmarks/bench_timer_scheduler.py [--sessions 1000 10000 100000] [--window 3] [--pause 0.2]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_scheduler import TimerScheduler  # noqa: E402
+
+POLL_INTERVAL = 1.0  # seconds between polls
+
+
+def heap_run(sessions, window, pause, rng):
+    """(schedule us per timer, cancel us per timer, lateness ms list, stats) for one batch of timers"""
+    scheduler = TimerScheduler()
+    lateness, done = [], threading.Event()
+    start = time.time() + 0.5 + sessions * 2e-5  # leave time to schedule and cancel before the first is due
+    deadlines = {f"app:session{i}": start + rng.uniform(0, window) for i in range(sessions)}
+    paused = rng.sample(sorted(deadlines), int(sessions * pause))
+    expected = sessions - len(paused)
+
+    def fire(deadline):
+        lateness.append((time.time() - deadline) * 1000)
+        if len(lateness) == expected:
+            done.set()
+
+    started = time.perf_counter()
+    for key, deadline in deadlines.items():
+        scheduler.schedule(key, deadline, lambda deadline=deadline: fire(deadline))
+    scheduled = time.perf_counter() - started
+    started = time.perf_counter()
+    for key in paused:
+        scheduler.cancel(key)
+    cancelled = time.perf_counter() - started
+    done.wait(window + 30)
+    return scheduled / sessions * 1e6, cancelled / max(1, len(paused)) * 1e6, lateness, scheduler.stats()
+
+
+def poll_sweep(sessions, window, rng):
+    """Seconds for one pass over every session's deadline"""
+    deadlines = {f"app:session{i}": time.time() + rng.uniform(0, window) for i in range(sessions)}
+    active = dict.fromkeys(deadlines, True)
+    started = time.perf_counter()
+    now = time.time()
+    due = [key for key, deadline in deadlines.items() if active[key] and deadline <= now]
+    return time.perf_counter() - started, len(due)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--window", type=float, default=3.0, help="seconds over which the timers fall due")
+    parser.add_argument("--pause", type=float, default=0.2, help="share of timers cancelled before they end")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'sessions':>9} {'schedule us':>12} {'cancel us':>10} {'late p50 ms':>12} {'late p99 ms':>12} "
+          f"{'late max ms':>12} {'poll sweep ms':>14} {'poll late ms':>13}")
+    failed = False
+    for sessions in args.sessions:
+        schedule_us, cancel_us, lateness, stats = heap_run(sessions, args.window, args.pause, rng)
+        expected = sessions - int(sessions * args.pause)
+        if len(lateness) != expected or stats["pending"]:
+            print(f"  MISMATCH: {len(lateness)} of {expected} timers fired, {stats}")
+            failed = True
+        lateness.sort()
+        sweep, _ = poll_sweep(sessions, args.window, rng)
+        print(f"{sessions:>9} {schedule_us:>12.2f} {cancel_us:>10.2f} {statistics.median(lateness):>12.2f} "
+              f"{lateness[int(len(lateness) * 0.99)]:>12.2f} {lateness[-1]:>12.2f} "
+              f"{sweep * 1000:>14.2f} {POLL_INTERVAL * 500:>13.0f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Check the incremental achievements against a recompute from history, and time both.
+
+Feeds one user's synthetic history (see bench_event_log.py) to
+achievements.record_progress() an event at a time, as the apps do. Each
+session's two task ticks stand for a two-task list, so the second also
+finishes the list, and every third session unticks and reticks its
+first task, which must not count twice. Two rulesets are used: the
+shipped one, whose achievements are soon all earned, and a copy with
+unreachable targets, whose rules stay live for the whole history.
+
+At each checkpoint the points, level and earned achievements must match
+a plain recompute over the history so far. The timings show what each
+approach costs per new event as history grows: the incremental cost,
+averaged over the next --window events, and one recompute of the whole
+prefix, which is what evaluating without per-rule state would take.
+Exits 1 on a mismatch, if the incremental cost at the longest history
+is more than --slack times the cost at the shortest, or if ticking one
+task on and off all day earns anything. Run from the repo root:
+
+    python benchmarks/check_achievements.py [--checkpoints 1000 10000 100000 1000000] [--tz America/New_York]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from bench_event_log import synthetic_year
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from achievements import TASK_LIST_DONE, UNDOES, get_ruleset, new_progress, record_progress  # noqa: E402
+from event_log import KIND_NAMES, TASK_DONE, TASK_UNDONE  # noqa: E402
+
+EVENTS_PER_DAY = 12  # roughly, in synthetic_year()
+
+
+def history(rng, events):
+    """(kind name, ts) pairs, with a task list finished by every second tick of a session"""
+    year = synthetic_year(rng, events // EVENTS_PER_DAY * 2)
+    pairs, ticks = [], 0
+    for ts, kind, task in zip(year["ts"].tolist(), year["kind"].tolist(), year["task"].tolist()):
+        pairs.append((KIND_NAMES[kind], ts))
+        if kind == TASK_DONE and task == 0:
+            ticks += 1
+            if ticks % 3 == 0:
+                pairs += [(KIND_NAMES[TASK_UNDONE], ts), (KIND_NAMES[TASK_DONE], ts)]
+        if kind == TASK_DONE and task == 1:
+            pairs.append((TASK_LIST_DONE, ts))
+    return pairs[:events]
+
+
+def recompute(ruleset, events):
+    """{"points", "level", "earned"} from the whole history, rule by rule, straight from the definitions"""
+    days = [(datetime.fromtimestamp(ts).date() - date(1970, 1, 1)).days for _, ts in events]
+    earned = {}  # id -> index of the event that earned it
+    for achievement in ruleset.achievements:
+        count, per_day, seen = 0, {}, set()
+        for index, ((kind, _), day) in enumerate(zip(events, days)):
+            if UNDOES.get(kind) in achievement.kinds:
+                count = max(0, count - 1)
+                if day in per_day:
+                    per_day[day] = max(0, per_day[day] - 1)
+                continue
+            if kind not in achievement.kinds:
+                continue
+            count += 1
+            per_day[day] = per_day.get(day, 0) + 1
+            seen.add(day)
+            if (achievement.rule == "count" and count >= achievement.target
+                    or achievement.rule == "per_day" and per_day[day] >= achievement.target
+                    or achievement.rule == "streak" and all(day - back in seen for back in range(achievement.target))):
+                earned[achievement.id] = index
+                break
+    bonus = {}
+    for achievement in ruleset.achievements:
+        if achievement.id in earned:
+            bonus[earned[achievement.id]] = bonus.get(earned[achievement.id], 0) + achievement.points
+    points, level = 0, 1
+    for index, (kind, _) in enumerate(events):
+        points = max(0, points + ruleset.points.get(kind, 0) + bonus.get(index, 0))
+        level = max(level, ruleset.level(points))
+    return {"points": points, "level": level,
+            "earned": {achievement_id: events[index][1] for achievement_id, index in earned.items()}}
+
+
+def farmed(ruleset, toggles=50):
+    """Achievements past a first tick earned by ticking one task on and off `toggles` times in a day"""
+    state = {"achievements": new_progress()}
+    ts = datetime(2025, 3, 3, 12).timestamp()
+    for _ in range(toggles):
+        record_progress(state, KIND_NAMES[TASK_DONE], ts, ruleset)
+        record_progress(state, KIND_NAMES[TASK_UNDONE], ts, ruleset)
+    targets = {achievement.id: achievement.target for achievement in ruleset.achievements}
+    return sorted(achievement_id for achievement_id in state["achievements"]["earned"] if targets[achievement_id] > 1)
+
+
+def unreachable(ruleset):
+    """The ruleset with every target out of reach, so no rule's state is ever dropped"""
+    achievements = tuple(achievement._replace(target=10 ** 9) for achievement in ruleset.achievements)
+    by_kind = {kind: tuple(a for a in achievements if kind in a.kinds) for kind in ruleset.by_kind}
+    return ruleset._replace(achievements=achievements, by_kind=by_kind)
+
+
+def run(ruleset, events, checkpoints, window):
+    """({checkpoint: incremental us/event}, {checkpoint: recompute ms}, mismatches)"""
+    state = {"achievements": new_progress()}
+    incremental, recomputing, errors = {}, {}, []
+    position = 0
+    for checkpoint in checkpoints:
+        for kind, ts in events[position:checkpoint]:
+            record_progress(state, kind, ts, ruleset)
+        progress = state["achievements"]
+        started = time.perf_counter()
+        expected = recompute(ruleset, events[:checkpoint])
+        recomputing[checkpoint] = (time.perf_counter() - started) * 1000
+        actual = {"points": progress["points"], "level": progress["level"], "earned": progress["earned"]}
+        if actual != expected:
+            errors.append(f"after {checkpoint} events: expected {expected}, got {actual}")
+        started = time.perf_counter()
+        for kind, ts in events[checkpoint:checkpoint + window]:
+            record_progress(state, kind, ts, ruleset)
+        incremental[checkpoint] = (time.perf_counter() - started) / window * 1e6
+        position = checkpoint + window
+    return incremental, recomputing, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--window", type=int, default=5000, help="events timed after each checkpoint")
+    parser.add_argument("--slack", type=float, default=3.0)
+    parser.add_argument("--tz", default="America/New_York", help="local time zone for day boundaries")
+    args = parser.parse_args()
+    os.environ["TZ"] = args.tz
+    time.tzset()
+
+    checkpoints = sorted(args.checkpoints)
+    events = history(np.random.default_rng(0), checkpoints[-1] + args.window)
+    failed = False
+    for name, ruleset in (("shipped", get_ruleset()), ("unreachable", unreachable(get_ruleset()))):
+        incremental, recomputing, errors = run(ruleset, events, checkpoints, args.window)
+        print(f"{name} ruleset, {len(ruleset.achievements)} achievements")
+        print(f"{'history':>10} {'incremental us/event':>21} {'recompute ms':>13}")
+        for checkpoint in checkpoints:
+            print(f"{checkpoint:>10} {incremental[checkpoint]:>21.2f} {recomputing[checkpoint]:>13.1f}")
+        for line in errors:
+            print(f"  MISMATCH {line}")
+        growth = incremental[checkpoints[-1]] / incremental[checkpoints[0]]
+        if growth > args.slack:
+            print(f"  incremental cost grew {growth:.1f}x with history")
+        failed |= bool(errors) or growth > args.slack
+    farming = farmed(get_ruleset())
+    if farming:
+        print(f"earned by ticking one task on and off: {farming}")
+    failed |= bool(farming)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Check the incremental rollups against a full recompute, and time both.
+
+Logs a synthetic year (see bench_event_log.py) for each user in random
+chunks, calling Rollups.update() after every chunk, as the apps do when
+events trickle in. The resulting daily and weekly rows must match a
+plain per-event recompute from the raw log, and must still match after
+Rollups.rebuild(). The default time zone has daylight saving, so days
+around the clock changes are checked too. Exits 1 on any mismatch. Run
+from the repo root:
+
+    python benchmarks/check_rollups.py [--users 50] [--days 365] [--tz America/New_York]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from bench_event_log import synthetic_year
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import (BREAK_COMPLETE, BREAK_STOP, FOCUS_COMPLETE, FOCUS_STOP,  # noqa: E402
+                       MOOD_READING, TASK_DONE, TASK_UNDONE, EventLog)
+from rollups import FIELDS, Rollups  # noqa: E402
+
+TOLERANCE = 1e-6  # seconds fields are float sums, added up in a different order
+
+
+def recompute(events):
+    """{period: {first day: {field: total}}} one event at a time, straight from the definitions"""
+    rows = {"day": {}, "week": {}}
+    for ts, elapsed, _, _, kind, mood in events.tolist():
+        day = datetime.fromtimestamp(ts).date()
+        number = (day - date(1970, 1, 1)).days
+        for period, start in (("day", number), ("week", number - day.weekday())):
+            row = rows[period].setdefault(start, dict.fromkeys(FIELDS, 0))
+            if kind in (FOCUS_STOP, FOCUS_COMPLETE):
+                row["focus_seconds"] += elapsed
+                row["sessions"] += 1
+                row["completed"] += kind == FOCUS_COMPLETE
+            elif kind in (BREAK_STOP, BREAK_COMPLETE):
+                row["break_seconds"] += elapsed
+            elif kind in (TASK_DONE, TASK_UNDONE):
+                row["tasks_done"] += 1 if kind == TASK_DONE else -1
+            elif kind == MOOD_READING:
+                row[("mood_negative", "mood_neutral", "mood_positive")[mood + 1]] += 1
+    return rows
+
+
+def mismatches(rollups, user, expected):
+    found = []
+    for period, rows in expected.items():
+        actual = rollups.rows(user, period)
+        for start in sorted(rows.keys() | actual.keys()):
+            want, got = rows.get(start), actual.get(start)
+            if want is None or got is None or any(abs(want[field] - got[field]) > TOLERANCE for field in FIELDS):
+                found.append(f"{user} {period} {start}: expected {want}, got {got}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tz", default="America/New_York", help="local time zone for day boundaries")
+    args = parser.parse_args()
+    os.environ["TZ"] = args.tz
+    time.tzset()
+
+    rng = np.random.default_rng(0)
+    errors, events, updating, rebuilding, reading = [], 0, 0.0, 0.0, 0.0
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(directory)
+        rollups = Rollups(log, os.path.join(directory, "rollups.sqlite3"))
+        for number in range(args.users):
+            user = f"user{number}"
+            history = synthetic_year(rng, args.days)
+            events += len(history)
+            cuts = np.sort(rng.choice(np.arange(1, len(history)), size=min(len(history) - 1, 200), replace=False))
+            for chunk in np.split(history, cuts):
+                log.extend(user, chunk)
+                started = time.perf_counter()
+                rollups.update(user)
+                updating += time.perf_counter() - started
+
+            expected = recompute(log.read(user))
+            errors += mismatches(rollups, user, expected)
+
+            started = time.perf_counter()
+            rollups.history(user, "day", 14, now=history["ts"][-1])
+            rollups.history(user, "week", 8, now=history["ts"][-1])
+            reading += time.perf_counter() - started
+
+            started = time.perf_counter()
+            rollups.rebuild(user)
+            rebuilding += time.perf_counter() - started
+            errors += mismatches(rollups, user, expected)
+
+    for line in errors[:20]:
+        print(f"MISMATCH {line}")
+    print(f"{args.users} users, {events} events, time zone {args.tz}: "
+          f"{'OK' if not errors else f'{len(errors)} mismatched rows'}")
+    print(f"incremental update: {updating / events * 1e6:.1f} us/event")
+    print(f"rebuild:            {rebuilding / args.users * 1000:.1f} ms/user")
+    print(f"dashboard read:     {reading / args.users * 1000:.2f} ms/user (day and week views)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Local OpenAI-compatible chat completions server with configurable latency.
+
+Streams a numbered subtask list for any prompt, so llm_client.py can be
+exercised without network access or an API key:
+
+    python benchmarks/mock_openai_server.py --port 8001 --first-token 0.8 --token-delay 0.03
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=mock streamlit run app.py
+
+--fail-rate makes that fraction of requests answer 503 so retries can be
+watched. MockOpenAIServer runs the same server on a thread for scripts.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Here is a plan:\n"
+    "1. Gather everything you need for the task\n"
+    "2. Split the work into three small chunks\n"
+    "3. Do the first chunk for 15 minutes\n"
+    "4. Take a short stretch break\n"
+    "5. Finish the remaining chunks\n"
+    "6. Review what you did and celebrate\n"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is visible
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        config["requests"] += 1
+        if random.random() < config["fail_rate"]:
+            self._send_json(503, {"error": {"message": "mock overload", "type": "server_error"}})
+            return
+
+        time.sleep(config["first_token"])
+        # Tokens are a few characters long, so lines arrive split across chunks
+        tokens = [REPLY[i:i + 4] for i in range(0, len(REPLY), 4)]
+        if not body.get("stream"):
+            time.sleep(config["token_delay"] * len(tokens))
+            self._send_json(200, self._completion(body, {"message": {"role": "assistant", "content": REPLY}}))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            chunk = self._completion(body, {"delta": {"content": token}}, "chat.completion.chunk")
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            time.sleep(config["token_delay"])
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _completion(self, body, choice, kind="chat.completion"):
+        choice = dict(choice, index=0, finish_reason=None)
+        return {"id": "chatcmpl-mock", "object": kind, "created": int(time.time()),
+                "model": body.get("model", "mock"), "choices": [choice]}
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockOpenAIServer:
+    """Run the mock server on a background thread for the duration of a `with` block"""
+
+    def __init__(self, port=0, first_token=0.0, token_delay=0.0, fail_rate=0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = {"first_token": first_token, "token_delay": token_delay,
+                             "fail_rate": fail_rate, "requests": 0}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    @property
+    def requests(self):
+        return self.httpd.config["requests"]
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.port, args.first_token, args.token_delay, args.fail_rate)
+    print(f"mock OpenAI server on {server.base_url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
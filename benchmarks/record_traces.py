@@ -0,0 +1,92 @@
+"""Record the trace library in benchmarks/traces/ by walking through both apps.
+
+Each walkthrough is a list of (clock, action) steps. It runs against a
+server started with NEURONUDGE_TRACE_DIR and NEURONUDGE_REPLAY=1, so the
+session is recorded and every step reads the walkthrough's clock (see
+traces.py). A focus session can then run its full length and end with
+the timer's own "complete" event, which the apps ignore before the
+deadline. Replaying these traces with --paced waits out that clock. Run
+from the repo root after changing what a walkthrough touches:
+
+    python benchmarks/record_traces.py
+"""
+import asyncio
+import glob
+import os
+import shutil
+import tempfile
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession, session_query
+
+from replay_traces import LIBRARY
+
+SESSION = 60 * 60  # past the longest focus session the slider allows
+
+
+def _timer(event, step):
+    return {"event": event, "id": f"walkthrough-{step}"}
+
+
+APP_DEMO = [
+    (0, lambda s: s.rerun()),
+    (1, lambda s: s.click(key="getstarted_btn")),
+    (2, lambda s: s.set_value("I'm feeling focused and ready", key="mood_input")),
+    (3, lambda s: s.click(key="demo_btn")),
+    (4, lambda s: s.set_value("Write a research paper on climate change", key="task_input")),
+    (5, lambda s: s.click(key="generate_subtasks_btn")),
+    (6, lambda s: s.set_value('{"edited_rows": {"1": {"done": true}}, "added_rows": [], "deleted_rows": []}',
+                              key="task_list_1")),
+    (7, lambda s: s.set_value('{"edited_rows": {"1": {"done": true}, "2": {"done": true}}, "added_rows": [], '
+                              '"deleted_rows": []}', key="task_list_1")),
+    (8, lambda s: s.set_value(_timer("start", 8), key="focus_timer")),
+    (9, lambda s: s.click(key="nudge_btn")),
+    (8 + SESSION, lambda s: s.set_value(_timer("complete", 10), key="focus_timer")),
+    (9 + SESSION, lambda s: s.click(key="sound_forest")),
+    (10 + SESSION, lambda s: s.set_value(_timer("start", 12), key="focus_timer")),
+    (70 + SESSION, lambda s: s.set_value(_timer("pause", 13), key="focus_timer")),
+]
+
+NERUONUDGE_SESSION = [
+    (0, lambda s: s.rerun()),
+    (1, lambda s: s.set_value("I'm feeling focused and ready", key="mood_input")),
+    (2, lambda s: s.set_value("write my thesis chapter", key="task_input")),
+    (3, lambda s: s.click(key="break_down_btn")),
+    (4, lambda s: s.set_value(_timer("start", 4), key="focus_timer")),
+    (300, lambda s: s.set_value(_timer("pause", 5), key="focus_timer")),
+    (360, lambda s: s.set_value(_timer("start", 6), key="focus_timer")),
+    (360 + SESSION, lambda s: s.set_value(_timer("complete", 7), key="focus_timer")),
+]
+
+WALKTHROUGHS = {
+    "app-demo-walkthrough": ("app.py", APP_DEMO),
+    "neruonudge-focus-session": ("neruonudge.py", NERUONUDGE_SESSION),
+}
+
+
+async def walk(url, name, steps):
+    query = session_query(f"record-{name}")
+    async with StreamlitSession(url) as session:
+        for clock, action in steps:
+            session.query_string = f"{query}&replay_clock={clock}"
+            await action(session)
+            if "exception" in session.elements:
+                raise RuntimeError(f"{name}: the step at clock {clock} raised")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work:
+        for name, (script, steps) in WALKTHROUGHS.items():
+            trace_dir = os.path.join(work, name)
+            env = {"NEURONUDGE_TRACE_DIR": trace_dir, "NEURONUDGE_REPLAY": "1", "OPENAI_API_KEY": "",
+                   "NEURONUDGE_STATE_DIR": os.path.join(work, "state"),
+                   "NEURONUDGE_CACHE_DIR": os.path.join(work, "cache")}
+            with StreamlitServer(os.path.join(REPO_DIR, script), env=env) as server:
+                asyncio.run(walk(server.url, name, steps))
+            recorded, = glob.glob(os.path.join(trace_dir, "*.trace.jsonl"))
+            target = os.path.join(LIBRARY, f"{name}.trace.jsonl")
+            shutil.copyfile(recorded, target)
+            print(f"{target}: {len(steps)} steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Replay recorded widget-event traces and report rerun latency per trace.
+
+Record a trace by running an app with NEURONUDGE_TRACE_DIR set (see
+traces.py). Each trace is replayed against the script named in its
+header. The server is started with NEURONUDGE_REPLAY=1, so the session
+draws the trace's random seed and reads the trace's clock. Run from the
+repo root:
+
+    python benchmarks/replay_traces.py                            # the library in benchmarks/traces/
+    python benchmarks/replay_traces.py my.trace.jsonl --paced     # wait out the recorded gaps
+    python benchmarks/replay_traces.py --rounds 5 --output replay.json
+    python benchmarks/replay_traces.py --baseline replay.json     # exit 1 on regression
+
+Without --paced, each event is sent as soon as the previous rerun
+finishes.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from google.protobuf.json_format import ParseDict
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from st_client import REPO_DIR, StreamlitServer, StreamlitSession, session_query
+
+sys.path.insert(0, REPO_DIR)
+from traces import CLOCK_PARAM, SEED_PARAM, load_trace  # noqa: E402
+
+LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+TOLERANCE = 0.25  # a metric may grow this much over the baseline before failing
+COMPARED = ("p50_ms", "p95_ms")
+
+
+def _widget_state(session, widget):
+    state = ParseDict(widget["state"], WidgetState())
+    if widget["key"]:
+        state.id = session.find(key=widget["key"])  # ids change with the script; keys don't
+    elif state.id not in session.widgets:
+        raise KeyError(state.id)
+    return state
+
+
+async def replay(url, header, events, paced, sid):
+    """Send one trace's events in order; returns (RerunResults, errors, skipped events)"""
+    query = f"{session_query(sid)}&{SEED_PARAM}={header['seed']}"
+    results, errors, skipped = [], 0, 0
+    async with StreamlitSession(url) as session:
+        started = time.monotonic()
+        for event in events:
+            if paced:
+                await asyncio.sleep(max(0.0, started + event["t"] - time.monotonic()))
+            session.query_string = f"{query}&{CLOCK_PARAM}={event['t']}"
+            try:
+                states = [_widget_state(session, widget) for widget in event["widgets"]]
+            except KeyError:
+                skipped += 1  # the widget is gone or was never drawn: the trace is older than the app
+                continue
+            fragment_id = session.widgets[states[0].id][2] if states and event["scope"] == "fragment" else ""
+            results.append(await session.send_states(states, fragment_id))
+            errors += "exception" in session.elements
+    return results, errors, skipped
+
+
+def measure(paths, rounds, paced):
+    traces = [(path, *load_trace(path)) for path in paths]
+    reports = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = {"NEURONUDGE_REPLAY": "1", "NEURONUDGE_STATE_DIR": state_dir, "OPENAI_API_KEY": ""}
+        for script in sorted({header["app"] for _, header, _ in traces}):
+            with StreamlitServer(os.path.join(REPO_DIR, script), env=env) as server:
+                for path, header, events in traces:
+                    if header["app"] != script:
+                        continue
+                    name = os.path.basename(path)
+                    latencies, errors, skipped = [], 0, 0
+                    for round_ in range(rounds):
+                        sid = f"replay-{name}-{round_}"
+                        results, round_errors, round_skipped = asyncio.run(
+                            replay(server.url, header, events, paced, sid))
+                        latencies += [result.elapsed for result in results]
+                        errors += round_errors
+                        skipped += round_skipped
+                    ordered = sorted(latencies)
+                    reports[name] = {
+                        "app": script, "events": len(events), "rounds": rounds,
+                        "errors": errors, "skipped": skipped,
+                        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+                        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 1),
+                        "total_ms": round(sum(ordered) * 1000 / rounds, 1),
+                    }
+    return reports
+
+
+def regressions(results, baseline):
+    found = []
+    for name, metrics in results.items():
+        for metric in COMPARED:
+            before = baseline.get(name, {}).get(metric)
+            if before and metrics[metric] > before * (1 + TOLERANCE):
+                found.append(f"{name} {metric}: {before} -> {metrics[metric]}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("traces", nargs="*", help=f"trace files (default: {LIBRARY}/*.trace.jsonl)")
+    parser.add_argument("--rounds", type=int, default=3, help="times to replay each trace")
+    parser.add_argument("--paced", action="store_true", help="keep the recorded time between events")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    args = parser.parse_args()
+
+    paths = args.traces or sorted(glob.glob(os.path.join(LIBRARY, "*.trace.jsonl")))
+    results = measure(paths, args.rounds, args.paced)
+    print(f"{'trace':<44} {'events':>6} {'p50 ms':>8} {'p95 ms':>8} {'total ms':>9} {'errors':>6} {'skipped':>7}")
+    for name, report in results.items():
+        print(f"{name:<44} {report['events']:>6} {report['p50_ms']:>8} {report['p95_ms']:>8} "
+              f"{report['total_ms']:>9} {report['errors']:>6} {report['skipped']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            found = regressions(results, json.load(baseline))
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
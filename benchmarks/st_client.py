@@ -0,0 +1,215 @@
+"""Headless Streamlit client used by the NeuroNudge benchmarks.
+
+Starts an app with `streamlit run` and talks to it over the same websocket
+protocol the browser uses, so reruns, fragment reruns and the deltas they
+send can be measured without a browser.
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Widget states that fire once per rerun instead of being sent again every time
+_TRIGGER_FIELDS = ("trigger_value", "string_trigger_value", "chat_input_value")
+
+_FINAL_STATUSES = (
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+)
+
+
+def session_query(name):
+    """Query string for a session named `name`, with the hex ID the apps accept in place of the name"""
+    return f"sid={uuid.uuid5(uuid.NAMESPACE_URL, name).hex}"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StreamlitServer:
+    """Run `streamlit run <script>` in a subprocess for the duration of a `with` block"""
+
+    def __init__(self, script, port=None, env=None, base_url_path=""):
+        self.script = script
+        self.port = port or _free_port()
+        self.base_url_path = base_url_path.strip("/")
+        self.env = dict(os.environ, **(env or {}))
+        self.process = None
+
+    @property
+    def http_url(self):
+        base = f"/{self.base_url_path}" if self.base_url_path else ""
+        return f"http://127.0.0.1:{self.port}{base}"
+
+    @property
+    def url(self):
+        return self.http_url.replace("http://", "ws://", 1) + "/_stcore/stream"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", self.script,
+             "--server.headless", "true", "--server.port", str(self.port),
+             "--server.baseUrlPath", self.base_url_path, "--browser.gatherUsageStats", "false"],
+            cwd=os.path.dirname(os.path.abspath(self.script)), env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        health = f"{self.http_url}/_stcore/health"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(health, timeout=1) as response:
+                    if response.status == 200:
+                        return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"streamlit did not start for {self.script}")
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+class RerunResult:
+    """What one rerun sent back: delta count, bytes on the wire and wall time"""
+
+    def __init__(self, deltas, bytes_sent, elapsed, fragment_id):
+        self.deltas = deltas
+        self.bytes_sent = bytes_sent
+        self.elapsed = elapsed
+        self.fragment_id = fragment_id
+
+    def as_dict(self):
+        return {"deltas": self.deltas, "bytes": self.bytes_sent,
+                "elapsed_ms": round(self.elapsed * 1000, 2), "fragment": bool(self.fragment_id)}
+
+
+class StreamlitSession:
+    """One simulated browser tab.
+
+    Like the frontend, it remembers every widget value it has set and sends
+    them all with each rerun, and reruns only the owning fragment when a
+    widget inside a fragment changes.
+    """
+
+    def __init__(self, url, query_string=""):
+        self.url = url
+        self.query_string = query_string
+        self.widgets = {}  # widget id -> (element type, label, fragment id)
+        self.values = {}  # widget id -> WidgetState the client keeps sending
+        self.elements = []  # element types seen in the last rerun
+        self.websocket = None
+
+    async def __aenter__(self):
+        self.websocket = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.websocket.close()
+
+    async def rerun(self, triggers=(), fragment_id=""):
+        """Send a rerun with the current widget values and wait for it to finish"""
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.fragment_id = fragment_id
+        states = message.rerun_script.widget_states.widgets
+        for state in self.values.values():
+            states.append(state)
+        for state in triggers:
+            states.append(state)
+
+        self.elements = []
+        deltas = 0
+        bytes_sent = 0
+        started = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        while True:
+            raw = await self.websocket.recv()
+            bytes_sent += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                self._register(forward.delta)
+            elif kind == "page_info_changed":
+                # The app changed the URL, e.g. to add ?sid=; the browser sends it from now on
+                self.query_string = forward.page_info_changed.query_string
+            elif kind == "script_finished" and forward.script_finished in _FINAL_STATUSES:
+                return RerunResult(deltas, bytes_sent, time.perf_counter() - started, fragment_id)
+
+    def _register(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        self.elements.append(kind)
+        widget = getattr(element, kind)
+        widget_id = getattr(widget, "id", "")
+        if widget_id:
+            self.widgets[widget_id] = (kind, getattr(widget, "label", ""), delta.fragment_id)
+
+    def find(self, key=None, label=None):
+        """Return the widget id for a user key or label from the last render"""
+        for widget_id, (kind, widget_label, fragment_id) in self.widgets.items():
+            if key is not None and widget_id.endswith(f"-{key}"):
+                return widget_id
+            if label is not None and widget_label == label:
+                return widget_id
+        raise KeyError(key or label)
+
+    def _fragment_of(self, widget_id):
+        return self.widgets[widget_id][2]
+
+    async def click(self, key=None, label=None):
+        widget_id = self.find(key, label)
+        state = WidgetState(id=widget_id, trigger_value=True)
+        return await self.rerun([state], self._fragment_of(widget_id))
+
+    async def set_value(self, value, key=None, label=None):
+        """Set a checkbox, slider, text input or component value the way the browser would"""
+        widget_id = self.find(key, label)
+        state = WidgetState(id=widget_id)
+        if isinstance(value, dict):  # custom components send JSON
+            state.json_value = json.dumps(value)
+        elif isinstance(value, bool):
+            state.bool_value = value
+        elif isinstance(value, str):
+            state.string_value = value
+        elif isinstance(value, (list, tuple)):
+            state.double_array_value.data.extend(value)
+        else:
+            state.double_value = value
+        self.values[widget_id] = state
+        return await self.rerun((), self._fragment_of(widget_id))
+
+    async def send_states(self, states, fragment_id=""):
+        """Rerun with already-built WidgetStates, e.g. from a recorded trace"""
+        triggers = []
+        for state in states:
+            if state.WhichOneof("value") in _TRIGGER_FIELDS:
+                triggers.append(state)
+            else:
+                self.values[state.id] = state
+        return await self.rerun(triggers, fragment_id)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
@@ -0,0 +1,7 @@
+"""pytest setup: keep session state, caches and event logs out of the working tree"""
+import os
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix="neuronudge-tests-")
+os.environ.setdefault("NEURONUDGE_STATE_DIR", os.path.join(_ROOT, "state"))
+os.environ.setdefault("NEURONUDGE_CACHE_DIR", os.path.join(_ROOT, "cache"))
@@ -0,0 +1,65 @@
+"""Task breakdown, mood scoring and nudges, with no Streamlit in the import chain.
+
+app.py calls these inside its reruns. api.py serves the same functions
+as a JSON API, so the mobile and desktop widgets get a breakdown, a
+mood or a nudge without a script rerun. Nothing here touches
+st.session_state: the caller passes in anything per-session, such as a
+nudge's random generator and recently shown ids.
+"""
+import os
+import random
+
+import llm_client
+from nudges import get_nudge_catalog
+from sentiment import analyze_mood, analyze_moods  # noqa: F401 (part of the core API)
+from subtask_cache import get_cache
+from templates import get_catalog
+
+# Prompts and model version for task breakdowns; all three are part of the subtask cache key
+LLM_MODEL = os.environ.get("NEURONUDGE_LLM_MODEL", "gpt-3.5-turbo")
+SUBTASK_SYSTEM_PROMPT = "You are a helpful assistant that breaks down tasks into manageable subtasks for people with ADHD."
+SUBTASK_PROMPT = "Break down this task into 4-6 specific, actionable subtasks, as a numbered list: {task}"
+# Cached under its own "model" so an answer given without an API key is never served once one is set
+OFFLINE_MODEL = "template-fallback"
+
+
+def generate_subtasks(task_description, on_subtask=None):
+    """
+    Generate subtasks from the template catalog, or using an LLM (ChatGPT API) on a miss
+    A confident template match is returned straight away without calling the LLM.
+    Otherwise subtasks are streamed, and on_subtask(subtasks_so_far) is called as each one arrives.
+    Without an OPENAI_API_KEY this falls back to the generic template.
+    Both the LLM answer and the fallback go through the subtask cache; a
+    template match is a catalog lookup already and is not cached.
+    """
+    catalog = get_catalog()
+    template = catalog.best_match(task_description)
+    if template is not None:
+        return list(template.subtasks)
+    if not llm_client.is_configured():
+        fallback = list(catalog.fallback.subtasks)
+        return get_cache().get_or_compute(task_description, tuple(fallback), OFFLINE_MODEL, lambda: fallback)
+
+    messages = [
+        {"role": "system", "content": SUBTASK_SYSTEM_PROMPT},
+        {"role": "user", "content": SUBTASK_PROMPT.format(task=task_description)}
+    ]
+
+    def stream():
+        subtasks = []
+        for subtask in llm_client.get_client(LLM_MODEL).stream_subtasks(messages):
+            subtasks.append(subtask)
+            if on_subtask:
+                on_subtask(subtasks)
+        return subtasks
+
+    try:
+        return get_cache().get_or_compute(
+            task_description, (SUBTASK_SYSTEM_PROMPT, SUBTASK_PROMPT), LLM_MODEL, stream)
+    except llm_client.LLMError:
+        return []
+
+
+def pick_nudge(mood, context="encouragement", rng=random, recent=None):
+    """A weighted Nudge (id, text, weight) for a mood and context; see NudgeCatalog.pick"""
+    return get_nudge_catalog().pick(mood, context, rng, recent)
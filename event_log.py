@@ -0,0 +1,215 @@
+"""Append-only log of each user's focus sessions, breaks, task ticks and mood readings.
+
+Every user (the session ID session_store keeps in the URL) has one file
+per app under EVENT_DIR: a HEADER_SIZE-byte header followed by
+fixed-width records, 20 bytes each (EVENT_FIELDS). Logging an event is a
+single write to a file opened for appending, so two tabs of the same
+user can log at once. A crash can leave at most a partial record at the
+end, and readers ignore it.
+
+Reading maps the file with np.memmap instead of parsing it, so analytics
+work on whole columns (`events["kind"] == FOCUS_COMPLETE`) without a
+Python object per event. A year of daily use is well under a megabyte
+per user. benchmarks/bench_event_log.py scans thousands of them.
+
+Writing packs records with struct, so logging and counting events never
+import NumPy; only reading does. log_event() also folds each event into
+the app's daily and weekly rollups (see rollups.py) as it is logged,
+which reads just that record back with struct.
+"""
+import functools
+import os
+import re
+import sqlite3
+import struct
+
+import streamlit as st
+
+from lazy_imports import lazy_import
+from session_store import STATE_DIR, session_id
+from traces import timestamp
+
+np = lazy_import("numpy")  # ~90 ms to import, so only load it once events are read
+rollups = lazy_import("rollups")  # which imports this module, so it is only loaded once an event is logged
+
+EVENT_DIR = os.environ.get("NEURONUDGE_EVENT_DIR", os.path.join(STATE_DIR, "events"))
+MAGIC = b"NNEV"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")  # magic, version, record size, then reserved zeros
+HEADER_SIZE = HEADER.size
+SUFFIX = ".events"
+
+EVENT_FIELDS = [
+    ("ts", "<f8"),       # unix seconds
+    ("elapsed", "<f4"),  # seconds the focus session or break ran; 0 for other events
+    ("planned", "<f4"),  # seconds it was set to run
+    ("task", "<i2"),     # row of the ticked task, -1 for other events
+    ("kind", "u1"),
+    ("mood", "i1"),      # the user's mood when it happened: MOODS
+]
+RECORD = struct.Struct("<dffhBb")  # EVENT_FIELDS, packed
+
+(FOCUS_START, FOCUS_STOP, FOCUS_COMPLETE, BREAK_START, BREAK_STOP, BREAK_COMPLETE,
+ TASK_DONE, TASK_UNDONE, MOOD_READING) = range(1, 10)
+KIND_NAMES = {
+    FOCUS_START: "focus_start", FOCUS_STOP: "focus_stop", FOCUS_COMPLETE: "focus_complete",
+    BREAK_START: "break_start", BREAK_STOP: "break_stop", BREAK_COMPLETE: "break_complete",
+    TASK_DONE: "task_done", TASK_UNDONE: "task_undone", MOOD_READING: "mood_reading",
+}
+MOODS = {"negative": -1, "neutral": 0, "positive": 1}
+_USER = re.compile(r"[\w-]+")  # no separators or dots; session IDs are hex
+
+
+@functools.lru_cache(maxsize=None)
+def event_dtype():
+    """NumPy dtype of one record"""
+    return np.dtype(EVENT_FIELDS)
+
+
+class EventLog:
+    """One directory of per-user event files for one app"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, user):
+        # The ID becomes a file name, so nothing in it may lead out of the directory
+        if not _USER.fullmatch(user):
+            raise ValueError(f"invalid user id {user!r}")
+        return os.path.join(self.directory, f"{user}{SUFFIX}")
+
+    def users(self):
+        """IDs of every user with a log"""
+        return [name[:-len(SUFFIX)] for name in os.listdir(self.directory) if name.endswith(SUFFIX)]
+
+    def append(self, user, kind, mood=None, elapsed=0.0, planned=0.0, task=-1, ts=None):
+        """Add one event to the end of a user's log"""
+        self._write(user, RECORD.pack(timestamp() if ts is None else ts, elapsed, planned, task, kind,
+                                      MOODS.get(mood, 0)))
+
+    def extend(self, user, records):
+        """Add an event_dtype() array of events to the end of a user's log in one write"""
+        self._write(user, np.ascontiguousarray(records, event_dtype()).tobytes())
+
+    def _write(self, user, data):
+        path = self.path(user)
+        try:
+            # Exclusive create, so only one writer ever writes the header
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+            os.write(fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def count(self, user):
+        """How many complete events a user's log holds, from its size alone"""
+        try:
+            size = os.path.getsize(self.path(user))
+        except FileNotFoundError:
+            return 0
+        return max(0, (size - HEADER_SIZE) // RECORD.size)  # drops a partly written last record
+
+    def records(self, user, start=0):
+        """A user's events from index `start` on, as tuples in EVENT_FIELDS order, read without NumPy"""
+        try:
+            with open(self.path(user), "rb") as f:
+                f.seek(HEADER_SIZE + start * RECORD.size)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return list(RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]))
+
+    def read(self, user):
+        """A user's events as a read-only memory-mapped event_dtype() array, oldest first"""
+        return read_events(self.path(user))
+
+    def scan(self):
+        """(user, events) for every user with a log"""
+        for user in self.users():
+            yield user, self.read(user)
+
+
+def read_events(path):
+    """The events in one log file, mapped rather than loaded; empty if there is no file"""
+    dtype = event_dtype()
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return np.empty(0, dtype)
+    count = (size - HEADER_SIZE) // RECORD.size  # drops a partly written last record
+    if count <= 0:
+        return np.empty(0, dtype)
+    raw = np.memmap(path, np.uint8, mode="r", shape=(HEADER_SIZE + count * RECORD.size,))
+    magic, _, record_size = HEADER.unpack(raw[:HEADER_SIZE].tobytes())
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} event log")
+    return raw[HEADER_SIZE:].view(dtype)
+
+
+def summarize(events, since=None, until=None):
+    """Totals over the events in [since, until), given as unix seconds"""
+    if since is not None or until is not None:
+        ts = events["ts"]
+        keep = np.ones(len(events), bool)
+        if since is not None:
+            keep &= ts >= since
+        if until is not None:
+            keep &= ts < until
+        events = events[keep]
+    # Two passes over the log: events per (kind, mood), and time spent per kind
+    kinds = events["kind"].astype(np.intp)
+    slots = len(KIND_NAMES) + 1
+    by_mood = np.bincount(kinds * 3 + (events["mood"] + 1), minlength=slots * 3).reshape(slots, 3)
+    seconds = np.bincount(kinds, weights=events["elapsed"], minlength=slots)
+    readings = by_mood[MOOD_READING]
+    return {
+        **{name: int(by_mood[kind].sum()) for kind, name in KIND_NAMES.items()},
+        "focus_minutes": float(seconds[FOCUS_STOP] + seconds[FOCUS_COMPLETE]) / 60,
+        "break_minutes": float(seconds[BREAK_STOP] + seconds[BREAK_COMPLETE]) / 60,
+        "moods": {mood: int(readings[value + 1]) for mood, value in MOODS.items()},
+    }
+
+
+def merge(total, summary):
+    """Add one summary into a running total, e.g. to summarize many users"""
+    for field, value in summary.items():
+        if isinstance(value, dict):
+            merge(total.setdefault(field, dict.fromkeys(value, 0)), value)
+        else:
+            total[field] = total.get(field, 0) + value
+    return total
+
+
+@functools.lru_cache(maxsize=None)
+def get_event_log(app):
+    """Process-wide event log for an app, shared by every session"""
+    return EventLog(os.path.join(EVENT_DIR, app))
+
+
+def log_event(app, kind, user=None, **fields):
+    """Log an event for this session's user, in their current mood
+
+    Outside a run, e.g. on the timer scheduler's thread, pass the `user`
+    and `mood` explicitly.
+    """
+    if "mood" not in fields:
+        fields["mood"] = st.session_state.get("mood")
+    user = user or session_id()
+    get_event_log(app).append(user, kind, **fields)
+    try:
+        rollups.get_rollups(app).update(user)
+    except sqlite3.Error:
+        pass  # e.g. the database is busy; the next update folds this event in with any later ones
+
+
+def log_mood(app, text, mood):
+    """Log a mood reading, once per distinct text the user entered; True if this one was logged"""
+    if st.session_state.get("_logged_mood_text") == text:
+        return False
+    st.session_state._logged_mood_text = text
+    log_event(app, MOOD_READING, mood=mood)
+    return True
@@ -0,0 +1,60 @@
+"""Browser-side focus countdown shared by both NeuroNudge apps.
+
+The countdown ticks inside the component iframe, so the Streamlit script
+only reruns when the user presses start, pause or break, or when the
+timer reaches zero.
+"""
+import os
+from functools import partial
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from session_store import restore_offloaded
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+_component = components.declare_component("focus_timer", path=_FRONTEND_DIR)
+
+DEFAULT_LABELS = {"start": "Start Focus", "pause": "Pause Timer", "break": "Take Break"}
+# Seconds a "complete" event may arrive before the deadline, for clock and network skew. The
+# browser's word alone does not end a session early: apps ignore a completion sooner than this.
+COMPLETE_SLACK = 2.0
+
+
+def _dispatch(key, on_event):
+    value = st.session_state.get(key)
+    if not value:
+        return
+
+    # The component keeps returning its last value, so only handle each event once
+    seen_key = f"{key}_last_event"
+    if st.session_state.get(seen_key) == value["id"]:
+        return
+    st.session_state[seen_key] = value["id"]
+    st.session_state[f"{key}_event"] = value["event"]
+    if on_event is not None:
+        restore_offloaded()  # the handler reads saved state, which an idle session may have dropped
+        on_event(value["event"])
+
+
+def focus_timer(remaining, duration, active, on_event=None, labels=None, theme="space",
+                show_progress=False, key="focus_timer"):
+    """Render the countdown and return the event handled on this rerun, if any.
+
+    `remaining` and `duration` are in seconds. Events are "start", "pause",
+    "break" and "complete". `on_event(event)` runs as a widget callback, so
+    state it changes is already visible when the countdown is redrawn. A
+    label set to None hides that button.
+    """
+    _component(
+        remaining_ms=int(max(0, remaining) * 1000),
+        duration_ms=int(duration * 1000),
+        active=bool(active),
+        labels=dict(DEFAULT_LABELS, **(labels or {})),
+        theme=theme,
+        show_progress=show_progress,
+        key=key,
+        default=None,
+        on_change=partial(_dispatch, key, on_event),
+    )
+    return st.session_state.pop(f"{key}_event", None)
@@ -0,0 +1,46 @@
+"""The history dashboard: focus minutes, completion rate and moods by day or week.
+
+`history_dashboard()` draws this session's user from the rollups (see
+rollups.py), so a rerun reads a few rows however long the history is.
+The chart is plain HTML styled by the theme, like the progress bar, so
+drawing it does not load pandas or a charting library.
+"""
+import streamlit as st
+
+from rollups import get_rollups
+from session_store import session_id
+from traces import timestamp
+
+VIEWS = {"Daily": ("day", 14), "Weekly": ("week", 8)}  # label -> period and how many to show
+
+
+def _chart(rows, period):
+    minutes = [round(row["focus_seconds"] / 60) for row in rows]
+    tallest = max(max(minutes), 1)
+    bars = []
+    for row, value in zip(rows, minutes):
+        start = row["start"]
+        label = str(start.day) if period == "day" else f"{start:%b} {start.day}"
+        bars.append(f'<div class="history-bar" title="{start:%a %b} {start.day}: {value} min">'
+                    f'<div class="history-fill" style="height: calc((100% - 16px) * {value / tallest:.2f});"></div>'
+                    f'<span class="history-label">{label}</span></div>')
+    return f'<div class="history-chart">{"".join(bars)}</div>'
+
+
+def history_dashboard(app, key="history"):
+    """Focus history of this session's user in `app`, with a daily/weekly toggle"""
+    view = st.radio("History view", list(VIEWS), horizontal=True, key=f"{key}_view",
+                    label_visibility="collapsed")
+    period, count = VIEWS[view]
+    rows = get_rollups(app).history(session_id(), period, count, now=timestamp())
+
+    st.markdown(_chart(rows, period), unsafe_allow_html=True)
+
+    totals = {field: sum(row[field] for row in rows) for field in rows[0] if field != "start"}
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Focus minutes", round(totals["focus_seconds"] / 60))
+    col2.metric("Completion rate",
+                f"{totals['completed'] / totals['sessions']:.0%}" if totals["sessions"] else "–")
+    col3.metric("Tasks done", totals["tasks_done"])
+    st.caption(f"Moods over the last {count} {period}s: 😊 {totals['mood_positive']} · "
+               f"😐 {totals['mood_neutral']} · 😔 {totals['mood_negative']}")
@@ -0,0 +1,81 @@
+"""Learns a user's focus and break lengths from how their sessions end.
+
+Every finished focus session or break updates a running estimate in
+O(1). There is one estimate per mood at the start, plus one over all
+moods.
+
+- A session that runs to the end suggests the user could manage a bit
+  more, so the target is the planned length plus GROWTH.
+- A session stopped early suggests the time actually spent is what the
+  user can sustain.
+
+The estimate moves toward the target with a learning rate. The rate
+starts like a running mean and settles at MIN_RATE, so recent sessions
+keep counting more than old ones.
+
+The model is a small dict of lists that session_store persists as-is.
+Nothing is kept per session, so it stays the same size however long
+the history grows.
+"""
+DEFAULT_FOCUS = 25.0  # minutes, before anything is learned
+DEFAULT_BREAK = 5.0
+FOCUS_RANGE = (5, 60)  # minutes, the focus slider's range
+BREAK_RANGE = (2, 20)
+GROWTH = 0.1  # a completed session suggests trying 10% longer
+MIN_RATE = 0.15  # the learning rate never drops below this
+PRIOR_WEIGHT = 2  # the defaults count as this many sessions
+MOOD_PRIOR = 3  # sessions in a mood before its own estimate outweighs the overall one
+MIN_ELAPSED = 60  # seconds; anything stopped sooner was probably a mis-click and is ignored
+
+_FOCUS, _FOCUS_COUNT, _BREAK, _BREAK_COUNT = range(4)
+_OVERALL = "all"
+
+
+def new_model():
+    """Learner state for a new user"""
+    return {_OVERALL: [DEFAULT_FOCUS, 0, DEFAULT_BREAK, 0]}
+
+
+def _update(stats, index, planned, elapsed, completed):
+    target = planned * (1 + GROWTH) if completed else elapsed
+    count = stats[index + 1]
+    rate = max(MIN_RATE, 1 / (count + PRIOR_WEIGHT))
+    stats[index] += rate * (target - stats[index])
+    stats[index + 1] = count + 1
+
+
+def _record(model, index, mood, planned_seconds, elapsed_seconds, completed):
+    if not completed and elapsed_seconds < MIN_ELAPSED:
+        return
+    planned, elapsed = planned_seconds / 60, min(elapsed_seconds, planned_seconds) / 60
+    for key in (_OVERALL, mood) if mood else (_OVERALL,):
+        stats = model.get(key)
+        if stats is None:
+            stats = model[key] = [DEFAULT_FOCUS, 0, DEFAULT_BREAK, 0]
+        _update(stats, index, planned, elapsed, completed)
+
+
+def record_focus(model, mood, planned_seconds, elapsed_seconds, completed):
+    """Update the model after a focus session that began in `mood` ended"""
+    _record(model, _FOCUS, mood, planned_seconds, elapsed_seconds, completed)
+
+
+def record_break(model, mood, planned_seconds, elapsed_seconds, completed):
+    """Update the model after a break ended, on time or because work resumed early"""
+    _record(model, _BREAK, mood, planned_seconds, elapsed_seconds, completed)
+
+
+def _blend(model, mood, index):
+    overall = model[_OVERALL][index]
+    stats = model.get(mood)
+    if stats is None or not stats[index + 1]:
+        return overall
+    weight = stats[index + 1] / (stats[index + 1] + MOOD_PRIOR)
+    return weight * stats[index] + (1 - weight) * overall
+
+
+def suggest(model, mood):
+    """(focus minutes, break minutes) to offer a user in `mood`"""
+    focus = min(max(round(_blend(model, mood, _FOCUS)), FOCUS_RANGE[0]), FOCUS_RANGE[1])
+    rest = min(max(round(_blend(model, mood, _BREAK)), BREAK_RANGE[0]), BREAK_RANGE[1])
+    return focus, rest
@@ -0,0 +1,37 @@
+"""Deferred imports for heavy optional dependencies.
+
+`openai = lazy_import("openai")` binds a placeholder right away and only
+imports the package on first attribute access, so a worker does not pay
+for openai or NumPy before the code path that needs them runs.
+
+The placeholder is deliberately not an entry in sys.modules: Streamlit
+calls inspect.getmodule(), which touches every module there and would
+set off the import straight away.
+"""
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module holds the import lock, so concurrent first uses are safe
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded yet"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return a LazyModule for `name`, or None if it is not installed"""
+    if importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
@@ -0,0 +1,139 @@
+"""Async, connection-pooled client for OpenAI-compatible chat completions.
+
+One client per process owns an event loop on a background thread and a
+single AsyncOpenAI instance, so every session reuses the same pool of
+keep-alive connections instead of blocking the Streamlit script thread
+on a fresh request. Completions are streamed, and each numbered subtask
+line is handed back as soon as it is complete, so the task list can fill
+in step by step.
+
+Configure with the usual OPENAI_API_KEY / OPENAI_BASE_URL variables;
+benchmarks/mock_openai_server.py is a local stand-in for the API.
+"""
+import asyncio
+import os
+import queue
+import random
+import re
+import threading
+
+from lazy_imports import lazy_import
+
+openai = lazy_import("openai")  # ~0.7 s to import, so only load it once a request is made
+TIMEOUT = 30.0  # seconds allowed for one whole completion
+MAX_RETRIES = 3
+BACKOFF = 0.5  # seconds before the first retry, doubled after each one
+
+_SUBTASK_LINE = re.compile(r"^\s*(?:\d+\s*[.):]|[-*•])\s*(.*\S)")
+
+
+class LLMError(Exception):
+    """The LLM did not produce an answer within the timeout and retries"""
+
+
+def is_configured():
+    """True when an API key (real or mock) is available"""
+    return bool(os.environ.get("OPENAI_API_KEY"))
+
+
+class SubtaskLineParser:
+    """Turns streamed text chunks into complete numbered or bulleted subtasks"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text):
+        """Add a chunk of text and return the subtasks whose lines are now complete"""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        return [match.group(1) for match in map(_SUBTASK_LINE.match, lines) if match]
+
+    def close(self):
+        """Return the last subtask if the stream ended without a newline"""
+        match = _SUBTASK_LINE.match(self._buffer)
+        self._buffer = ""
+        return [match.group(1)] if match else []
+
+
+class LLMClient:
+    """Pooled async chat client with a blocking, streaming facade for Streamlit"""
+
+    def __init__(self, model, timeout=TIMEOUT, max_retries=MAX_RETRIES, **client_options):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="llm-client").start()
+        # Retries are handled here, so a stream that already produced lines is never replayed
+        self._client = openai.AsyncOpenAI(max_retries=0, timeout=timeout, **client_options)
+
+    async def astream_subtasks(self, messages):
+        """Async generator of subtasks, retrying with backoff until the first one arrives"""
+        # Errors worth retrying: the request may well succeed a moment later
+        retryable = (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError,
+                     openai.InternalServerError, TimeoutError)
+        for attempt in range(self.max_retries + 1):
+            emitted = False
+            try:
+                async with asyncio.timeout(self.timeout):
+                    stream = await self._client.chat.completions.create(
+                        model=self.model, messages=messages, stream=True
+                    )
+                    # Closing returns the connection to the pool even when the read is
+                    # cancelled, times out or the consumer stops early
+                    async with stream:
+                        parser = SubtaskLineParser()
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            for subtask in parser.feed(chunk.choices[0].delta.content or ""):
+                                emitted = True
+                                yield subtask
+                        for subtask in parser.close():
+                            yield subtask
+                return
+            except retryable as exc:
+                if emitted or attempt == self.max_retries:
+                    raise LLMError(f"LLM request failed after {attempt + 1} attempt(s): {exc!r}") from exc
+                # Full jitter keeps many sessions from retrying in lockstep
+                await asyncio.sleep(random.uniform(0, BACKOFF * 2 ** attempt))
+            except openai.OpenAIError as exc:  # bad key, bad request: retrying won't help
+                raise LLMError(f"LLM request failed: {exc!r}") from exc
+
+    def stream_subtasks(self, messages):
+        """Blocking generator of subtasks for the Streamlit script thread"""
+        results = queue.Queue()
+
+        async def pump():
+            try:
+                async for subtask in self.astream_subtasks(messages):
+                    results.put((True, subtask))
+            except Exception as exc:
+                results.put((False, exc))
+            else:
+                results.put((False, None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                ok, value = results.get()
+                if ok:
+                    yield value
+                elif value is None:
+                    return
+                else:
+                    raise value
+        finally:
+            future.cancel()  # the rerun was interrupted, stop reading the stream
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(model):
+    """Process-wide client per model, shared by every session"""
+    with _clients_lock:
+        if model not in _clients:
+            _clients[model] = LLMClient(model)
+        return _clients[model]
@@ -0,0 +1,283 @@
+"""Opt-in timing of every rerun, exported in the Prometheus text format.
+
+Nothing is measured unless NEURONUDGE_METRICS_FILE or
+NEURONUDGE_METRICS_PORT is set. When they are not set, start_rerun()
+returns a shared no-op timer, section() returns a shared null context,
+and the decorators return the function unchanged.
+
+With metrics on, each app counts its reruns per session and splits them
+by cause:
+
+- session_start: the first run of a browser session;
+- timer: the focus timer reported start, pause, break or completion;
+- interaction: any other widget.
+
+Reruns are also split by scope, "full" or "fragment". The sections of
+each rerun go into histograms. They are measured with a lap timer
+(start_rerun() and then .lap(name) at each boundary), so the scripts
+need no re-indenting. The results are exported in two ways:
+
+    NEURONUDGE_METRICS_FILE=metrics.prom  # rewritten every NEURONUDGE_METRICS_INTERVAL seconds
+    NEURONUDGE_METRICS_PORT=9464          # GET http://127.0.0.1:9464/metrics
+"""
+import atexit
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+METRICS_FILE = os.environ.get("NEURONUDGE_METRICS_FILE")
+METRICS_PORT = os.environ.get("NEURONUDGE_METRICS_PORT")
+METRICS_HOST = os.environ.get("NEURONUDGE_METRICS_HOST", "127.0.0.1")
+EXPORT_INTERVAL = float(os.environ.get("NEURONUDGE_METRICS_INTERVAL", 10))  # seconds between file writes
+ENABLED = bool(METRICS_FILE or METRICS_PORT)
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SESSION_WINDOW = 3600.0  # a session with no rerun for this long drops out of the per-session figures
+SESSION_QUANTILES = (0.5, 0.9, 0.99)
+TIMER_KEY = "focus_timer"
+CAUSES = ("session_start", "timer", "interaction")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class Registry:
+    """Section histograms and rerun counters shared by every session in the process"""
+
+    def __init__(self, buckets=BUCKETS, session_window=SESSION_WINDOW):
+        self.buckets = buckets
+        self.session_window = session_window
+        self._lock = threading.Lock()
+        self._sections = {}  # (app, section) -> [count per bucket..., +Inf, sum]
+        self._reruns = {}  # (app, cause, scope) -> count
+        self._sessions = {}  # (app, session id) -> [last rerun, {cause: count}]
+        self._sessions_total = {}  # app -> sessions seen
+
+    def observe(self, app, section, seconds):
+        with self._lock:
+            counts = self._sections.get((app, section))
+            if counts is None:
+                counts = self._sections[(app, section)] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            counts[-1] += seconds
+
+    def count_rerun(self, app, cause, scope, session):
+        now = time.monotonic()
+        with self._lock:
+            key = (app, cause, scope)
+            self._reruns[key] = self._reruns.get(key, 0) + 1
+            entry = self._sessions.get((app, session))
+            if entry is None:
+                entry = self._sessions[(app, session)] = [now, {}]
+                self._sessions_total[app] = self._sessions_total.get(app, 0) + 1
+            entry[0] = now
+            entry[1][cause] = entry[1].get(cause, 0) + 1
+
+    def render(self):
+        """Everything recorded so far, in the Prometheus text exposition format"""
+        with self._lock:
+            cutoff = time.monotonic() - self.session_window
+            for key in [key for key, (last, _) in self._sessions.items() if last < cutoff]:
+                del self._sessions[key]
+            sections = {key: list(counts) for key, counts in self._sections.items()}
+            reruns = dict(self._reruns)
+            sessions_total = dict(self._sessions_total)
+            per_session = {}
+            for (app, _), (_, counts) in self._sessions.items():
+                per_session.setdefault(app, []).append(counts)
+
+        lines = ["# HELP neuronudge_section_seconds Time spent in each section of a rerun.",
+                 "# TYPE neuronudge_section_seconds histogram"]
+        for (app, section), counts in sorted(sections.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"neuronudge_section_seconds_bucket{{{_labels(app=app, section=section, le=bound)}}}"
+                             f" {cumulative}")
+            lines.append(f"neuronudge_section_seconds_sum{{{_labels(app=app, section=section)}}} {counts[-1]:.6f}")
+            lines.append(f"neuronudge_section_seconds_count{{{_labels(app=app, section=section)}}} {cumulative}")
+
+        lines += ["# HELP neuronudge_reruns_total Script reruns by cause and scope (full or fragment).",
+                  "# TYPE neuronudge_reruns_total counter"]
+        for (app, cause, scope), count in sorted(reruns.items()):
+            lines.append(f"neuronudge_reruns_total{{{_labels(app=app, cause=cause, scope=scope)}}} {count}")
+
+        lines += ["# HELP neuronudge_sessions_total Browser sessions that have run the script.",
+                  "# TYPE neuronudge_sessions_total counter"]
+        for app, count in sorted(sessions_total.items()):
+            lines.append(f"neuronudge_sessions_total{{{_labels(app=app)}}} {count}")
+
+        lines += [f"# HELP neuronudge_session_reruns Reruns per session by cause, over sessions active"
+                  f" in the last {self.session_window:.0f} seconds.",
+                  "# TYPE neuronudge_session_reruns summary"]
+        for app, sessions in sorted(per_session.items()):
+            for cause in CAUSES:
+                counts = sorted(session.get(cause, 0) for session in sessions)
+                for quantile in SESSION_QUANTILES:
+                    value = counts[min(len(counts) - 1, int(quantile * len(counts)))]
+                    lines.append(f"neuronudge_session_reruns{{{_labels(app=app, cause=cause, quantile=quantile)}}}"
+                                 f" {value}")
+                lines.append(f"neuronudge_session_reruns_sum{{{_labels(app=app, cause=cause)}}} {sum(counts)}")
+                lines.append(f"neuronudge_session_reruns_count{{{_labels(app=app, cause=cause)}}} {len(counts)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "w") as output:
+            output.write(self.render())
+        os.replace(partial, path)  # a scraper never reads a half-written file
+
+
+def _write_loop(registry, path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            registry.write(path)
+        except OSError:
+            pass  # e.g. the directory went away; try again next interval
+
+
+def serve(registry, host, port):
+    """Answer GET /metrics from a daemon thread; returns the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+REGISTRY = Registry() if ENABLED else None
+# Started at import, which Python runs once per process, so the port is only bound once
+if METRICS_PORT:
+    serve(REGISTRY, METRICS_HOST, int(METRICS_PORT))
+if METRICS_FILE:
+    threading.Thread(target=_write_loop, args=(REGISTRY, METRICS_FILE, EXPORT_INTERVAL),
+                     daemon=True, name="metrics-file").start()
+    atexit.register(REGISTRY.write, METRICS_FILE)
+
+
+def _count_rerun(app, scope, timer_key):
+    state = st.session_state
+    if "_metrics_seen" not in state:
+        state._metrics_seen = True
+        cause = "session_start"
+    elif f"{timer_key}_event" in state:
+        cause = "timer"  # set by the focus timer's callback and popped when it is drawn
+    else:
+        cause = "interaction"
+    ctx = get_script_run_ctx()
+    REGISTRY.count_rerun(app, cause, scope, ctx.session_id if ctx else "")
+
+
+class _Rerun:
+    """Lap timer: each lap() records the time since the previous one"""
+
+    __slots__ = ("app", "started", "last")
+
+    def __init__(self, app):
+        self.app = app
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, section):
+        now = time.perf_counter()
+        REGISTRY.observe(self.app, section, now - self.last)
+        self.last = now
+
+    def finish(self, section):
+        """Record the last lap and the whole rerun"""
+        self.lap(section)
+        REGISTRY.observe(self.app, "rerun", self.last - self.started)
+
+
+class _NullRerun:
+    __slots__ = ()
+
+    def lap(self, section):
+        pass
+
+    finish = lap
+
+
+_NULL_RERUN = _NullRerun()
+_NULL_SECTION = contextlib.nullcontext()
+
+
+def start_rerun(app, timer_key=TIMER_KEY):
+    """Count a full rerun of `app` and return its lap timer; call at the top of the script"""
+    if not ENABLED:
+        return _NULL_RERUN
+    _count_rerun(app, "full", timer_key)
+    return _Rerun(app)
+
+
+@contextlib.contextmanager
+def _section(app, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(app, name, time.perf_counter() - started)
+
+
+def section(app, name):
+    """Context manager timing the block inside it"""
+    return _section(app, name) if ENABLED else _NULL_SECTION
+
+
+def timed(app, name):
+    """Decorator timing every call of a function"""
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _section(app, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_fragment(app, name, timer_key=TIMER_KEY):
+    """Like timed(), for a function under @st.fragment; also counts the fragment's own reruns
+
+    Apply it below @st.fragment. A fragment also runs during every full
+    rerun, which is already counted by start_rerun(), so only runs that
+    rerun just this fragment are counted here.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if ctx is not None and ctx.fragment_ids_this_run:
+                _count_rerun(app, "fragment", timer_key)
+            with _section(app, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,97 @@
+"""Keyword mood analyzer shared by both NeuroNudge apps.
+
+Text is lowercased and tokenized once, then every token is looked up in a
+prebuilt hash table of mood words. Whole-word matching means "unready" no
+longer counts as "ready", and a negation ("not", "never", ...) flips the
+next mood word within a short window, so "not tired" reads as positive.
+"""
+import re
+from typing import NamedTuple
+
+# Word weights: positive words lift the mood score, negative words lower it
+POSITIVE_WORDS = {
+    "good": 1.0, "great": 1.5, "happy": 1.5, "excited": 1.5, "ready": 1.0,
+    "focus": 1.0, "focused": 1.0, "productive": 1.5, "energetic": 1.5,
+    "motivated": 1.5, "calm": 1.0, "rested": 1.0, "fine": 0.5, "okay": 0.5,
+    "ok": 0.5, "awesome": 2.0, "amazing": 2.0, "fantastic": 2.0, "confident": 1.0,
+    "relaxed": 1.0, "refreshed": 1.0, "hopeful": 1.0, "proud": 1.0,
+}
+NEGATIVE_WORDS = {
+    "tired": 1.0, "sad": 1.5, "anxious": 1.5, "stressed": 1.5,
+    "overwhelmed": 2.0, "exhausted": 2.0, "drained": 1.5, "bored": 0.5,
+    "distracted": 1.0, "frustrated": 1.5, "worried": 1.0, "stuck": 1.0,
+    "sleepy": 0.5, "burnt": 1.5, "burned": 1.5, "scattered": 1.0, "restless": 1.0,
+    "awful": 2.0, "terrible": 2.0, "bad": 1.0, "down": 0.5, "lonely": 1.0,
+}
+NEGATIONS = frozenset({
+    "not", "no", "never", "hardly", "barely", "isn't", "wasn't", "don't",
+    "didn't", "doesn't", "can't", "cannot", "won't", "aren't", "ain't",
+})
+NEGATION_WINDOW = 3  # a negation applies to a mood word at most this many tokens later
+
+# Compiled lexicon: one dict lookup per token decides weight and sign
+LEXICON = {**{word: weight for word, weight in POSITIVE_WORDS.items()},
+           **{word: -weight for word, weight in NEGATIVE_WORDS.items()}}
+
+KEYWORDS = frozenset(LEXICON) | NEGATIONS
+
+# A token is a run of word characters, with apostrophes allowed inside it ("isn't"). Any
+# Unicode punctuation or space separates tokens, so "tired…" and "tired—really" match "tired"
+_WORD = re.compile(r"\w+(?:'\w+)*")
+
+
+class MoodScore(NamedTuple):
+    """Graded result of scoring one text"""
+    mood: str         # "positive", "negative" or "neutral"
+    score: float      # net weight scaled to -1..1
+    positive: float   # total positive weight found
+    negative: float   # total negative weight found
+
+
+NEUTRAL = MoodScore("neutral", 0.0, 0.0, 0.0)
+
+
+def score_tokens(tokens):
+    hits = [(i, token) for i, token in enumerate(tokens) if token in KEYWORDS]
+
+    positive = negative = 0.0
+    negated_until = -1
+    for i, token in hits:
+        if token in NEGATIONS:
+            negated_until = i + NEGATION_WINDOW
+            continue
+        weight = LEXICON[token]
+        if i <= negated_until:
+            weight = -weight
+            negated_until = -1
+        if weight > 0:
+            positive += weight
+        else:
+            negative -= weight
+
+    total = positive + negative
+    if not total:
+        return NEUTRAL
+    score = (positive - negative) / total
+    mood = "positive" if score > 0 else "negative" if score < 0 else "neutral"
+    return MoodScore(mood, score, positive, negative)
+
+
+def tokenize(text):
+    """Lowercase word tokens with punctuation stripped"""
+    return _WORD.findall(text.lower().replace("\u2019", "'"))
+
+
+def score_mood(text):
+    """Score one text and return a MoodScore"""
+    return score_tokens(tokenize(text))
+
+
+def analyze_mood(text):
+    """Return "positive", "negative" or "neutral" for a piece of text"""
+    return score_mood(text).mood
+
+
+def analyze_many(texts):
+    """Score a batch of texts, e.g. a whole journal history, in one call"""
+    return [score_tokens(tokenize(text)) for text in texts]
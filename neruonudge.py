@@ -1,9 +1,31 @@
 # neuro_nudge_app.py
 import streamlit as st
-import time
 import json
 from datetime import datetime
-import random
+
+from achievements import achievement_badges, announce, new_progress, record_progress, show_progress_news
+from event_log import FOCUS_COMPLETE, FOCUS_START, FOCUS_STOP, KIND_NAMES, MOOD_READING, log_event, log_mood
+from focus_timer import COMPLETE_SLACK, focus_timer
+from history import history_dashboard
+from intervals import new_model, record_focus, suggest
+from metrics import section, start_rerun, timed
+from nudges import companion_emoji, get_nudge_message
+from profiler import start_capture
+from sentiment import analyze_mood
+from session_store import restore_session, save_session, session_id
+from sounds import sound_url
+from stylesheets import stylesheet_link
+from subtask_cache import cached_subtasks, get_cache
+from templates import get_catalog
+from timer_scheduler import cancel_session_timer, schedule_session_timer
+from traces import record_rerun, session_random, timestamp
+
+# Opt-in per-section timing (see metrics.py); a no-op unless metrics are enabled
+rerun_timer = start_rerun("neruonudge")
+# Admin-only sampling profile of this rerun, armed with ?profile=N (see profiler.py)
+rerun_capture = start_capture("neruonudge")
+# Widget events for replay, when NEURONUDGE_TRACE_DIR is set (see traces.py)
+record_rerun("neruonudge")
 
 # Page configuration
 st.set_page_config(
@@ -13,64 +35,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for gentle styling
-st.markdown("""
-<style>
-    .main {
-        background-color: #f8f9fa;
-    }
-    .stButton>button {
-        background-color: #6c757d;
-        color: white;
-        border-radius: 8px;
-        border: none;
-        padding: 10px 24px;
-        font-size: 18px;
-    }
-    .stButton>button:hover {
-        background-color: #5a6268;
-        color: white;
-    }
-    .task-item {
-        background-color: #e9ecef;
-        padding: 15px;
-        border-radius: 10px;
-        margin-bottom: 10px;
-        border-left: 5px solid #6c757d;
-    }
-    .progress-bar {
-        height: 20px;
-        background-color: #e9ecef;
-        border-radius: 10px;
-        margin: 10px 0;
-    }
-    .progress-fill {
-        height: 100%;
-        background-color: #4CAF50;
-        border-radius: 10px;
-        text-align: center;
-        color: white;
-        line-height: 20px;
-        transition: width 0.5s;
-    }
-    .nudge-box {
-        background-color: #d1ecf1;
-        border-left: 5px solid #0c5460;
-        padding: 15px;
-        border-radius: 10px;
-        margin: 15px 0;
-    }
-    @keyframes grow {
-        from { transform: scale(1); }
-        to { transform: scale(1.05); }
-    }
-    .growing-companion {
-        animation: grow 1s infinite alternate;
-        text-align: center;
-        font-size: 50px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for gentle styling, served from static/ (see stylesheets.py)
+st.markdown(stylesheet_link("calm"), unsafe_allow_html=True)
+rerun_timer.lap("css")
+
+# Session state that survives a refresh or restart; saved at the end of each run
+PERSISTED_FIELDS = ("current_task", "subtasks", "timer_active", "timer_duration", "timer_start",
+                    "mood", "progress", "companion_level", "interval_model", "timer_mood", "achievements")
+restore_session("neruonudge", PERSISTED_FIELDS)
 
 # Initialize session state variables
 if 'current_task' not in st.session_state:
@@ -79,67 +51,93 @@ if 'subtasks' not in st.session_state:
     st.session_state.subtasks = []
 if 'timer_active' not in st.session_state:
     st.session_state.timer_active = False
-if 'timer_duration' not in st.session_state:
-    st.session_state.timer_duration = 25 * 60  # 25 minutes in seconds
+if 'timer_mood' not in st.session_state:
+    st.session_state.timer_mood = None  # mood when the current session started
 if 'timer_start' not in st.session_state:
     st.session_state.timer_start = 0
 if 'mood' not in st.session_state:
     st.session_state.mood = "neutral"
+if 'interval_model' not in st.session_state:
+    st.session_state.interval_model = new_model()  # learned focus/break lengths, see intervals.py
+if 'timer_duration' not in st.session_state:
+    st.session_state.timer_duration = suggest(st.session_state.interval_model, st.session_state.mood)[0] * 60
 if 'progress' not in st.session_state:
     st.session_state.progress = 0
 if 'companion_level' not in st.session_state:
     st.session_state.companion_level = 1
+if 'achievements' not in st.session_state:
+    # Rule state behind progress and companion_level; see achievements.py
+    st.session_state.achievements = new_progress(st.session_state.progress, st.session_state.companion_level)
+rerun_timer.lap("session_state")
 
 # Mock functions - to be replaced with actual implementations
-def analyze_mood(text):
-    """Mock mood analysis - will be replaced with Hugging Face model"""
-    positive_words = ["good", "great", "happy", "excited", "ready", "focus"]
-    negative_words = ["tired", "sad", "anxious", "stressed", "overwhelmed"]
-    
-    if any(word in text.lower() for word in positive_words):
-        return "positive"
-    elif any(word in text.lower() for word in negative_words):
-        return "negative"
-    return "neutral"
+# Prompt and model version for task breakdowns; both are part of the subtask cache key
+SUBTASK_MODEL = "mock-steps-v1"
+SUBTASK_PROMPT = "Break this task into small action steps: {task}"
 
+@timed("neruonudge", "break_down_task")
 def break_down_task(task):
+    """Break a task into steps: a matching template when there is one, else mock steps"""
+    template = get_catalog().best_match(task)
+    if template is not None:
+        return list(template.subtasks)
+    return llm_steps(task)
+
+@cached_subtasks(SUBTASK_PROMPT, SUBTASK_MODEL)
+def llm_steps(task):
     """Mock task breakdown - will be replaced with LLM"""
-    subtasks = []
-    if "clean" in task.lower() and "room" in task.lower():
-        subtasks = ["Pick up clothes from floor", "Make the bed", "Dust surfaces", "Vacuum the floor"]
-    elif "write" in task.lower() and "report" in task.lower():
-        subtasks = ["Outline main sections", "Research information", "Write first draft", "Revise and edit"]
-    else:
-        subtasks = [f"Step {i+1}: Work on {task}" for i in range(3)]
-    
-    return subtasks
+    return [f"Step {i+1}: Work on {task}" for i in range(3)]
 
-def get_nudge_message(mood):
-    """Get a gentle nudge based on mood"""
-    positive_nudges = [
-        "You're doing great! Keep up the momentum! 🌟",
-        "Your progress is amazing! Let's keep going! 💪",
-        "Wow, you're on fire! Ready for the next step? 🔥"
-    ]
-    
-    neutral_nudges = [
-        "Let's take this one step at a time. You've got this! 👍",
-        "Breaking things down makes them more manageable. Ready to continue? 📋",
-        "Focus on just this one thing right now. You can do it! ✨"
-    ]
-    
-    negative_nudges = [
-        "It's okay to feel overwhelmed. Let's just focus on one small thing. 🌱",
-        "Be kind to yourself. How about we try a shorter focus session? 🕊️",
-        "Remember to breathe. You're doing better than you think. 💚"
-    ]
-    
-    if mood == "positive":
-        return random.choice(positive_nudges)
-    elif mood == "negative":
-        return random.choice(negative_nudges)
-    else:
-        return random.choice(neutral_nudges)
+def next_nudge(context, state=None):
+    """A nudge for the current mood and a context, skipping ones this session saw recently"""
+    state = st.session_state if state is None else state
+    return get_nudge_message(state["mood"], session_random(state), context, state.setdefault("recent_nudges", []))
+
+def count_progress(kind, ts=None, state=None):
+    """Count an event towards the companion's growth and achievements"""
+    state = st.session_state if state is None else state
+    if record_progress(state, kind, ts).level_up:
+        announce(state, next_nudge("milestone", state))
+
+def end_session(state, user, completed, elapsed):
+    """End the running focus session: log it, learn from it and grow the companion"""
+    state["timer_active"] = False
+    planned = state["timer_duration"]
+    # A completion is logged when the session ended, which the scheduler may see a moment later
+    ended = state["timer_start"] + planned if completed else None
+    kind = FOCUS_COMPLETE if completed else FOCUS_STOP
+    log_event("neruonudge", kind, user=user, mood=state["timer_mood"], elapsed=elapsed, planned=planned, ts=ended)
+    record_focus(state["interval_model"], state["timer_mood"], planned, elapsed, completed=completed)
+    # The slider's default follows what was learned
+    state["timer_duration"] = suggest(state["interval_model"], state["mood"])[0] * 60
+    state["timer_duration_slider"] = state["timer_duration"] // 60
+    count_progress(KIND_NAMES[kind], ended, state)
+    if completed:
+        state["timer_done_nudge"] = next_nudge("timer_done", state)
+
+def complete_session(state, user):
+    """End the session on time; called by the timer scheduler, even when the page is closed"""
+    if state.get("timer_active"):
+        end_session(state, user, completed=True, elapsed=state["timer_duration"])
+
+def handle_timer_event(event):
+    """Apply a start/break/completion event reported by the focus timer"""
+    # "Take a Break" is the timer's pause button here: it ends the session early
+    if event == "start" and not st.session_state.timer_active:
+        cancel_session_timer()
+        st.session_state.timer_active = True
+        st.session_state.timer_start = timestamp()
+        st.session_state.timer_mood = st.session_state.mood
+        log_event("neruonudge", FOCUS_START, planned=st.session_state.timer_duration)
+    elif event in ("pause", "complete") and st.session_state.timer_active:
+        # The scheduler may be ending it right now; if so this waits, and then it is already over
+        cancel_session_timer()
+        deadline = st.session_state.timer_start + st.session_state.timer_duration
+        if event == "complete" and timestamp() < deadline - COMPLETE_SLACK:
+            return  # reported early; only the server's clock ends a session, and the run reschedules it
+        if st.session_state.timer_active:
+            elapsed = st.session_state.timer_duration if event == "complete" else timestamp() - st.session_state.timer_start
+            end_session(st.session_state, session_id(), event == "complete", elapsed)
 
 # App layout
 st.title("🧠 NeuroNudge")
@@ -150,21 +148,24 @@ with st.sidebar:
     st.header("Settings")
     
     # Mood input
-    mood_input = st.text_area("How are you feeling today?")
+    mood_input = st.text_area("How are you feeling today?", key="mood_input")
     if mood_input:
-        st.session_state.mood = analyze_mood(mood_input)
+        with section("neruonudge", "analyze_mood"):
+            st.session_state.mood = analyze_mood(mood_input)
+        if log_mood("neruonudge", mood_input, st.session_state.mood):
+            count_progress(KIND_NAMES[MOOD_READING])
         st.write(f"Detected mood: {st.session_state.mood}")
     
     # Timer settings
     st.subheader("Focus Timer")
-    timer_minutes = st.slider("Session length (minutes)", 5, 60, 25)
+    if "timer_duration_slider" not in st.session_state:
+        st.session_state.timer_duration_slider = st.session_state.timer_duration // 60
+    timer_minutes = st.slider("Session length (minutes)", 5, 60, key="timer_duration_slider")
     st.session_state.timer_duration = timer_minutes * 60
     
     # Progress companion
     st.subheader("Progress Companion")
-    companion_emojis = ["🌱", "🌿", "🌳", "🌺", "🌷", "🌸", "🍀", "🎋"]
-    companion_index = min(st.session_state.companion_level - 1, len(companion_emojis) - 1)
-    st.markdown(f'<div class="growing-companion">{companion_emojis[companion_index]}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="growing-companion">{companion_emoji(st.session_state.companion_level)}</div>', unsafe_allow_html=True)
     st.write(f"Level {st.session_state.companion_level}")
     
     # Progress bar
@@ -175,6 +176,9 @@ with st.sidebar:
         <div class="progress-fill" style="width: {progress_percent}%;">{progress_percent}%</div>
     </div>
     """, unsafe_allow_html=True)
+    achievement_badges()
+
+rerun_timer.lap("sidebar")
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -182,12 +186,13 @@ col1, col2 = st.columns([2, 1])
 with col1:
     # Task input
     st.subheader("Your Task")
-    task_input = st.text_input("What would you like to work on?")
+    task_input = st.text_input("What would you like to work on?", key="task_input")
     
     if task_input and not st.session_state.current_task:
-        if st.button("Break Down Task"):
+        if st.button("Break Down Task", key="break_down_btn"):
             st.session_state.current_task = task_input
             st.session_state.subtasks = break_down_task(task_input)
+    st.caption(get_cache().summary())
     
     # Display subtasks
     if st.session_state.subtasks:
@@ -202,51 +207,38 @@ with col1:
         
         # Timer section
         st.subheader("Focus Timer")
-        timer_placeholder = st.empty()
-        
-        col_a, col_b = st.columns(2)
-        with col_a:
-            if st.button("Start Focus Session") and not st.session_state.timer_active:
-                st.session_state.timer_active = True
-                st.session_state.timer_start = time.time()
-        
-        with col_b:
-            if st.button("Take a Break") and st.session_state.timer_active:
-                st.session_state.timer_active = False
-                st.session_state.progress += 10
-                if st.session_state.progress % 30 == 0:
-                    st.session_state.companion_level += 1
-                st.balloons()
-        
-        # Timer logic
+
+        # The countdown ticks in the browser; we only hear back on start, break and completion
+        remaining = st.session_state.timer_duration
         if st.session_state.timer_active:
-            elapsed = time.time() - st.session_state.timer_start
+            elapsed = timestamp() - st.session_state.timer_start
             remaining = max(0, st.session_state.timer_duration - elapsed)
-            
-            mins, secs = divmod(int(remaining), 60)
-            timer_placeholder.metric("Time Remaining", f"{mins:02d}:{secs:02d}")
-            
-            # Progress bar for current session
-            progress_percent = 100 * (elapsed / st.session_state.timer_duration)
-            st.markdown(f"""
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: {progress_percent}%;">{int(progress_percent)}%</div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Check if timer is complete
-            if remaining <= 0:
-                st.session_state.timer_active = False
-                st.session_state.progress += 10
-                if st.session_state.progress % 30 == 0:
-                    st.session_state.companion_level += 1
-                st.success("Great job! Session completed! 🎉")
-                st.balloons()
+        timer_event = focus_timer(
+            remaining, st.session_state.timer_duration, st.session_state.timer_active,
+            on_event=handle_timer_event,
+            labels={"start": "Start Focus Session", "pause": "Take a Break", "break": None},
+            theme="calm", show_progress=True
+        )
+        if st.session_state.timer_active:
+            # Ends the session on time even if this page is closed or its countdown is throttled
+            schedule_session_timer(st.session_state.timer_start + st.session_state.timer_duration,
+                                   PERSISTED_FIELDS, complete_session)
+
+        # Set when the session ended, by the countdown reaching zero or by the timer scheduler
+        done = st.session_state.pop("timer_done_nudge", None)
+        if done:
+            st.success(done)
+        if done or timer_event == "pause":
+            st.balloons()
+            break_minutes = suggest(st.session_state.interval_model, st.session_state.mood)[1]
+            st.info(f"Take a {break_minutes}-minute break before your next session.")
+
+rerun_timer.lap("tasks_and_timer")
 
 with col2:
     # Gentle nudges and reminders
     st.subheader("Gentle Nudges")
-    st.markdown(f'<div class="nudge-box">{get_nudge_message(st.session_state.mood)}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="nudge-box">{next_nudge("encouragement")}</div>', unsafe_allow_html=True)
     
     # Mood-based suggestions
     st.subheader("Suggestions")
@@ -273,16 +265,32 @@ with col2:
     
     # Calming sounds
     st.subheader("Calming Sounds")
-    sound_option = st.selectbox("Background sound", ["None", "Rain", "Forest", "Cafe", "White Noise"])
+    sound_option = st.selectbox("Background sound", ["None", "Rain", "Forest", "Cafe", "White Noise"], key="sound_select")
     if sound_option != "None":
         st.write(f"Playing gentle {sound_option.lower()} sounds...")
+        url = sound_url(sound_option)
+        if url:
+            st.audio(url, loop=True, autoplay=True)
         
     # Visual reminders
     st.subheader("Visual Reminder")
-    reminder_text = st.text_input("Add a positive reminder for yourself", "I am capable of focused work")
+    reminder_text = st.text_input("Add a positive reminder for yourself", "I am capable of focused work", key="reminder_input")
     if reminder_text:
         st.markdown(f"**{reminder_text}** ✨")
 
+rerun_timer.lap("nudges")
+
+# Focus history
+st.subheader("Your History")
+history_dashboard("neruonudge")
+
+rerun_timer.lap("history")
+
 # Footer
 st.markdown("---")
-st.markdown("NeuroNudge 🧠 | Productivity, Gently Done | Designed with neurodiversity in mind")
\ No newline at end of file
+st.markdown("NeuroNudge 🧠 | Productivity, Gently Done | Designed with neurodiversity in mind")
+
+show_progress_news()
+save_session(PERSISTED_FIELDS)
+rerun_timer.finish("footer_and_save")
+rerun_capture.finish()
@@ -0,0 +1,151 @@
+"""Nudge messages and companion stages shared by both apps.
+
+The nudges live in data/nudges.json, each with the contexts it fits
+("tip", "encouragement", "timer_done", "break", "milestone"), the moods
+it suits (all by default) and a weight. Loading compiles every
+(mood, context) pair into an alias table, so a weighted pick costs two
+random numbers however large the catalog grows. Passing a session's
+recent list avoids showing the same nudge again within NO_REPEAT picks.
+
+Like the task templates, the file is checked for changes at most every
+RELOAD_INTERVAL seconds and reloaded in place.
+"""
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+NUDGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nudges.json")
+RELOAD_INTERVAL = 2.0  # seconds between checks of the data file's mtime
+NO_REPEAT = 3  # a nudge is not repeated within this many picks (at most half its bucket)
+MAX_DRAWS = 8  # alias draws before falling back to a scan of the unblocked nudges
+DEFAULT_MOOD = "neutral"
+
+COMPANION_EMOJIS = ("🌱", "🌿", "🌳", "🌺", "🌷", "🌸", "🍀", "🎋", "✨", "🦋")
+
+
+class Nudge(NamedTuple):
+    id: str
+    text: str
+    weight: float
+
+
+class _Bucket(NamedTuple):
+    """Alias table (Vose) over the nudges for one mood and context"""
+    nudges: tuple
+    probability: tuple  # chance of keeping column i rather than taking its alias
+    alias: tuple
+
+    def draw(self, rng):
+        column = int(rng.random() * len(self.nudges))
+        return self.nudges[column if rng.random() < self.probability[column] else self.alias[column]]
+
+
+def _bucket(nudges):
+    count = len(nudges)
+    total = sum(nudge.weight for nudge in nudges)
+    scaled = [nudge.weight * count / total for nudge in nudges]
+    probability, alias = [1.0] * count, list(range(count))
+    small = [i for i, value in enumerate(scaled) if value < 1.0]
+    large = [i for i, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probability[less], alias[less] = scaled[less], more
+        scaled[more] -= 1.0 - scaled[less]
+        (small if scaled[more] < 1.0 else large).append(more)
+    return _Bucket(tuple(nudges), tuple(probability), tuple(alias))
+
+
+class NudgeCatalog:
+    """Weighted, non-repeating nudge picks over a hot-reloaded data file"""
+
+    def __init__(self, path=NUDGES_PATH, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as data:
+            catalog = json.load(data)
+
+        moods = tuple(catalog["moods"])
+        grouped = {(mood, context): [] for mood in moods for context in catalog["contexts"]}
+        for entry in catalog["nudges"]:
+            # Interned, so a reload shares the strings sessions already hold
+            nudge = Nudge(entry["id"], sys.intern(entry["text"]), float(entry.get("weight", 1)))
+            for mood in entry.get("moods", moods):
+                for context in entry["contexts"]:
+                    grouped[(mood, context)].append(nudge)
+
+        # Swap everything in at once, so readers never see half a catalog
+        self._buckets = {key: _bucket(nudges) for key, nudges in grouped.items() if nudges}
+        self._mtime = mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                changed = os.stat(self.path).st_mtime_ns != self._mtime
+                if changed:
+                    self._load()
+            except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError):
+                pass  # a half-written or broken file: keep serving the last good catalog
+
+    def pick(self, mood, context, rng=random, recent=None):
+        """A weighted random nudge for a mood and context
+
+        `recent` is the session's list of recently shown nudge ids. Those
+        are skipped, and the pick is appended, keeping the last NO_REPEAT.
+        An unknown mood is treated as neutral.
+        """
+        self._maybe_reload()
+        buckets = self._buckets
+        bucket = buckets.get((mood, context)) or buckets[(DEFAULT_MOOD, context)]
+        if recent is None:
+            return bucket.draw(rng)
+
+        # Block at most half the bucket, so a small one doesn't turn into a fixed rotation
+        window = min(NO_REPEAT, len(bucket.nudges) // 2)
+        blocked = set(recent[-window:]) if window else set()
+        for _ in range(MAX_DRAWS):
+            nudge = bucket.draw(rng)
+            if nudge.id not in blocked:
+                break
+        else:
+            allowed = [nudge for nudge in bucket.nudges if nudge.id not in blocked]
+            nudge = rng.choices(allowed, weights=[nudge.weight for nudge in allowed])[0]
+        recent.append(nudge.id)
+        del recent[:-NO_REPEAT]
+        return nudge
+
+    def __len__(self):
+        return len({nudge.id for bucket in self._buckets.values() for nudge in bucket.nudges})
+
+
+@functools.lru_cache(maxsize=None)
+def get_nudge_catalog(path=NUDGES_PATH):
+    """Process-wide nudge catalog shared by every session"""
+    return NudgeCatalog(path)
+
+
+def get_nudge_message(mood, rng=random, context="encouragement", recent=None):
+    """A gentle nudge for a mood: "positive", "negative" or anything else for neutral"""
+    return get_nudge_catalog().pick(mood, context, rng, recent).text
+
+
+def companion_emoji(level):
+    """The companion's look at a level, staying at the last stage once it is reached"""
+    return COMPANION_EMOJIS[min(level - 1, len(COMPANION_EMOJIS) - 1)]
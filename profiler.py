@@ -0,0 +1,206 @@
+"""On-demand sampling profiles of a user's next few reruns, for admins.
+
+When a session is opened with ?profile=N&token=<NEURONUDGE_PROFILE_TOKEN>,
+its next N reruns are sampled: full reruns through start_capture(), and
+fragment reruns through @profiled_fragment. Each rerun is written to
+PROFILE_DIR as a speedscope file (open it at https://www.speedscope.app).
+The file name and profile name carry the app, the page and the widget
+that triggered the rerun. Both parameters are removed from the URL once
+read, so a refresh does not arm the profiler again.
+
+The sampler is a thread that reads the script thread's stack from
+sys._current_frames() every SAMPLE_INTERVAL seconds, so nothing is
+traced or hooked. Without NEURONUDGE_PROFILE_TOKEN everything here is a
+no-op. With a token set, a session that is not being profiled costs a
+query parameter and a session_state lookup per rerun.
+"""
+import functools
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+TOKEN = os.environ.get("NEURONUDGE_PROFILE_TOKEN")
+PROFILE_DIR = os.environ.get(
+    "NEURONUDGE_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles")
+)
+SAMPLE_INTERVAL = float(os.environ.get("NEURONUDGE_PROFILE_INTERVAL", 0.002))  # seconds
+MAX_RERUNS = 20  # most reruns one ?profile= request may capture
+MAX_SECONDS = 60.0  # a capture that is never finished stops sampling after this long
+PARAM = "profile"
+TOKEN_PARAM = "token"
+PAGE_KEY = "page"
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+class Sampler:
+    """Samples one thread's stack on a daemon thread until stop()"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL, max_seconds=MAX_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.frames = []  # speedscope frame dicts
+        self.samples = []  # stacks of indices into frames, outermost first
+        self.weights = []  # milliseconds each sample stands for
+        self._frame_index = {}  # code object -> index into frames
+        self._stopped = threading.Event()
+        self.started = time.perf_counter()
+        self.elapsed = None  # milliseconds, set by stop()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+        self._thread.start()
+
+    def _run(self):
+        last = self.started
+        deadline = self.started + self.max_seconds
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None or now > deadline:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(self._index(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append((now - last) * 1000)
+            last = now
+
+    def _index(self, code):
+        index = self._frame_index.get(code)
+        if index is None:
+            index = self._frame_index[code] = len(self.frames)
+            self.frames.append({"name": getattr(code, "co_qualname", code.co_name),
+                                "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.elapsed = (time.perf_counter() - self.started) * 1000
+
+    def speedscope(self, name):
+        """The samples as a speedscope file (dict) with one sampled profile; call after stop()"""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "neuronudge profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": [{"type": "sampled", "name": name, "unit": "milliseconds",
+                          "startValue": 0, "endValue": round(self.elapsed, 3),
+                          "samples": self.samples, "weights": [round(w, 3) for w in self.weights]}],
+        }
+
+
+def _trigger():
+    """Key of the widget whose change caused this rerun, or "rerun" if none did"""
+    try:
+        # Private API: the widget values the browser sent for this run, and the last run's values
+        inner = get_script_run_ctx().session_state._state
+        mapping = inner._key_id_mapper.id_key_mapping
+        for widget_id in inner._new_widget_state:
+            if inner._widget_changed(widget_id):
+                return mapping.get(widget_id, "unkeyed-widget")
+    except (AttributeError, KeyError):
+        return "unknown"
+    return "rerun"
+
+
+class _Capture:
+    def __init__(self, app, scope, trigger):
+        self.app = app
+        self.scope = scope
+        self.trigger = trigger
+        self.sampler = Sampler(threading.get_ident())
+
+    def finish(self, page_key=PAGE_KEY):
+        """Stop sampling and write the profile; returns its path"""
+        self.sampler.stop()
+        if st.session_state.get("_profile_capture") is self:
+            del st.session_state["_profile_capture"]
+        page = st.session_state.get(page_key, "main")
+        name = f"{self.app} {page} via {self.trigger} ({self.scope} rerun, {self.sampler.elapsed:.0f} ms)"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        filename = _UNSAFE.sub("_", f"{self.app}-{page}-{self.trigger}-{self.scope}-{stamp}") + ".speedscope.json"
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, filename)
+        with open(path, "w") as output:
+            json.dump(self.sampler.speedscope(name), output)
+        return path
+
+
+class _NullCapture:
+    __slots__ = ()
+
+    def finish(self, page_key=PAGE_KEY):
+        return None
+
+
+_NULL_CAPTURE = _NullCapture()
+
+
+def _arm(state):
+    """Read ?profile=N&token=... into the session; returns the reruns left to capture"""
+    params = st.query_params
+    # Armed at most once per session, even if a stale URL sends the parameters again
+    if PARAM in params and "_profile_remaining" not in state:
+        requested, token = params.get(PARAM, ""), params.get(TOKEN_PARAM, "")
+        if requested.isdigit() and hmac.compare_digest(token.encode(), TOKEN.encode()):
+            state._profile_remaining = min(int(requested), MAX_RERUNS)
+        del params[PARAM]
+        if TOKEN_PARAM in params:
+            del params[TOKEN_PARAM]
+    return state.get("_profile_remaining", 0)
+
+
+def _take(state):
+    remaining = state.get("_profile_remaining", 0)
+    if remaining:
+        state._profile_remaining = remaining - 1
+    return remaining > 0
+
+
+def start_capture(app):
+    """Start profiling this full rerun if the session asked for it; call .finish() at the end"""
+    if TOKEN is None:
+        return _NULL_CAPTURE
+    state = st.session_state
+    dangling = state.pop("_profile_capture", None)
+    if dangling is not None:
+        dangling.finish()  # the last rerun stopped early (st.rerun, an exception)
+    if not (_arm(state) and _take(state)):
+        return _NULL_CAPTURE
+    # Kept in the session so the next run can finish it if this one never reaches finish()
+    capture = state._profile_capture = _Capture(app, "full", _trigger())
+    return capture
+
+
+def profiled_fragment(app, page_key=PAGE_KEY):
+    """Decorator for a function under @st.fragment that profiles the fragment's own reruns"""
+    def decorate(function):
+        if TOKEN is None:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            state = st.session_state
+            if ctx is None or not ctx.fragment_ids_this_run or not _take(state):
+                return function(*args, **kwargs)
+            capture = _Capture(app, "fragment", _trigger())
+            try:
+                return function(*args, **kwargs)
+            finally:
+                capture.finish(page_key)
+        return wrapper
+    return decorate
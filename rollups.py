@@ -0,0 +1,202 @@
+"""Daily and weekly rollups of the event log, behind the history dashboard.
+
+For every user the rollup table holds one row per local calendar day
+and one per week (starting Monday): focus time, focus sessions and how
+many ran to the end, break time, tasks ticked off (minus those unticked)
+and mood readings. It lives in SQLite next to the event files.
+
+The database also records how many of each user's events the rollups
+include. update() folds in only the events logged since then, in one
+transaction, so each event is added exactly once. event_log.log_event()
+calls it after every event, so the rows are current as sessions happen
+and a dashboard read usually finds nothing to fold. A few new events are
+read back and added without NumPy; a longer backlog, e.g. events written
+with EventLog.extend(), is aggregated with it. rebuild() drops a user's
+rows and recomputes them from the whole log. tests/test_rollups.py and
+benchmarks/check_rollups.py check both against a plain recompute.
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from event_log import (BREAK_COMPLETE, BREAK_STOP, EVENT_DIR, FOCUS_COMPLETE, FOCUS_STOP,
+                       MOOD_READING, TASK_DONE, TASK_UNDONE, get_event_log)
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # only needed when new events are folded in
+
+FIELDS = ("focus_seconds", "sessions", "completed", "break_seconds", "tasks_done",
+          "mood_negative", "mood_neutral", "mood_positive")
+PERIODS = {"day": 1, "week": 7}  # period -> days per row
+DAY = 86400
+FEW_EVENTS = 64  # new events up to this many are folded one by one, without NumPy
+EPOCH = date(1970, 1, 1)
+
+
+def local_days(ts):
+    """Local calendar day numbers (days since 1970-01-01) of unix timestamps"""
+    ts = np.asarray(ts, np.float64)
+    # UTC offsets change only on the hour, so each hour's is looked up once
+    hours, inverse = np.unique(np.floor(ts / 3600), return_inverse=True)
+    offsets = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in hours.tolist()], np.float64)
+    return np.floor((ts + offsets[inverse.reshape(-1)]) / DAY).astype(np.int64)
+
+
+def local_day(ts):
+    """local_days() of a single timestamp, without NumPy"""
+    return (date(*time.localtime(ts)[:3]) - EPOCH).days
+
+
+def period_start(days, period):
+    """First day of the period each day falls in; weeks start on Monday"""
+    return days if period == "day" else days - (days + 3) % 7  # 1970-01-01 was a Thursday
+
+
+def _contributions(events):
+    # What each event adds to its row, one column per field
+    kind, mood = events["kind"], events["mood"]
+    elapsed = events["elapsed"].astype(np.float64)
+    focus = (kind == FOCUS_STOP) | (kind == FOCUS_COMPLETE)
+    rest = (kind == BREAK_STOP) | (kind == BREAK_COMPLETE)
+    reading = kind == MOOD_READING
+    return np.column_stack([
+        np.where(focus, elapsed, 0.0), focus, kind == FOCUS_COMPLETE, np.where(rest, elapsed, 0.0),
+        (kind == TASK_DONE).astype(np.int64) - (kind == TASK_UNDONE),
+        reading & (mood == -1), reading & (mood == 0), reading & (mood == 1),
+    ]).astype(np.float64)
+
+
+def _contribution(kind, elapsed, mood):
+    # _contributions() for one event
+    focus = kind in (FOCUS_STOP, FOCUS_COMPLETE)
+    rest = kind in (BREAK_STOP, BREAK_COMPLETE)
+    reading = kind == MOOD_READING
+    return [elapsed if focus else 0.0, float(focus), float(kind == FOCUS_COMPLETE), elapsed if rest else 0.0,
+            float((kind == TASK_DONE) - (kind == TASK_UNDONE)),
+            float(reading and mood == -1), float(reading and mood == 0), float(reading and mood == 1)]
+
+
+def aggregate_records(records):
+    """aggregate() over EventLog.records() tuples, one at a time and without NumPy"""
+    totals = {}
+    for ts, elapsed, _, _, kind, mood in records:
+        day = local_day(ts)
+        added = _contribution(kind, elapsed, mood)
+        for period in PERIODS:
+            row = totals.setdefault((period, period_start(day, period)), [0.0] * len(FIELDS))
+            for index, value in enumerate(added):
+                row[index] += value
+    return totals
+
+
+def aggregate(events):
+    """{(period, first day): [totals in FIELDS order]} over an event_dtype() array"""
+    if not len(events):
+        return {}
+    days = local_days(events["ts"])
+    added = _contributions(events)
+    totals = {}
+    for period in PERIODS:
+        starts, inverse = np.unique(period_start(days, period), return_inverse=True)
+        sums = np.zeros((len(starts), len(FIELDS)))
+        np.add.at(sums, inverse.reshape(-1), added)
+        for start, row in zip(starts.tolist(), sums.tolist()):
+            totals[(period, start)] = row
+    return totals
+
+
+class Rollups:
+    """Per-user daily and weekly totals over one app's event log"""
+
+    def __init__(self, log, path):
+        self.log = log
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{field} {'REAL' if field.endswith('seconds') else 'INTEGER'}" for field in FIELDS)
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS rollups (user TEXT, period TEXT, start INTEGER, {columns},"
+            " PRIMARY KEY (user, period, start)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS applied (user TEXT PRIMARY KEY, events INTEGER)")
+        names = ", ".join(FIELDS)
+        self._upsert = (
+            f"INSERT INTO rollups (user, period, start, {names})"
+            f" VALUES (?, ?, ?, {', '.join('?' for _ in FIELDS)})"
+            f" ON CONFLICT (user, period, start) DO UPDATE SET"
+            f" {', '.join(f'{field} = {field} + excluded.{field}' for field in FIELDS)}"
+        )
+
+    def _fold(self, user, rebuild):
+        with self._lock:
+            db = self._db
+            if not rebuild:
+                row = db.execute("SELECT events FROM applied WHERE user = ?", (user,)).fetchone()
+                if (row[0] if row else 0) == self.log.count(user):
+                    return 0  # nothing new: no write transaction, no read of the log
+            db.execute("BEGIN IMMEDIATE")  # another process may be folding the same user
+            try:
+                row = db.execute("SELECT events FROM applied WHERE user = ?", (user,)).fetchone()
+                applied = row[0] if row else 0
+                count = self.log.count(user)  # events appended after this are left for the next update
+                if rebuild or count < applied:  # the log was replaced: start over
+                    db.execute("DELETE FROM rollups WHERE user = ?", (user,))
+                    applied = 0
+                if count - applied <= FEW_EVENTS:
+                    totals = aggregate_records(self.log.records(user, applied)[:count - applied])
+                else:
+                    totals = aggregate(self.log.read(user)[applied:count])
+                db.executemany(self._upsert, [(user, period, start, *row)
+                                              for (period, start), row in totals.items()])
+                db.execute("INSERT OR REPLACE INTO applied (user, events) VALUES (?, ?)", (user, count))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return count - applied
+
+    def update(self, user):
+        """Add the user's events logged since the last update; returns how many there were"""
+        return self._fold(user, rebuild=False)
+
+    def rebuild(self, user):
+        """Recompute the user's rollups from their whole event log"""
+        return self._fold(user, rebuild=True)
+
+    def rows(self, user, period):
+        """{first day: {field: total}} for every period the user has events in"""
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT start, {', '.join(FIELDS)} FROM rollups WHERE user = ? AND period = ?", (user, period)
+            ).fetchall()
+        return {start: dict(zip(FIELDS, totals)) for start, *totals in found}
+
+    def history(self, user, period="day", count=14, now=None):
+        """The last `count` days or weeks up to `now`, oldest first, with empty ones filled in
+
+        Each entry is a dict of FIELDS plus "start", the period's first
+        date. The user's new events are folded in first.
+        """
+        self.update(user)
+        step = PERIODS[period]
+        last = period_start(local_day(time.time() if now is None else now), period)
+        first = last - (count - 1) * step
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT start, {', '.join(FIELDS)} FROM rollups"
+                " WHERE user = ? AND period = ? AND start BETWEEN ? AND ?", (user, period, first, last)
+            ).fetchall()
+        totals = {start: dict(zip(FIELDS, totals)) for start, *totals in found}
+        return [{"start": EPOCH + timedelta(days=start), **totals.get(start, dict.fromkeys(FIELDS, 0))}
+                for start in range(first, last + 1, step)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_rollups(app):
+    """Process-wide rollups over an app's event log"""
+    return Rollups(get_event_log(app), os.path.join(EVENT_DIR, app, "rollups.sqlite3"))
@@ -0,0 +1,224 @@
+"""CPU sentiment model behind analyze_mood.
+
+A small linear (softmax) classifier over hashed unigram and bigram
+features, trained from data/mood_corpus.tsv and shipped as
+data/sentiment_model.npz. Retrain after editing the corpus with:
+
+    python sentiment.py train
+
+The model loads once per process on a background thread. That thread
+also batches texts arriving from concurrent sessions into one NumPy call.
+Recent text -> mood results are kept in an LRU cache. If the model is
+missing, still loading or slower than LATENCY_BUDGET, analyze_mood falls
+back to the keyword scorer in mood.py.
+"""
+import functools
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+import mood
+from lazy_imports import lazy_import
+
+# Deferred until the batcher thread loads the model; None if NumPy is not
+# installed, in which case keyword scoring is used
+np = lazy_import("numpy")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS_PATH = os.path.join(DATA_DIR, "mood_corpus.tsv")
+MODEL_PATH = os.path.join(DATA_DIR, "sentiment_model.npz")
+
+LABELS = ("negative", "neutral", "positive")
+N_BUCKETS = 2 ** 12
+N_FEATURES = N_BUCKETS + 2  # hashed n-grams, then the lexicon's positive and negative weight
+LATENCY_BUDGET = 0.05  # seconds to wait for the model before using keywords
+MAX_BATCH = 64
+MAX_WAIT = 0.002  # seconds the batcher waits for more texts to join a batch
+CACHE_SIZE = 4096
+
+
+def features(text):
+    """Sparse features for a text as (hashed n-gram bucket ids, lexicon weights)"""
+    tokens = mood.tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    # crc32 rather than hash(), which is salted differently in every process
+    buckets = [zlib.crc32(gram.encode()) % N_BUCKETS for gram in grams]
+    lexicon = mood.score_tokens(tokens)
+    return buckets, (lexicon.positive, lexicon.negative)
+
+
+def _feature_matrix(texts):
+    matrix = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    for row, text in enumerate(texts):
+        buckets, lexicon = features(text)
+        np.add.at(matrix[row], buckets, 1.0)
+        matrix[row, N_BUCKETS:] = lexicon
+    return matrix
+
+
+class SentimentModel:
+    """Weights and bias of the hashed-feature softmax classifier"""
+
+    def __init__(self, weights, bias):
+        self.weights = weights  # (N_FEATURES, len(LABELS))
+        self.bias = bias        # (len(LABELS),)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"])
+
+    def save(self, path=MODEL_PATH):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias)
+
+    def predict_many(self, texts):
+        """Mood labels for a batch of texts in one vectorized pass"""
+        rows, cols, lexicon = [], [], []
+        for row, text in enumerate(texts):
+            buckets, weights = features(text)
+            rows.extend([row] * len(buckets))
+            cols.extend(buckets)
+            lexicon.append(weights)
+        scores = np.asarray(lexicon, dtype=np.float32) @ self.weights[N_BUCKETS:] + self.bias
+        np.add.at(scores, rows, self.weights[cols])
+        return [LABELS[i] for i in scores.argmax(axis=1)]
+
+
+def train(texts, labels, epochs=400, learning_rate=0.5, l2=1e-3):
+    """Fit a SentimentModel with full-batch gradient descent"""
+    x = _feature_matrix(texts)
+    y = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+    y[np.arange(len(texts)), [LABELS.index(label) for label in labels]] = 1.0
+
+    weights = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+    bias = np.zeros(len(LABELS), dtype=np.float32)
+    for _ in range(epochs):
+        logits = x @ weights + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        error = (probs - y) / len(texts)
+        weights -= learning_rate * (x.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+    return SentimentModel(weights, bias)
+
+
+def load_corpus(path=CORPUS_PATH):
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as corpus:
+        next(corpus)  # header
+        for line in corpus:
+            label, text = line.rstrip("\n").split("\t", 1)
+            texts.append(text)
+            labels.append(label)
+    return texts, labels
+
+
+class MoodBatcher:
+    """Scores texts from concurrent sessions together on one worker thread"""
+
+    def __init__(self, loader=SentimentModel.load):
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(loader,), daemon=True,
+                                        name="mood-batcher")
+        self._thread.start()
+
+    def submit(self, text):
+        """Queue a text and return a Future for its mood label"""
+        future = Future()
+        if self._error is not None:
+            future.set_exception(self._error)
+        else:
+            self._queue.put((text, future))
+        return future
+
+    def _run(self, loader):
+        try:
+            model = loader()
+        except Exception as exc:
+            self._error = exc
+            while not self._queue.empty():
+                self._queue.get_nowait()[1].set_exception(exc)
+            return
+
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + MAX_WAIT
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                moods = model.predict_many([text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future), label in zip(batch, moods):
+                    future.set_result(label)
+
+
+@functools.lru_cache(maxsize=None)
+def get_batcher():
+    """Process-wide batcher, so the model is loaded once and not per session"""
+    return MoodBatcher()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _model_mood(text):
+    # A timeout raises, and exceptions are never cached, so only model answers land in the LRU
+    return get_batcher().submit(text).result(timeout=LATENCY_BUDGET)
+
+
+def analyze_mood(text):
+    """Return "positive", "negative" or "neutral", using the model when it answers in time"""
+    if np is None or not os.path.exists(MODEL_PATH):
+        return mood.analyze_mood(text)
+    try:
+        return _model_mood(text)
+    except Exception:  # timed out, still loading, or the model failed
+        return mood.analyze_mood(text)
+
+
+def analyze_moods(texts):
+    """analyze_mood for many texts at once: queued together, so the model scores them in batches"""
+    if np is None or not os.path.exists(MODEL_PATH):
+        return [mood.analyze_mood(text) for text in texts]
+    batcher = get_batcher()
+    futures = [batcher.submit(text) for text in texts]
+    # One budget per batch the texts fill, all counted from the same start
+    deadline = time.monotonic() + LATENCY_BUDGET * -(-len(texts) // MAX_BATCH)
+    moods = []
+    for text, future in zip(texts, futures):
+        try:
+            moods.append(future.result(timeout=max(0, deadline - time.monotonic())))
+        except Exception:  # timed out, still loading, or the model failed
+            moods.append(mood.analyze_mood(text))
+    return moods
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["train"]:
+        sys.exit("usage: python sentiment.py train")
+
+    texts, labels = load_corpus()
+    # 5-fold cross-validated accuracy, next to the keyword scorer for reference
+    correct = 0
+    for fold in range(5):
+        held_out = set(range(fold, len(texts), 5))
+        model = train([t for i, t in enumerate(texts) if i not in held_out],
+                      [label for i, label in enumerate(labels) if i not in held_out])
+        predicted = model.predict_many([texts[i] for i in sorted(held_out)])
+        correct += sum(p == labels[i] for p, i in zip(predicted, sorted(held_out)))
+    keyword = sum(mood.analyze_mood(t) == label for t, label in zip(texts, labels))
+    print(f"cross-validated accuracy: {correct}/{len(texts)} (keywords: {keyword}/{len(texts)})")
+
+    train(texts, labels).save()
+    print(f"saved {MODEL_PATH}")
@@ -0,0 +1,48 @@
+"""ASGI entry point that adds long-lived caching to the content-hashed static files.
+
+Streamlit's own static route sends no Cache-Control, so browsers keep
+asking for the stylesheet again. Hashed names (see stylesheets.py and
+sounds.py) never change content, so they can be cached for a year; fonts
+get a day. Partial responses to range requests for the sound clips are
+cached the same way.
+
+    streamlit run serve.py                            # app.py
+    NEURONUDGE_SCRIPT=neruonudge.py streamlit run serve.py
+    uvicorn serve:app --port 8501                     # any ASGI server
+"""
+import os
+import re
+
+import streamlit as st
+from starlette.middleware import Middleware
+
+SCRIPT = os.environ.get("NEURONUDGE_SCRIPT", "app.py")
+IMMUTABLE = "public, max-age=31536000, immutable"
+FONTS = "public, max-age=86400"
+_HASHED = re.compile(r"/app/static/(sounds/)?[\w-]+\.[0-9a-f]{12}\.(css|wav)$")
+
+
+class StaticCacheMiddleware:
+    """Sets Cache-Control on successful responses for hashed stylesheets and fonts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        policy = IMMUTABLE if _HASHED.search(path) else FONTS if "/app/static/fonts/" in path else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache(message):
+            if message["type"] == "http.response.start" and message["status"] in (200, 206):
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+                message = dict(message, headers=headers + [(b"cache-control", policy.encode())])
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache)
+
+
+app = st.App(os.path.join(os.path.dirname(os.path.abspath(__file__)), SCRIPT),
+             middleware=[Middleware(StaticCacheMiddleware)])
@@ -0,0 +1,434 @@
+"""Persistent session state, so a refresh or worker restart keeps progress.
+
+Each browser session gets an ID in the page URL (`?sid=...`), which
+survives a refresh and can be bookmarked. Chosen session_state fields
+are stored per ID in SQLite (WAL mode), one row per field.
+
+At the end of every run the fields are compared with what was last
+saved, and only the ones that changed are queued. A background thread
+writes the queue in one transaction every FLUSH_INTERVAL seconds, so a
+timer that reruns every second costs one small write per interval, not
+a commit per rerun. Pending writes are flushed at exit.
+
+Because everything worth keeping is on disk, a live session's copy can
+be dropped from memory: SessionBudget offloads sessions that have been
+idle for IDLE_TIMEOUT, or whose saved fields outgrow SESSION_BUDGET
+bytes, and their next run restores them from the store. Widget
+callbacks run before that, and a fragment's own rerun skips it, so
+callbacks that read saved fields call restore_offloaded() first and
+fragments are wrapped in @restored_fragment.
+
+Another thread can change a session with update_session(), e.g. when
+the timer scheduler ends a focus session. A live session's state is
+only ever changed by its own runs, so for an open page the change is
+queued and the page asked to rerun; the run applies it before anything
+else. An offloaded session, or one whose page is closed, has the change
+applied to its saved copy in the store instead.
+
+Reaching another session's page, and the state object the budget
+offloads, takes Streamlit internals, so requirements.txt pins the
+Streamlit minor version they were written against. Should one of them
+be missing, a warning is logged once and the feature degrades: a page
+sees another thread's change on its next run, or sessions stay in
+memory.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+import streamlit as st
+from streamlit import runtime
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from tasks import Task
+
+STATE_DIR = os.environ.get(
+    "NEURONUDGE_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state")
+)
+FLUSH_INTERVAL = 1.0  # seconds between batched writes
+SESSION_TTL = 90 * 24 * 3600  # sessions untouched this long are dropped on startup
+QUERY_PARAM = "sid"
+_SID = re.compile(r"[0-9a-f]{32}")  # uuid4().hex
+
+_log = logging.getLogger(__name__)
+
+_queued = {}  # store key -> change from update_session() for the session's next run, or _RELOAD
+_queued_lock = threading.Lock()
+_RELOAD = object()  # queued when the change went to the store copy of a session still in memory
+# Serialized bytes of saved fields one session may keep in memory
+SESSION_BUDGET = int(os.environ.get("NEURONUDGE_SESSION_BUDGET", 64 * 1024))
+IDLE_TIMEOUT = float(os.environ.get("NEURONUDGE_IDLE_TIMEOUT", 15 * 60))  # seconds
+OVER_BUDGET_GRACE = 30.0  # seconds an over-budget session may idle before it is offloaded
+SWEEP_INTERVAL = float(os.environ.get("NEURONUDGE_SWEEP_INTERVAL", 30))  # seconds between budget checks
+
+
+def _encode(value):
+    if isinstance(value, Task):
+        return {"__task__": [value.id, value.text, value.completed]}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if "__task__" in obj:
+        return Task(*obj["__task__"])
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def dumps(value):
+    return json.dumps(value, default=_encode, sort_keys=True)
+
+
+def loads(text):
+    return json.loads(text, object_hook=_decode)
+
+
+class SessionStore:
+    """Field-level key-value store for session state with coalesced writes"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, ttl=SESSION_TTL):
+        self.flush_interval = flush_interval
+        self._pending = {}  # (session_id, field) -> JSON text, newest wins
+        self._lock = threading.Lock()
+        self._counters = {"queued": 0, "written": 0, "flushes": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last flush is at risk
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            " session_id TEXT, field TEXT, value TEXT, updated_at REAL,"
+            " PRIMARY KEY (session_id, field))"
+        )
+        self._db.execute("DELETE FROM session_state WHERE updated_at < ?", (time.time() - ttl,))
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="session-store")
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def load(self, session_id):
+        """Saved fields for a session, including writes still waiting to be flushed"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT field, value FROM session_state WHERE session_id = ?", (session_id,)
+            ).fetchall()
+            saved = dict(rows)
+            saved.update({field: value for (sid, field), value in self._pending.items() if sid == session_id})
+        return {field: loads(value) for field, value in saved.items()}
+
+    def save(self, session_id, fields):
+        """Queue `{field: JSON text}` for the next flush"""
+        if not fields:
+            return
+        with self._lock:
+            for field, value in fields.items():
+                self._pending[(session_id, field)] = value
+            self._counters["queued"] += len(fields)
+
+    def flush(self):
+        """Write every queued field in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            now = time.time()
+            try:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT INTO session_state VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (session_id, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    [(sid, field, value, now) for (sid, field), value in pending.items()],
+                )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                self._pending = {**pending, **self._pending}
+                raise
+            self._counters["written"] += len(pending)
+            self._counters["flushes"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, pending=len(self._pending))
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # e.g. the database is busy; the queue is kept for the next try
+
+
+class _Tracked:
+    __slots__ = ("state", "fields", "last_seen", "size")
+
+    def __init__(self, state, fields):
+        self.state = state
+        self.fields = fields
+        self.last_seen = time.monotonic()
+        self.size = 0
+
+
+class SessionBudget:
+    """Drops idle or oversized sessions' saved fields from memory; the store keeps them"""
+
+    def __init__(self, store, budget=SESSION_BUDGET, idle_timeout=IDLE_TIMEOUT,
+                 grace=OVER_BUDGET_GRACE, sweep_interval=SWEEP_INTERVAL):
+        self.store = store
+        self.budget = budget
+        self.idle_timeout = idle_timeout
+        self.grace = grace
+        self._sessions = {}  # session key -> _Tracked
+        self._lock = threading.Lock()
+        self._offloaded = 0
+        if sweep_interval:
+            threading.Thread(target=self._sweep_loop, args=(sweep_interval,), daemon=True,
+                             name="session-budget").start()
+
+    def touch(self, key, state, fields, size=None):
+        """Record activity for a session, and its saved size when known"""
+        with self._lock:
+            tracked = self._sessions.get(key)
+            if tracked is None or tracked.state is not state:
+                tracked = self._sessions[key] = _Tracked(state, fields)
+            tracked.last_seen = time.monotonic()
+            if size is not None:
+                tracked.size = size
+
+    def sweep(self):
+        """Offload every session past its idle timeout or over budget; returns how many"""
+        now = time.monotonic()
+        victims = []
+        with self._lock:
+            # A closed browser session looks idle too, so it is let go at the idle timeout
+            for key, tracked in list(self._sessions.items()):
+                idle = now - tracked.last_seen
+                if idle >= self.idle_timeout or (tracked.size > self.budget and idle >= self.grace):
+                    victims.append((tracked.state, tracked.fields))
+                    del self._sessions[key]
+        if not victims:
+            return 0
+        self.store.flush()  # everything dropped below must be on disk first
+        # _persisted_key and _persisted_fields stay, so a callback can restore the session
+        for state, fields in victims:
+            for field in (*fields, "_persisted"):
+                if field in state:
+                    del state[field]
+        with self._lock:
+            self._offloaded += len(victims)
+        return len(victims)
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "offloaded": self._offloaded,
+                    "bytes": sum(tracked.size for tracked in self._sessions.values())}
+
+    def _sweep_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.sweep()
+            except sqlite3.Error:
+                pass  # nothing was dropped; try again on the next sweep
+
+
+@functools.lru_cache(maxsize=None)
+def get_store(path=None):
+    """Process-wide store shared by every session"""
+    return SessionStore(path or os.path.join(STATE_DIR, "sessions.sqlite3"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_budget():
+    """Process-wide memory budget over every live session"""
+    return SessionBudget(get_store())
+
+
+@functools.lru_cache(maxsize=None)
+def _unsupported(feature):
+    # Once per feature: this Streamlit lacks an internal that `feature` uses
+    _log.warning("Streamlit %s does not have the internals for %s; continuing without it",
+                 st.__version__, feature)
+
+
+def _session_handle():
+    # Private API: the per-session state object behind st.session_state, so
+    # the budget thread can offload an idle session. The wrapper in
+    # ctx.session_state belongs to one script runner; the state it wraps
+    # lasts as long as the browser session. None outside a Streamlit run.
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    try:
+        return ctx.session_state._state
+    except AttributeError:
+        _unsupported("offloading idle sessions and updating them from other threads")
+        return None
+
+
+def session_id():
+    """This browser session's ID, taken from the URL or created and added to it.
+
+    The ID names event files and keys stored rows, so only the form this
+    function mints is accepted; anything else in the URL is replaced.
+    """
+    sid = st.query_params.get(QUERY_PARAM)
+    if not sid or not _SID.fullmatch(sid):
+        sid = uuid.uuid4().hex
+        st.query_params[QUERY_PARAM] = sid
+    return sid
+
+
+def _load(key, fields):
+    saved = {field: value for field, value in get_store().load(key).items() if field in fields}
+    st.session_state.update(saved)
+    st.session_state._persisted = {field: dumps(value) for field, value in saved.items()}
+    st.session_state._persisted_key = key
+    st.session_state._persisted_fields = tuple(fields)
+
+
+def restore_session(app, fields):
+    """Load saved `fields` into st.session_state when the session starts or was offloaded, then apply_queued()"""
+    if "_persisted" in st.session_state:
+        handle = _session_handle()
+        if handle is not None:
+            get_budget().touch(st.session_state._persisted_key, handle, fields)
+    else:
+        _load(f"{app}:{session_id()}", fields)
+    apply_queued()
+
+
+def restore_offloaded():
+    """restore_session() for widget callbacks, which run before it: reload an offloaded session and apply_queued()"""
+    if "_persisted_key" not in st.session_state:
+        return
+    if "_persisted" not in st.session_state:
+        _load(st.session_state._persisted_key, st.session_state._persisted_fields)
+    apply_queued()
+
+
+def restored_fragment(function):
+    """Decorator for a function under @st.fragment: restore_offloaded() before the fragment's own reruns"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        ctx = get_script_run_ctx()
+        if ctx is not None and ctx.fragment_ids_this_run:
+            restore_offloaded()  # a full rerun has already been through restore_session()
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def apply_queued():
+    """Apply the change update_session() queued for this run's session, if any"""
+    if "_persisted_key" not in st.session_state:
+        return
+    with _queued_lock:
+        change = _queued.pop(st.session_state._persisted_key, None)
+    if change is _RELOAD:
+        _load(st.session_state._persisted_key, st.session_state._persisted_fields)
+    elif change is not None:
+        change(st.session_state)
+
+
+def _changed(state, persisted, fields):
+    # The fields whose JSON differs from `persisted`, which is brought up to date
+    changed = {}
+    for field in fields:
+        if field in state:
+            value = dumps(state[field])
+            if persisted.get(field) != value:
+                changed[field] = persisted[field] = value
+    return changed
+
+
+def save_session(fields):
+    """Queue the `fields` that changed since the last save; call at the end of a run"""
+    if "_persisted" not in st.session_state:
+        return
+    persisted = st.session_state._persisted
+    get_store().save(st.session_state._persisted_key, _changed(st.session_state, persisted, fields))
+    handle = _session_handle()
+    if handle is not None:
+        get_budget().touch(st.session_state._persisted_key, handle, fields,
+                           sum(len(value) for value in persisted.values()))
+
+
+class SessionRef(NamedTuple):
+    """A session as seen from outside its runs; see update_session()"""
+    key: str  # store key, "app:sid"
+    user: str  # the sid
+    state: object  # the session state behind st.session_state
+    runtime_id: str  # Streamlit's id for the browser connection
+    query_string: str  # the page URL's query, which a rerun needs to keep ?sid=
+
+
+def session_ref():
+    """This run's session, for update_session(); None outside a Streamlit run or before restore_session()"""
+    handle = _session_handle()
+    if handle is None or "_persisted_key" not in st.session_state:
+        return None
+    ctx = get_script_run_ctx()
+    return SessionRef(st.session_state._persisted_key, session_id(), handle, ctx.session_id, ctx.query_string)
+
+
+def update_session(ref, fields, change):
+    """Have change(state) applied to a session from another thread.
+
+    If the session is live and its page open, the change is queued and the
+    page rerun; the run calls it with st.session_state (see apply_queued).
+    Otherwise `state` is a dict of the saved fields, and the `fields` the
+    change makes to it are saved now. A page closed while the session is
+    still in memory reloads them should it reconnect.
+    """
+    if "_persisted" in ref.state:
+        with _queued_lock:
+            _queued[ref.key] = change
+        if _request_rerun(ref):
+            return
+        with _queued_lock:
+            if _queued.get(ref.key) is not change:
+                return  # a last run took it after all
+            _queued[ref.key] = _RELOAD
+    state = get_store().load(ref.key)
+    change(state)
+    get_store().save(ref.key, _changed(state, {}, fields))
+
+
+def _request_rerun(ref):
+    # Private API: the AppSession behind a browser connection. A ClientState
+    # without widget states reruns with the values the widgets already hold,
+    # like st.rerun(); the query string keeps the page's ?sid=. False if
+    # the page was closed or cannot be reached.
+    if not runtime.exists():
+        return False
+    instance = runtime.get_instance()
+    try:
+        info = instance._session_mgr.get_active_session_info(ref.runtime_id)
+        if info is None:
+            return False
+        client_state = ClientState(query_string=ref.query_string)
+        instance._get_async_objs().eventloop.call_soon_threadsafe(info.session.request_rerun, client_state)
+    except AttributeError:
+        _unsupported("rerunning a page from another thread")
+        return False
+    return True
@@ -0,0 +1,161 @@
+"""Buffered capture of "Get NeuroNudge" signups.
+
+Submitting the form only puts the signup on a bounded in-process queue,
+so the rerun never waits on the database. A background writer takes
+whatever has queued, up to BATCH_SIZE at a time. It keeps the newest
+signup per normalized email and writes the batch in one SQLite
+transaction. Someone who signs up again updates their row and bumps its
+submission count rather than adding a second one.
+
+A full queue is the backpressure signal: submit() returns False at once,
+the form asks the person to try again, and stats() counts the rejection.
+On shutdown new signups are refused and the writer drains what is
+already queued before the process exits.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+from session_store import STATE_DIR
+
+QUEUE_SIZE = int(os.environ.get("NEURONUDGE_SIGNUP_QUEUE", 1000))  # signups waiting to be written
+BATCH_SIZE = 200  # signups written per transaction
+BATCH_WAIT = 0.05  # seconds the writer waits for a batch to fill after its first signup
+DRAIN_TIMEOUT = 10.0  # seconds shutdown waits for the queue to be written
+
+
+class Signup(NamedTuple):
+    name: str
+    email: str
+    focus_areas: tuple
+    adhd_type: str
+    submitted_at: float
+
+
+def normalize_email(email):
+    """The form of an address used to spot repeat signups: trimmed and lowercased"""
+    return email.strip().lower()
+
+
+class SignupQueue:
+    """Bounded signup queue with a batching, deduplicating SQLite writer"""
+
+    def __init__(self, path, maxsize=QUEUE_SIZE, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize)
+        self._counters = {"accepted": 0, "rejected": 0, "written": 0, "duplicates": 0, "batches": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signups ("
+            " email TEXT PRIMARY KEY, name TEXT, focus_areas TEXT, adhd_type TEXT,"
+            " first_at REAL, last_at REAL, submissions INTEGER)"
+        )
+
+        self._closing = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True, name="signup-writer")
+        self._writer.start()
+        atexit.register(self.close)
+
+    def submit(self, signup):
+        """Queue a signup; False if the queue is full or shutting down"""
+        signup = signup._replace(email=normalize_email(signup.email))
+        with self._lock:
+            # Under the lock, so nothing is queued once close() has made the queue final
+            accepted = not self._closing.is_set()
+            if accepted:
+                try:
+                    self._queue.put_nowait(signup)
+                except queue.Full:
+                    accepted = False
+            self._counters["accepted" if accepted else "rejected"] += 1
+        return accepted
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                # Once shutting down, take what is there without waiting for more
+                wait = 0 if self._closing.is_set() else max(0, deadline - time.monotonic())
+                batch.append(self._queue.get(timeout=wait) if wait else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        latest, first, submissions = {}, {}, {}
+        for signup in batch:  # oldest first, so the newest details win
+            latest[signup.email] = signup
+            first.setdefault(signup.email, signup.submitted_at)
+            submissions[signup.email] = submissions.get(signup.email, 0) + 1
+        emails = list(latest)
+        try:
+            self._db.execute("BEGIN")
+            known = self._db.execute(
+                f"SELECT COUNT(*) FROM signups WHERE email IN ({', '.join('?' for _ in emails)})", emails
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO signups VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (email) DO UPDATE SET name = excluded.name, focus_areas = excluded.focus_areas,"
+                " adhd_type = excluded.adhd_type, last_at = excluded.last_at,"
+                " submissions = submissions + excluded.submissions",
+                [(email, signup.name.strip(), json.dumps(list(signup.focus_areas)), signup.adhd_type,
+                  first[email], signup.submitted_at, submissions[email]) for email, signup in latest.items()],
+            )
+            self._db.execute("COMMIT")
+        except sqlite3.Error:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._counters["written"] += len(batch)
+            self._counters["duplicates"] += len(batch) - (len(emails) - known)
+            self._counters["batches"] += 1
+
+    def _write_loop(self):
+        while not (self._closing.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            while batch:
+                try:
+                    self._write(batch)
+                    batch = None
+                except sqlite3.Error:
+                    time.sleep(0.5)  # e.g. the database is busy; the same batch is tried again
+
+    def close(self, timeout=DRAIN_TIMEOUT):
+        """Refuse new signups and wait for the queued ones to be written"""
+        with self._lock:
+            self._closing.set()
+        self._writer.join(timeout)
+
+    def count(self):
+        """Distinct signups written so far"""
+        # The writer's connection belongs to its thread; sqlite3's own `with` only ends a transaction
+        with contextlib.closing(sqlite3.connect(self.path)) as db:
+            return db.execute("SELECT COUNT(*) FROM signups").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, queued=self._queue.qsize())
+
+
+@functools.lru_cache(maxsize=None)
+def get_signup_queue(path=None):
+    """Process-wide signup queue shared by every session"""
+    return SignupQueue(path or os.path.join(STATE_DIR, "signups.sqlite3"))
@@ -0,0 +1,147 @@
+"""Calming background sounds, synthesized with NumPy and served as static files.
+
+Each sound is built from a recipe of noise shaped in the frequency
+domain, plus short events such as rain drops, bird chirps and cup clinks
+scattered at random times. Both wrap around the end of the clip, and
+slow swells complete a whole number of cycles, so every clip loops
+without a seam or a click.
+
+A clip is synthesized the first time a process asks for it and written
+to static/sounds/<sound>.<hash>.wav, so other workers and restarts find
+it on disk. The hash covers the recipe version and clip format, so a
+changed recipe gets a new file name. st.audio() plays the clip from
+Streamlit's static route, which answers HTTP range requests. The browser
+therefore streams the clip instead of downloading it before it starts.
+"""
+import functools
+import glob
+import hashlib
+import os
+import wave
+
+from lazy_imports import lazy_import
+from stylesheets import STATIC_DIR
+
+np = lazy_import("numpy")  # only needed the first time a clip is synthesized
+
+SOUNDS = ("Rain", "Forest", "Cafe", "White Noise")
+SAMPLE_RATE = 22050  # Hz, mono 16-bit
+CLIP_SECONDS = 20.0
+PEAK = 0.4  # of full scale; these play quietly in the background
+RECIPE_VERSION = 1  # bump when a recipe changes, so cached clips are synthesized again
+SOUNDS_DIR = os.path.join(STATIC_DIR, "sounds")
+SOUNDS_URL = "app/static/sounds"  # relative, like stylesheets.STATIC_URL
+
+
+def _shaped_noise(rng, n, rate, gain):
+    # Noise with spectrum gain(freqs), made in the frequency domain so it is periodic in n; unit RMS
+    freqs = np.fft.rfftfreq(n, 1 / rate)
+    spectrum = (rng.standard_normal(freqs.size) + 1j * rng.standard_normal(freqs.size)) * gain(freqs)
+    spectrum[0] = 0
+    noise = np.fft.irfft(spectrum, n)
+    return noise / noise.std()
+
+
+def _scatter(rng, n, rate, kernels, per_second, gains):
+    # Copies of each kernel at random times with random gains, added in one bincount per
+    # kernel; a tail running past the end of the clip wraps to its start
+    events = np.zeros(n)
+    for kernel in kernels:
+        count = rng.poisson(per_second * n / rate)
+        index = (rng.integers(0, n, count)[:, None] + np.arange(kernel.size)) % n
+        weights = rng.uniform(*gains, count)[:, None] * kernel
+        events += np.bincount(index.ravel(), weights.ravel(), minlength=n)
+    return events
+
+
+def _swell(n, cycles, depth):
+    # A slow rise and fall that completes a whole number of cycles per clip
+    return 1 - depth * 0.5 * (1 - np.cos(2 * np.pi * cycles * np.arange(n) / n))
+
+
+def _ping(rate, freq, decay, seconds):
+    t = np.arange(int(seconds * rate)) / rate
+    return np.sin(2 * np.pi * freq * t) * np.exp(-t / decay)
+
+
+def _chirp(rate, start, end, seconds):
+    t = np.arange(int(seconds * rate)) / rate
+    phase = 2 * np.pi * (start * t + (end - start) * t ** 2 / (2 * seconds))
+    return np.sin(phase) * np.sin(np.pi * t / seconds) ** 2
+
+
+def _rain(rng, n, rate):
+    hiss = _shaped_noise(rng, n, rate, lambda f: f / (f + 800) / (1 + (f / 6000) ** 2))
+    rumble = _shaped_noise(rng, n, rate, lambda f: 1 / (1 + (f / 150) ** 2))
+    drops = _scatter(rng, n, rate, [_ping(rate, freq, 0.006, 0.04) for freq in (1800, 2600, 3400)],
+                     15, (0.3, 1.5))
+    return 0.6 * hiss * _swell(n, 3, 0.3) + 0.4 * rumble + drops
+
+
+def _forest(rng, n, rate):
+    wind = _shaped_noise(rng, n, rate, lambda f: 1 / (1 + (f / 400) ** 2)) * _swell(n, 2, 0.7)
+    leaves = _shaped_noise(rng, n, rate, lambda f: np.exp(-((f - 3000) / 1200) ** 2)) * _swell(n, 5, 0.8)
+    birds = _scatter(rng, n, rate, [_chirp(rate, start, end, seconds) for start, end, seconds
+                                    in ((2800, 4200, 0.12), (4500, 3300, 0.09), (3600, 3900, 0.2))],
+                     0.4, (1.0, 3.0))
+    return 0.5 * wind + 0.15 * leaves + birds
+
+
+def _cafe(rng, n, rate):
+    murmur = _shaped_noise(rng, n, rate, lambda f: f / (f + 200) / (1 + (f / 2500) ** 2))
+    # Voices rise and fall a few times a second
+    syllables = 1 + 0.5 * _shaped_noise(rng, n, rate, lambda f: 1 / (1 + (f / 3) ** 4))
+    clinks = _scatter(rng, n, rate, [_ping(rate, 3200, 0.05, 0.3) + 0.6 * _ping(rate, 4700, 0.03, 0.3)],
+                      0.5, (0.5, 2.0))
+    return 0.6 * murmur * syllables + clinks
+
+
+def _white_noise(rng, n, rate):
+    return rng.standard_normal(n)
+
+
+RECIPES = {"Rain": _rain, "Forest": _forest, "Cafe": _cafe, "White Noise": _white_noise}
+
+
+def synthesize(name, seconds=CLIP_SECONDS, rate=SAMPLE_RATE):
+    """One loop of sound `name` as 16-bit samples"""
+    n = int(seconds * rate)
+    rng = np.random.default_rng(sorted(RECIPES).index(name))  # the same clip in every process
+    samples = RECIPES[name](rng, n, rate)
+    samples *= PEAK * 32767 / np.abs(samples).max()
+    return samples.astype("<i2")
+
+
+def write_wav(path, samples, rate=SAMPLE_RATE):
+    """Write mono 16-bit samples to `path`; a half-written file is never left under that name"""
+    partial = f"{path}.{os.getpid()}.tmp"
+    with wave.open(partial, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(samples.tobytes())
+    os.replace(partial, path)
+
+
+def clip_filename(name):
+    """static/sounds/ file name for a sound; the hash changes with the recipe or format"""
+    key = f"{name}:{RECIPE_VERSION}:{SAMPLE_RATE}:{CLIP_SECONDS}".encode()
+    return f"{name.lower().replace(' ', '-')}.{hashlib.sha256(key).hexdigest()[:12]}.wav"
+
+
+@functools.lru_cache(maxsize=None)
+def sound_url(name):
+    """URL of the loop for one of SOUNDS, synthesized on first use; None without NumPy"""
+    if np is None:
+        return None
+    filename = clip_filename(name)
+    target = os.path.join(SOUNDS_DIR, filename)
+    if not os.path.exists(target):
+        os.makedirs(SOUNDS_DIR, exist_ok=True)
+        stem = filename.split(".", 1)[0]
+        for stale in glob.glob(os.path.join(SOUNDS_DIR, f"{stem}.*.wav")):
+            os.remove(stale)
+        write_wav(target, synthesize(name))
+    # st.audio only passes a string through as a URL when it starts with /app/static/,
+    # and its frontend resolves that under server.baseUrlPath; anything else it opens as a file
+    return f"/{SOUNDS_URL}/{filename}"
@@ -0,0 +1,49 @@
+"""Theme stylesheets served as static files instead of inline <style> blocks.
+
+The themes live in styles/. On first use each one is copied to
+static/<name>.<content hash>.css, which Streamlit serves at
+app/static/ (server.enableStaticServing in .streamlit/config.toml).
+A rerun then only sends a <link> to that file, and the browser fetches
+the stylesheet once. A changed theme gets a new file name, so cached
+copies never go stale. Older copies are left in place, as another
+server process may still be serving them; they are only a few KB, and
+static/*.css can be cleared while no server is running.
+
+Fonts are bundled under static/fonts/ (see static/fonts/README.md), so
+rendering never waits on a third-party font server.
+"""
+import functools
+import hashlib
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STYLES_DIR = os.path.join(ROOT, "styles")
+STATIC_DIR = os.path.join(ROOT, "static")
+STATIC_URL = "app/static"
+
+
+@functools.lru_cache(maxsize=None)
+def _publish(name, mtime_ns):
+    # Keyed on the source mtime, so an edited theme is republished without a restart
+    with open(os.path.join(STYLES_DIR, f"{name}.css"), "rb") as source:
+        css = source.read()
+    digest = hashlib.sha256(css).hexdigest()[:12]
+    filename = f"{name}.{digest}.css"
+    target = os.path.join(STATIC_DIR, filename)
+    if not os.path.exists(target):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        partial = f"{target}.{os.getpid()}.tmp"
+        with open(partial, "wb") as output:
+            output.write(css)
+        os.replace(partial, target)  # never serve a half-written file
+    return f"{STATIC_URL}/{filename}"
+
+
+def stylesheet_url(name):
+    """URL of the content-hashed copy of styles/<name>.css"""
+    return _publish(name, os.stat(os.path.join(STYLES_DIR, f"{name}.css")).st_mtime_ns)
+
+
+def stylesheet_link(name):
+    """<link> tag for a theme, for st.markdown(..., unsafe_allow_html=True)"""
+    return f'<link rel="stylesheet" href="{stylesheet_url(name)}">'
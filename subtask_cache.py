@@ -0,0 +1,185 @@
+"""Two-tier cache for task breakdowns.
+
+Subtask generation will be a slow, paid LLM round trip, so answers are
+kept in an in-memory LRU backed by a SQLite file that survives restarts.
+Keys are the normalized task text (case, whitespace and punctuation
+folded) plus the prompt and model version, so editing either one
+invalidates old answers. Entries expire after a TTL, and the least
+recently used entries are evicted once a tier is full.
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import string
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.environ.get(
+    "NEURONUDGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+MEMORY_ENTRIES = 512
+DISK_ENTRIES = 20000
+
+_PUNCTUATION = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+
+def normalize_task(task):
+    """Fold case, punctuation and whitespace: " Write  an essay!" -> "write an essay" """
+    return " ".join(task.casefold().translate(_PUNCTUATION).split())
+
+
+def cache_key(task, prompt, model):
+    """Hash of the model, the prompt and the normalized task
+
+    prompt is one template or a tuple of them, such as (system prompt, user prompt),
+    so a change to any part of what is sent gives a new key.
+    """
+    prompts = (prompt,) if isinstance(prompt, str) else tuple(prompt)
+    raw = "\0".join((model, *prompts, normalize_task(task)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SubtaskCache:
+    """In-memory LRU in front of a size-bounded SQLite store"""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()  # key -> (expires_at, subtasks)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                          "hit_seconds": 0.0, "miss_seconds": 0.0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS subtasks ("
+            " key TEXT PRIMARY KEY, task TEXT, subtasks TEXT,"
+            " expires_at REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS subtasks_last_used ON subtasks (last_used)")
+        self._disk_count = self._db.execute("SELECT COUNT(*) FROM subtasks").fetchone()[0]
+
+    def get(self, task, prompt, model):
+        """Cached subtasks for a task, or None"""
+        key = cache_key(task, prompt, model)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return list(entry[1])
+            self._memory.pop(key, None)
+
+            row = self._db.execute(
+                "SELECT subtasks, expires_at FROM subtasks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM subtasks WHERE key = ?", (key,))
+                self._disk_count -= 1
+                return None
+            self._db.execute("UPDATE subtasks SET last_used = ? WHERE key = ?", (now, key))
+            subtasks = json.loads(row[0])
+            self._remember(key, row[1], subtasks)
+            self._counters["disk_hits"] += 1
+            return list(subtasks)
+
+    def put(self, task, prompt, model, subtasks):
+        key = cache_key(task, prompt, model)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, list(subtasks))
+            existed = self._db.execute("SELECT 1 FROM subtasks WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO subtasks VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_task(task), json.dumps(list(subtasks)), expires_at, now),
+            )
+            if existed is None:
+                self._disk_count += 1
+            self._evict_disk(now)
+
+    def get_or_compute(self, task, prompt, model, compute):
+        """Return cached subtasks, or call compute() and cache a non-empty result"""
+        started = time.perf_counter()
+        subtasks = self.get(task, prompt, model)
+        if subtasks is not None:
+            self._count("hit_seconds", time.perf_counter() - started)
+            return subtasks
+
+        subtasks = compute()
+        if subtasks:
+            self.put(task, prompt, model, subtasks)
+        with self._lock:
+            self._counters["misses"] += 1
+            self._counters["miss_seconds"] += time.perf_counter() - started
+        return subtasks
+
+    def stats(self):
+        """Hit/miss counts and average latency in milliseconds"""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._memory)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            "memory_hits": counters["memory_hits"],
+            "disk_hits": counters["disk_hits"],
+            "misses": counters["misses"],
+            "hit_ms": 1000 * counters["hit_seconds"] / hits if hits else 0.0,
+            "miss_ms": 1000 * counters["miss_seconds"] / counters["misses"] if counters["misses"] else 0.0,
+            "memory_entries": entries,
+            "disk_entries": self._disk_count,
+        }
+
+    def summary(self):
+        """One-line version of stats() for showing in the app"""
+        stats = self.stats()
+        return (f"Subtask cache: {stats['memory_hits'] + stats['disk_hits']} hits "
+                f"({stats['disk_hits']} from disk), {stats['misses']} misses · "
+                f"hit {stats['hit_ms']:.1f} ms, miss {stats['miss_ms']:.1f} ms")
+
+    def _count(self, name, seconds):
+        with self._lock:
+            self._counters[name] += seconds
+
+    def _remember(self, key, expires_at, subtasks):
+        self._memory[key] = (expires_at, subtasks)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        if self._disk_count <= self.disk_entries:
+            return
+        self._db.execute("DELETE FROM subtasks WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM subtasks WHERE key IN"
+            " (SELECT key FROM subtasks ORDER BY last_used LIMIT max(0, (SELECT COUNT(*) FROM subtasks) - ?))",
+            (self.disk_entries,),
+        )
+        self._disk_count = self._db.execute("SELECT COUNT(*) FROM subtasks").fetchone()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(path=None):
+    """Process-wide cache shared by every session"""
+    return SubtaskCache(path or os.path.join(CACHE_DIR, "subtasks.sqlite3"))
+
+
+def cached_subtasks(prompt, model):
+    """Decorator caching a `task -> list of subtasks` function under a prompt and model version"""
+    def decorate(generate):
+        @functools.wraps(generate)
+        def wrapper(task):
+            return get_cache().get_or_compute(task, prompt, model, lambda: generate(task))
+        return wrapper
+    return decorate
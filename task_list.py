@@ -0,0 +1,80 @@
+"""The subtask list as one editable table instead of a row of widgets per task.
+
+`task_list()` renders every task in a single st.data_editor, so the
+page holds one element however long the list is. Edits are applied in
+its on_change callback, and only to the rows whose edits changed since
+the last call.
+
+The editor reports edits relative to the rows it was first given, so
+those rows are kept for the editor's lifetime rather than rebuilt from
+the tasks on every run. Call reset_task_list() after replacing the
+tasks to start a fresh editor for the new list.
+"""
+import streamlit as st
+
+from session_store import restore_offloaded
+
+
+def reset_task_list(key="task_list"):
+    """Start a new editor, e.g. after the task list was replaced"""
+    st.session_state[f"{key}_generation"] = st.session_state.get(f"{key}_generation", 0) + 1
+    st.session_state.pop(f"{key}_rows", None)
+    st.session_state.pop(f"{key}_applied", None)
+
+
+def _editor_key(key):
+    return f"{key}_{st.session_state.get(f'{key}_generation', 0)}"
+
+
+def _apply_edits(key, tasks_key, on_toggle=None, on_finished=None):
+    restore_offloaded()  # as an on_change callback this runs before the script restores the session
+    tasks = st.session_state.get(tasks_key)
+    editor = st.session_state.get(_editor_key(key))
+    if tasks is None or editor is None:
+        return  # not loaded or not rendered yet; the edits are picked up next time
+    rows = st.session_state[f"{key}_rows"]
+    edited = {int(row): change for row, change in editor["edited_rows"].items()}
+    applied = st.session_state.get(f"{key}_applied", {})
+    ticked = False
+    # A row whose edit was undone drops out of edited_rows and goes back to its original values
+    for row in edited.keys() | applied.keys():
+        if edited.get(row) != applied.get(row):
+            change = edited.get(row, {})
+            done = change.get("done", rows["done"][row])
+            if done != tasks[row].completed:
+                ticked |= done
+                if on_toggle is not None:
+                    on_toggle(row, done)
+            tasks[row].completed = done
+            tasks[row].text = change.get("task", rows["task"][row])
+    st.session_state[f"{key}_applied"] = edited
+    # Checked once every row is updated, as one call can tick off several tasks
+    if ticked and on_finished is not None and all(task.completed for task in tasks):
+        on_finished()
+
+
+def task_list(tasks_key="tasks", key="task_list", on_toggle=None, on_finished=None):
+    """Editable table of st.session_state[tasks_key]: tick tasks off or reword them
+
+    `on_toggle(row, done)` is called for each task ticked or unticked, and
+    `on_finished()` when the edits tick off the last open task.
+    """
+    tasks = st.session_state[tasks_key]
+    if f"{key}_rows" not in st.session_state:
+        st.session_state[f"{key}_rows"] = {"done": [task.completed for task in tasks],
+                                           "task": [task.text for task in tasks]}
+    _apply_edits(key, tasks_key, on_toggle, on_finished)  # catches edits that arrived while the session was offloaded
+
+    st.data_editor(
+        st.session_state[f"{key}_rows"],
+        key=_editor_key(key),
+        on_change=_apply_edits,
+        args=(key, tasks_key, on_toggle, on_finished),
+        column_config={
+            "done": st.column_config.CheckboxColumn("Done", width="small"),
+            "task": st.column_config.TextColumn("Subtask", width="large", required=True),
+        },
+        num_rows="fixed",
+        hide_index=True,
+        width="stretch",
+    )
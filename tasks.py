@@ -0,0 +1,23 @@
+"""Compact task objects shared by the apps.
+
+A task is a slotted dataclass rather than a dict: no per-object __dict__,
+and its text is interned, so a template subtask shown in a thousand
+sessions is stored once per process instead of once per session.
+"""
+import sys
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Task:
+    id: int
+    text: str
+    completed: bool = False
+
+    def __post_init__(self):
+        self.text = sys.intern(self.text)
+
+
+def tasks_from_subtasks(subtasks):
+    """Number a list of subtask strings as fresh, uncompleted tasks"""
+    return [Task(i + 1, text) for i, text in enumerate(subtasks)]
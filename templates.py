@@ -0,0 +1,138 @@
+"""Task breakdown templates, matched through an inverted keyword index.
+
+The catalog lives in data/task_templates.json. Each template has an id,
+keyword weights and its subtasks; a keyword may be one word ("essay") or
+two ("tax return"). Loading builds one dict from every keyword to the
+templates that use it, so matching a task costs a lookup per word and
+word pair instead of a scan over every template, and the catalog can
+grow to hundreds of domains without slowing the apps down.
+
+The data file is checked for changes at most every RELOAD_INTERVAL
+seconds and reloaded in place, so templates can be edited without a
+restart.
+"""
+import functools
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+from subtask_cache import normalize_task
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "task_templates.json")
+RELOAD_INTERVAL = 2.0  # seconds between checks of the data file's mtime
+MIN_SCORE = 1.0  # keyword weight a template needs before it is trusted
+MIN_SHARE = 0.6  # and its share of the two best scores, so near-ties go to the LLM
+# Skipped before pairing words, so "clean my room" still contains "clean room"
+STOPWORDS = frozenset({"a", "an", "the", "my", "our", "your", "some", "for", "to", "of", "and", "on", "in", "up"})
+
+
+class Template(NamedTuple):
+    id: str
+    keywords: dict  # keyword -> weight
+    subtasks: tuple
+
+
+class Match(NamedTuple):
+    template: Template
+    score: float       # summed weight of the keywords found in the task
+    confidence: float  # score / (score + runner-up score), 1.0 when unopposed
+
+
+class TemplateCatalog:
+    """Ranked keyword matching over a hot-reloaded template file"""
+
+    def __init__(self, path=CATALOG_PATH, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as data:
+            catalog = json.load(data)
+
+        templates = [_template(entry) for entry in catalog["templates"]]
+        index = defaultdict(list)  # keyword -> [(template position, weight)]
+        for position, template in enumerate(templates):
+            for keyword, weight in template.keywords.items():
+                index[" ".join(normalize_task(keyword).split())].append((position, weight))
+
+        # Swap everything in at once, so readers never see half a catalog
+        self._templates, self._index = templates, dict(index)
+        self._fallback = _template(catalog["fallback"])
+        self._mtime = mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                changed = os.stat(self.path).st_mtime_ns != self._mtime
+                if changed:
+                    self._load()
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # a half-written or broken file: keep serving the last good catalog
+
+    def rank(self, task, limit=3):
+        """Best matching templates for a task, highest score first"""
+        self._maybe_reload()
+        index, templates = self._index, self._templates
+        words = [_singular(word, index) for word in normalize_task(task).split() if word not in STOPWORDS]
+        scores = defaultdict(float)
+        for keyword in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            for position, weight in index.get(keyword, ()):
+                scores[position] += weight
+
+        best = heapq.nlargest(max(limit, 2), scores.items(), key=lambda item: item[1])
+        total = sum(score for _, score in best[:2])
+        return [Match(templates[position], score, score / total) for position, score in best[:limit]]
+
+    def best_match(self, task):
+        """The top template when the match is confident, else None"""
+        ranked = self.rank(task, limit=1)
+        if ranked and ranked[0].score >= MIN_SCORE and ranked[0].confidence >= MIN_SHARE:
+            return ranked[0].template
+        return None
+
+    @property
+    def fallback(self):
+        """Generic template for tasks nothing else matches"""
+        self._maybe_reload()
+        return self._fallback
+
+    def __len__(self):
+        return len(self._templates)
+
+
+def _template(entry):
+    # Interned, so a reload or a task built from the same text shares one string
+    subtasks = tuple(map(sys.intern, entry["subtasks"]))
+    return Template(entry["id"], dict(entry.get("keywords", {})), subtasks)
+
+
+def _singular(word, index):
+    # "taxes" and "emails" should find "tax" and "email" without listing every plural
+    if word in index or not word.endswith("s"):
+        return word
+    for stem in (word[:-1], word[:-2]):
+        if stem in index:
+            return stem
+    return word
+
+
+@functools.lru_cache(maxsize=None)
+def get_catalog(path=CATALOG_PATH):
+    """Process-wide catalog shared by every session"""
+    return TemplateCatalog(path)
@@ -0,0 +1,87 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from achievements import RULESET_PATH, TASK_LIST_DONE, get_ruleset, load_ruleset, new_progress, record_progress
+
+MONDAY = datetime(2025, 3, 3, 12).timestamp()
+DAY = 86400
+
+
+@pytest.fixture
+def state():
+    return {"achievements": new_progress()}
+
+
+def earned(state):
+    return set(state["achievements"]["earned"])
+
+
+def test_tick_and_untick_move_points_both_ways(state):
+    assert record_progress(state, "task_done", MONDAY).points == 5
+    assert state["progress"] == 5
+    assert record_progress(state, "task_undone", MONDAY).points == -5
+    assert state["progress"] == 0
+    record_progress(state, "task_undone", MONDAY)
+    assert state["progress"] == 0  # points never go below zero
+
+
+def test_level_up_once_and_never_down(state):
+    levels = get_ruleset().levels
+    outcomes = [record_progress(state, "focus_complete", MONDAY + i) for i in range(3)]
+    assert [outcome.level_up for outcome in outcomes] == [False, False, True]
+    assert state["progress"] == 30 == levels[1]
+    assert state["companion_level"] == 2
+    outcome = record_progress(state, "task_undone", MONDAY + 3)
+    assert not outcome.level_up
+    assert state["progress"] < levels[1]
+    assert state["companion_level"] == 2  # unticking does not shrink the companion
+
+
+def test_ten_distinct_ticks_in_a_day_earn_once(state):
+    for task in range(9):
+        record_progress(state, "task_done", MONDAY + task)
+    assert "ten-tasks-in-a-day" not in earned(state)
+    outcome = record_progress(state, "task_done", MONDAY + 9)
+    assert [achievement.id for achievement in outcome.earned] == ["ten-tasks-in-a-day"]
+    assert outcome.points == 5 + 15
+    assert state["progress_news"] == ["🎯 Achievement unlocked: Ten tasks ticked off in a day"]
+    assert record_progress(state, "task_done", MONDAY + 10).earned == ()
+
+
+def test_toggling_one_task_does_not_earn_per_day(state):
+    for toggle in range(50):
+        record_progress(state, "task_done", MONDAY + toggle)
+        record_progress(state, "task_undone", MONDAY + toggle)
+    assert "ten-tasks-in-a-day" not in earned(state)
+    assert state["progress"] == 0
+
+
+def test_untick_on_a_later_day_leaves_that_days_count(state):
+    for task in range(5):
+        record_progress(state, "task_done", MONDAY + task)
+    record_progress(state, "task_undone", MONDAY + DAY)  # yesterday's tick taken back today
+    for task in range(10):
+        record_progress(state, "task_done", MONDAY + DAY + 1 + task)
+    assert "ten-tasks-in-a-day" in earned(state)
+
+
+def test_finished_list_and_streak(state):
+    outcome = record_progress(state, TASK_LIST_DONE, MONDAY)
+    assert [achievement.id for achievement in outcome.earned] == ["first-task-list"]
+    for offset in range(3):
+        record_progress(state, "focus_complete", MONDAY + offset * DAY)
+    assert {"first-session", "three-day-streak"} <= earned(state)
+    assert "week-streak" not in earned(state)
+
+
+def test_rules_over_unticks_are_rejected(tmp_path):
+    with open(RULESET_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    data["achievements"].append({"id": "unticker", "title": "Unticker", "rule": "count",
+                                 "kinds": ["task_undone"], "target": 3})
+    path = tmp_path / "achievements.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(ValueError, match="unticker"):
+        load_ruleset(str(path))
@@ -0,0 +1,120 @@
+import os
+import time
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from event_log import (BREAK_COMPLETE, FOCUS_COMPLETE, FOCUS_START, FOCUS_STOP, MOOD_READING, TASK_DONE,
+                       TASK_UNDONE, EventLog, event_dtype, log_event)
+from rollups import EPOCH, FEW_EVENTS, Rollups, get_rollups
+
+
+@pytest.fixture(autouse=True)
+def new_york():
+    # Local days and weeks follow the process time zone; this one has daylight saving
+    before = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if before is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = before
+    time.tzset()
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    log = EventLog(str(tmp_path / "events"))
+    return Rollups(log, str(tmp_path / "rollups.sqlite3"))
+
+
+def ts(*args):
+    return datetime(*args).timestamp()
+
+
+def day(*args):
+    return (date(*args) - EPOCH).days
+
+
+def test_events_fall_in_their_local_day_and_monday_week(rollups):
+    user = "u1"
+    # Sunday 2025-03-02 late evening, then Monday 2025-03-03 just after midnight: new day and new week
+    rollups.log.append(user, FOCUS_COMPLETE, mood="neutral", elapsed=1500, planned=1500, ts=ts(2025, 3, 2, 23, 30))
+    rollups.log.append(user, TASK_DONE, ts=ts(2025, 3, 2, 23, 45))
+    rollups.log.append(user, FOCUS_STOP, elapsed=600, planned=1500, ts=ts(2025, 3, 3, 0, 15))
+    rollups.log.append(user, TASK_DONE, ts=ts(2025, 3, 3, 0, 20))
+    rollups.log.append(user, TASK_UNDONE, ts=ts(2025, 3, 3, 0, 21))
+    rollups.log.append(user, MOOD_READING, mood="positive", ts=ts(2025, 3, 3, 9))
+    assert rollups.update(user) == 6
+
+    days = rollups.rows(user, "day")
+    assert sorted(days) == [day(2025, 3, 2), day(2025, 3, 3)]
+    sunday, monday = days[day(2025, 3, 2)], days[day(2025, 3, 3)]
+    assert (sunday["sessions"], sunday["completed"], sunday["focus_seconds"], sunday["tasks_done"]) == (1, 1, 1500, 1)
+    assert (monday["sessions"], monday["completed"], monday["focus_seconds"], monday["tasks_done"]) == (1, 0, 600, 0)
+    assert monday["mood_positive"] == 1
+
+    weeks = rollups.rows(user, "week")
+    assert sorted(weeks) == [day(2025, 2, 24), day(2025, 3, 3)]  # both Mondays
+    assert weeks[day(2025, 2, 24)]["sessions"] == 1
+    assert weeks[day(2025, 3, 3)]["sessions"] == 1
+
+
+def test_daylight_saving_day_is_one_bucket(rollups):
+    user = "u2"
+    # 2025-03-09 has 23 hours in New York; both ends of it are the same local day
+    rollups.log.append(user, BREAK_COMPLETE, elapsed=300, planned=300, ts=ts(2025, 3, 9, 0, 30))
+    rollups.log.append(user, BREAK_COMPLETE, elapsed=300, planned=300, ts=ts(2025, 3, 9, 23, 30))
+    rollups.update(user)
+    days = rollups.rows(user, "day")
+    assert list(days) == [day(2025, 3, 9)]
+    assert days[day(2025, 3, 9)]["break_seconds"] == 600
+
+
+def test_history_fills_empty_periods(rollups):
+    user = "u3"
+    rollups.log.append(user, FOCUS_COMPLETE, elapsed=1500, planned=1500, ts=ts(2025, 3, 3, 10))
+    rows = rollups.history(user, "day", 3, now=ts(2025, 3, 5, 12))
+    assert [row["start"] for row in rows] == [date(2025, 3, 3), date(2025, 3, 4), date(2025, 3, 5)]
+    assert [row["sessions"] for row in rows] == [1, 0, 0]
+
+
+def test_one_by_one_matches_batch_and_rebuild(rollups):
+    rng = np.random.default_rng(1)
+    events = np.zeros(3 * FEW_EVENTS, event_dtype())
+    events["ts"] = np.sort(rng.uniform(ts(2025, 3, 1), ts(2025, 3, 20), len(events)))
+    events["kind"] = rng.choice([FOCUS_START, FOCUS_STOP, FOCUS_COMPLETE, BREAK_COMPLETE, TASK_DONE,
+                                 TASK_UNDONE, MOOD_READING], len(events))
+    events["elapsed"] = rng.uniform(0, 1800, len(events))
+    events["mood"] = rng.integers(-1, 2, len(events))
+    events["task"] = -1
+
+    # One at a time, as log_event() folds them, then the rest as one large backlog
+    for event in events[:FEW_EVENTS]:
+        rollups.log.extend("u4", event[None])
+        assert rollups.update("u4") == 1
+    rollups.log.extend("u4", events[FEW_EVENTS:])
+    assert rollups.update("u4") == len(events) - FEW_EVENTS
+    folded = {period: rollups.rows("u4", period) for period in ("day", "week")}
+
+    rollups.rebuild("u4")
+    for period in ("day", "week"):
+        rebuilt = rollups.rows("u4", period)
+        assert rebuilt.keys() == folded[period].keys()
+        for start, row in rebuilt.items():
+            assert row == pytest.approx(folded[period][start])
+    assert sum(row["sessions"] for row in folded["day"].values()) == np.isin(
+        events["kind"], [FOCUS_STOP, FOCUS_COMPLETE]).sum()
+
+
+def test_log_event_updates_rollups_as_it_logs():
+    user = uuid.uuid4().hex
+    log_event("app", FOCUS_COMPLETE, user=user, mood="neutral", elapsed=1500, planned=1500,
+              ts=ts(2025, 3, 3, 10))
+    # rows() only reads; the event was folded in when it was logged
+    assert get_rollups("app").rows(user, "day")[day(2025, 3, 3)]["sessions"] == 1
+    log_event("app", TASK_DONE, user=user, mood="neutral", ts=ts(2025, 3, 3, 11))
+    assert get_rollups("app").rows(user, "day")[day(2025, 3, 3)]["tasks_done"] == 1
@@ -0,0 +1,31 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from st_client import StreamlitServer, StreamlitSession  # noqa: E402
+
+
+def test_fragment_rerun_after_offload():
+    # Offload within a second of going idle, then rerun just the focus timer panel
+    env = {"NEURONUDGE_STATE_DIR": tempfile.mkdtemp(), "NEURONUDGE_IDLE_TIMEOUT": "0.5",
+           "NEURONUDGE_SWEEP_INTERVAL": "0.5"}
+
+    async def session(url):
+        async with StreamlitSession(url, f"sid={uuid.uuid4().hex}") as page:
+            await page.rerun()
+            await page.click(key="demo_btn")
+            assert "exception" not in page.elements
+            time.sleep(2)
+            result = await page.click(key="nudge_btn")
+            return result.fragment_id, page.elements
+
+    with StreamlitServer(os.path.join(REPO_DIR, "app.py"), env=env) as server:
+        fragment_id, elements = asyncio.run(session(server.url))
+    assert fragment_id
+    assert "exception" not in elements
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+import tempfile
+import urllib.request
+import uuid
+
+import pytest
+
+pytest.importorskip("numpy")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from st_client import StreamlitServer, StreamlitSession  # noqa: E402
+
+from sounds import SOUNDS_URL, sound_url  # noqa: E402
+
+
+def test_sound_plays_under_a_base_url_path():
+    assert not SOUNDS_URL.startswith("/")
+
+    async def session(url):
+        async with StreamlitSession(url, f"sid={uuid.uuid4().hex}") as page:
+            await page.rerun()
+            await page.click(key="demo_btn")
+            await page.click(key="sound_forest")
+            return page.elements
+
+    env = {"NEURONUDGE_STATE_DIR": tempfile.mkdtemp()}
+    with StreamlitServer(os.path.join(REPO_DIR, "app.py"), env=env, base_url_path="neuronudge") as server:
+        elements = asyncio.run(session(server.url))
+        assert "audio" in elements
+        assert "exception" not in elements
+        # The frontend puts /app/static/ URLs under the base path, which is where the clip is served
+        with urllib.request.urlopen(server.http_url + sound_url("Forest")) as response:
+            assert response.status == 200
@@ -0,0 +1,29 @@
+import core
+from subtask_cache import SubtaskCache, cache_key, get_cache
+
+
+def test_key_covers_every_prompt_and_the_model():
+    key = cache_key("Write an essay!", ("system", "user {task}"), "model-a")
+    assert key == cache_key("  write AN essay ", ("system", "user {task}"), "model-a")
+    assert key != cache_key("write an essay", ("edited system", "user {task}"), "model-a")
+    assert key != cache_key("write an essay", ("system", "user {task}"), "model-b")
+
+
+def test_edited_prompt_is_a_miss(tmp_path):
+    cache = SubtaskCache(str(tmp_path / "subtasks.sqlite3"))
+    cache.put("plan a trip", ("system", "user"), "model", ["book"])
+    assert cache.get("plan a trip", ("system", "user"), "model") == ["book"]
+    assert cache.get("plan a trip", ("edited system", "user"), "model") is None
+
+
+def test_offline_fallback_goes_through_the_cache(monkeypatch):
+    monkeypatch.setattr(core.llm_client, "is_configured", lambda: False)
+    task = "qzx an unmatched chore"
+    assert core.get_catalog().best_match(task) is None
+    before = get_cache().stats()
+    first = core.generate_subtasks(task)
+    assert first == list(core.get_catalog().fallback.subtasks)
+    assert core.generate_subtasks(task) == first
+    after = get_cache().stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["memory_hits"] == before["memory_hits"] + 1
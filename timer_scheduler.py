@@ -0,0 +1,155 @@
+"""One process-wide thread that ends every session's focus timer on time.
+
+Each running timer is an entry in a min-heap ordered by deadline. A
+single background thread sleeps until the earliest deadline, pops it
+and runs its callback, which hands the completion to the session (see
+session_store.update_session): an open page reruns and completes the
+timer itself, and a closed one has it completed in the store. A timer
+therefore ends on time whether or not its page is open, at O(log n) per
+timer.
+
+The scheduler is not the only thing that can end a timer. The browser
+can report zero, the user can pause, or a new session can start. A run
+that does any of these cancels the pending timer first. cancel() waits
+for a callback that is already running, so each timer is completed
+exactly once: by its run or by the scheduler. A completion the
+callback queued is applied then, so the run sees that timer over.
+
+The apps schedule through schedule_session_timer() and
+cancel_session_timer(), keyed by the session's store key.
+"""
+import functools
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+from session_store import apply_queued, session_ref, update_session
+from traces import REPLAY
+
+
+class TimerScheduler:
+    """Deadline callbacks for many sessions on one thread, kept in a min-heap"""
+
+    def __init__(self):
+        self._heap = []  # (deadline, seq, key); entries replaced or cancelled are skipped when popped
+        self._timers = {}  # key -> (deadline, seq, callback) of its pending timer
+        self._firing = set()  # keys whose callback is running
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._counters = {"scheduled": 0, "cancelled": 0, "fired": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True, name="timer-scheduler")
+        self._thread.start()
+
+    def schedule(self, key, deadline, callback):
+        """Call callback() at `deadline` (a time.time() value), replacing any timer under `key`"""
+        with self._cond:
+            seq = next(self._seq)
+            self._timers[key] = (deadline, seq, callback)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            self._counters["scheduled"] += 1
+            if len(self._heap) > 2 * len(self._timers) + 64:
+                self._compact()
+            if self._heap[0][1] == seq:
+                self._cond.notify_all()  # the new timer is the earliest; wake the thread to wait for it
+
+    def cancel(self, key):
+        """Drop the timer under `key`; True if one was pending.
+
+        If its callback is running, wait for it to finish first, so the
+        caller sees the completed state and does not complete it again.
+        """
+        with self._cond:
+            while key in self._firing:
+                self._cond.wait()
+            if self._timers.pop(key, None) is None:
+                return False
+            self._counters["cancelled"] += 1
+            return True
+
+    def deadline(self, key):
+        """The pending deadline under `key`, or None"""
+        with self._cond:
+            timer = self._timers.get(key)
+            return timer[0] if timer else None
+
+    def _compact(self):
+        # Drop replaced and cancelled entries once they outnumber the live ones
+        self._heap = [(deadline, seq, key) for key, (deadline, seq, _) in self._timers.items()]
+        heapq.heapify(self._heap)
+
+    def _next_due(self):
+        # Under the lock: wait until the earliest live timer is due, then pop it
+        while True:
+            while self._heap:
+                deadline, seq, key = self._heap[0]
+                timer = self._timers.get(key)
+                if timer is not None and timer[1] == seq:
+                    break
+                heapq.heappop(self._heap)  # replaced or cancelled
+            if not self._heap:
+                self._cond.wait()
+                continue
+            wait = self._heap[0][0] - time.time()
+            if wait <= 0:
+                _, _, key = heapq.heappop(self._heap)
+                return key, self._timers.pop(key)[2]
+            self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                key, callback = self._next_due()
+                self._firing.add(key)
+            failed = False
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+                failed = True
+            with self._cond:
+                self._firing.discard(key)
+                self._counters["failed" if failed else "fired"] += 1
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._counters, pending=len(self._timers), heap=len(self._heap))
+
+
+@functools.lru_cache(maxsize=None)
+def get_timer_scheduler():
+    """Process-wide scheduler shared by every session"""
+    return TimerScheduler()
+
+
+def schedule_session_timer(deadline, fields, complete):
+    """Have the scheduler call complete(state, user) for this run's session at `deadline`.
+
+    The call goes through session_store.update_session: an open page's run
+    makes it, and otherwise its changes to `fields` are made in the store. Cheap to repeat
+    on every run while a timer is active: an unchanged deadline is left
+    as it is. `complete` may still be called for a timer its run already
+    ended, so it must check that the timer is active.
+
+    Replayed sessions run on the trace's clock, not the wall clock, so
+    they end their timers in their own runs.
+    """
+    ref = session_ref()
+    if ref is None or REPLAY:
+        return
+    scheduler = get_timer_scheduler()
+    if scheduler.deadline(ref.key) != deadline:
+        scheduler.schedule(ref.key, deadline,
+                           lambda: update_session(ref, fields, lambda state: complete(state, ref.user)))
+
+
+def cancel_session_timer():
+    """Take this run's session's timer back before the run ends or replaces it; see TimerScheduler.cancel"""
+    ref = session_ref()
+    if ref is None:
+        return False
+    cancelled = get_timer_scheduler().cancel(ref.key)
+    apply_queued()  # a completion the scheduler queued since the run started
+    return cancelled
@@ -0,0 +1,144 @@
+"""Widget-event traces of real sessions, and deterministic reruns to replay them.
+
+With NEURONUDGE_TRACE_DIR set, every session records a trace there: one
+JSON line per rerun with its time offset and the widget states the
+browser changed, such as a button press, new text or a focus timer
+event. Each state is kept as protobuf JSON under its widget key, which
+is how the replayer finds the widget again: a widget without a key has
+an ID derived from the script's path, so every widget in the apps has
+one. benchmarks/replay_traces.py sends the traces back to either app, at
+full speed or at the recorded pace.
+
+Replaying gives the same result only if the script draws the same random
+nudges and sees the same clock. So the apps take randomness from
+session_random() and time from now() / timestamp():
+
+- A recorded session is seeded, and the seed goes into the trace header.
+- On a server started with NEURONUDGE_REPLAY=1, the replayer passes that
+  seed as ?replay_seed= and each event's offset as ?replay_clock=. The
+  clock then reads REPLAY_EPOCH plus the offset.
+
+Otherwise session_random() is the random module and now() is the real
+clock. A session recorded on a replay server keeps the clock it was
+given as its events' offsets, so a scripted walkthrough (see
+benchmarks/record_traces.py) can span a whole focus session in seconds.
+"""
+import functools
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+from google.protobuf.json_format import MessageToDict
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+TRACE_DIR = os.environ.get("NEURONUDGE_TRACE_DIR")
+REPLAY = os.environ.get("NEURONUDGE_REPLAY") == "1"
+TRACE_VERSION = 1
+REPLAY_EPOCH = datetime(2024, 1, 1, 9, 0, 0)  # the replayed session's clock starts here
+SEED_PARAM = "replay_seed"
+CLOCK_PARAM = "replay_clock"
+
+
+def _replay_param(name):
+    if not REPLAY:
+        return None
+    value = st.query_params.get(name)
+    return float(value) if value else None
+
+
+def now():
+    """datetime.now(), or the trace's clock when replaying"""
+    offset = _replay_param(CLOCK_PARAM)
+    return datetime.now() if offset is None else REPLAY_EPOCH + timedelta(seconds=offset)
+
+
+def timestamp():
+    """time.time(), or the trace's clock when replaying"""
+    offset = _replay_param(CLOCK_PARAM)
+    return time.time() if offset is None else REPLAY_EPOCH.timestamp() + offset
+
+
+def session_random(state=None):
+    """This session's random number generator; seeded when recording or replaying
+
+    `state` is the session's state when called outside its runs (see
+    session_store.update_session); st.session_state otherwise.
+    """
+    if not (TRACE_DIR or REPLAY):
+        return random
+    state = st.session_state if state is None else state
+    rng = state.get("_random")
+    if rng is None:
+        seed = _replay_param(SEED_PARAM)
+        if seed is None:
+            seed = state.get("_trace_seed")
+        rng = state["_random"] = random.Random(int(seed) if seed is not None else None)
+    return rng
+
+
+def _changed_widgets():
+    # Private API: the widget values the browser sent for this run, and the last run's values
+    inner = get_script_run_ctx().session_state._state
+    mapping = inner._key_id_mapper.id_key_mapping
+    widgets = []
+    for widget_id in inner._new_widget_state:
+        if inner._widget_changed(widget_id):
+            proto = inner._new_widget_state.get_serialized(widget_id)
+            if proto is not None:
+                widgets.append({"key": mapping.get(widget_id), "state": MessageToDict(proto)})
+    return widgets
+
+
+def _record(app, scope):
+    state = st.session_state
+    if "_trace_path" not in state:
+        # Seeded before the first nudge is drawn, so a replay draws the same ones
+        state._trace_seed = random.randrange(2 ** 32)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        state._trace_path = os.path.join(TRACE_DIR, f"{app}-{stamp}.trace.jsonl")
+        state._trace_started = time.monotonic()
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        with open(state._trace_path, "w") as output:
+            header = {"trace": TRACE_VERSION, "app": f"{app}.py", "seed": state._trace_seed,
+                      "recorded": datetime.now().isoformat(timespec="seconds")}
+            output.write(json.dumps(header) + "\n")
+    offset = _replay_param(CLOCK_PARAM)
+    if offset is None:
+        offset = time.monotonic() - state._trace_started
+    event = {"t": round(offset, 3), "scope": scope, "widgets": _changed_widgets()}
+    with open(state._trace_path, "a") as output:
+        output.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+
+def record_rerun(app):
+    """Add this full rerun to the session's trace; call at the top of the script"""
+    if TRACE_DIR:
+        _record(app, "full")
+
+
+def recorded_fragment(app):
+    """Decorator for a function under @st.fragment that records the fragment's own reruns"""
+    def decorate(function):
+        if not TRACE_DIR:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if ctx is not None and ctx.fragment_ids_this_run:
+                _record(app, "fragment")
+            return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def load_trace(path):
+    """(header, events) of a trace file"""
+    with open(path) as trace:
+        header = json.loads(trace.readline())
+        if header.get("trace") != TRACE_VERSION:
+            raise ValueError(f"{path}: unsupported trace version {header.get('trace')}")
+        return header, [json.loads(line) for line in trace if line.strip()]